@@ -1,14 +1,388 @@
 # binance_client.py
 
+import os
+import gzip
+import atexit
+import json
+import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from binance.client import Client
+from binance.exceptions import BinanceAPIException, BinanceRequestException
 from config import BINANCE_API_KEY, BINANCE_API_SECRET
+from weight_governor import governor, PRIORITY_ENGINE, PRIORITY_DISPLAY
+from resampler import MAX_KLINES_PER_REQUEST, INTERVAL_MS
+from candles import klines_to_candles
+from kline_archive import KlineArchive
 
-# 바이낸스 클라이언트 객체 생성
+# 빠른 JSON 디코더 (설치되어 있지 않으면 표준 json 사용)
 try:
-    client = Client(BINANCE_API_KEY, BINANCE_API_SECRET)
-except Exception as e:
-    print(f"바이낸스 클라이언트 초기화 실패: {e}")
-    client = None
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 동시 요청을 고려한 커넥션 풀 크기
+HTTP_POOL_SIZE = 20
+
+# 엔드포인트별 전송 통계 {path: {...}}
+_transport_stats = {}
+_transport_stats_lock = threading.Lock()
+
+def _record_transport_stats(response, *args, **kwargs):
+    """requests 응답 훅: 요청별 지연 시간과 전송 바이트(압축 기준/해제 후)를 기록합니다."""
+    try:
+        decoded_bytes = len(response.content)
+        wire_bytes = response.raw.tell() if response.raw is not None else decoded_bytes
+        latency = response.elapsed.total_seconds()
+        path = urlparse(response.url).path
+    except Exception:
+        return response
+
+    with _transport_stats_lock:
+        stat = _transport_stats.setdefault(path, {
+            'count': 0, 'total_latency': 0.0, 'max_latency': 0.0, 'wire_bytes': 0, 'decoded_bytes': 0
+        })
+        stat['count'] += 1
+        stat['total_latency'] += latency
+        stat['max_latency'] = max(stat['max_latency'], latency)
+        stat['wire_bytes'] += wire_bytes
+        stat['decoded_bytes'] += decoded_bytes
+    return response
+
+def _sync_weight_governor(response, *args, **kwargs):
+    """requests 응답 훅: 서버가 알려 준 가중치 사용량과 429/418 차단을 가중치 관리자에 반영합니다."""
+    used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used_weight is not None:
+        try:
+            governor.sync_used_weight(int(used_weight))
+        except ValueError:
+            pass
+    if response.status_code in (418, 429):
+        try:
+            retry_after = float(response.headers.get('Retry-After', 60))
+        except ValueError:
+            retry_after = 60.0
+        governor.penalize(retry_after)
+    return response
+
+def get_transport_stats():
+    """엔드포인트별 요청 수, 평균/최대 지연 시간(초), 전송 바이트 통계를 반환합니다."""
+    with _transport_stats_lock:
+        stats = {path: dict(stat) for path, stat in _transport_stats.items()}
+    for stat in stats.values():
+        stat['avg_latency'] = stat['total_latency'] / stat['count'] if stat['count'] else 0.0
+    return stats
+
+class TunedClient(Client):
+    """
+    커넥션 풀, keep-alive, gzip 압축, 빠른 JSON 디코딩을 적용한 python-binance 클라이언트.
+    대량 조회 시 TLS 핸드셰이크를 반복하지 않고 연결을 재사용합니다.
+    """
+
+    def _init_session(self):
+        session = super()._init_session()
+        # pool_block=True: 풀이 가득 차면 새 연결을 만들고 버리는 대신 반납을 기다림
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, pool_block=True)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        session.hooks['response'].extend([_record_transport_stats, _sync_weight_governor])
+        return session
+
+    def _handle_response(self, response=None):
+        response = response if response is not None else self.response
+        if not (200 <= response.status_code < 300):
+            raise BinanceAPIException(response, response.status_code, response.text)
+        try:
+            return _json_loads(response.content)
+        except ValueError:
+            raise BinanceRequestException(f'Invalid Response: {response.text}')
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+class TrafficRecorder:
+    """
+    거래소 응답을 받은 시각과 함께 gzip 압축된 JSON Lines 파일에 이어 씁니다.
+    매 기록마다 flush하므로 비정상 종료 시에도 그 전까지의 기록은 읽을 수 있습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, 'at', encoding='utf-8')
+        self.count = 0
+
+    def write(self, method, params, data):
+        line = json.dumps({'ts': time.time(), 'method': method, 'params': params, 'data': data}, separators=(',', ':'))
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+def read_recording(path):
+    """기록 파일의 레코드를 순서대로 돌려줍니다. 마지막 레코드가 잘려 있으면 그 앞까지만 읽습니다."""
+    records = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        except (EOFError, OSError):
+            pass
+    return records
+
+class ReplayClient:
+    """
+    TrafficRecorder로 기록한 응답을 python-binance Client 대신 돌려주는 오프라인 클라이언트.
+    speed=None이면 호출할 때마다 같은 요청의 다음 기록을 순서대로 돌려주고(단계 모드),
+    speed>0이면 기록 시각을 speed배속 가상 시계에 맞춰 그 시점의 가장 최근 응답을 돌려줍니다.
+    """
+    is_offline = True
+
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.records = {} # {(method, params_key): [(ts, data), ...]}
+        self.klines_by_series = {} # {(symbol, interval): [(limit, params_key), ...]}
+        self.cursors = {}
+        first_ts = None
+        for record in read_recording(path):
+            key = (record['method'], _params_key(record['params']))
+            self.records.setdefault(key, []).append((record['ts'], record['data']))
+            if record['method'] == 'futures_klines':
+                p = record['params']
+                series = self.klines_by_series.setdefault((p.get('symbol'), p.get('interval')), [])
+                if (p.get('limit', 500), key[1]) not in series:
+                    series.append((p.get('limit', 500), key[1]))
+            if first_ts is None or record['ts'] < first_ts:
+                first_ts = record['ts']
+        self.start_ts = first_ts or 0.0
+        self.started_at = time.monotonic()
+        print(f"재생 클라이언트: {sum(len(v) for v in self.records.values())}개 응답을 불러왔습니다. ({path})")
+
+    def now(self):
+        """가상 시계 기준의 현재 시각 (기록 시각 단위)"""
+        return self.start_ts + (time.monotonic() - self.started_at) * (self.speed or 0)
+
+    def _lookup(self, method, params):
+        key = (method, _params_key(params))
+        if key in self.records:
+            return key, None
+        if method == 'futures_klines':
+            # limit만 다른 기록이 있으면 더 긴 기록의 뒷부분을 잘라서 사용
+            limit = params.get('limit', 500)
+            candidates = [c for c in self.klines_by_series.get((params.get('symbol'), params.get('interval')), []) if c[0] >= limit]
+            if candidates:
+                return (method, min(candidates)[1]), limit
+        raise LookupError(f"재생 기록에 없는 요청입니다: {method} {params}")
+
+    def _serve(self, method, params):
+        key, limit = self._lookup(method, params)
+        entries = self.records[key]
+        with self.lock:
+            if self.speed is None:
+                index = min(self.cursors.get(key, 0), len(entries) - 1)
+                self.cursors[key] = index + 1
+            else:
+                now = self.now()
+                index = 0
+                for i, (ts, _) in enumerate(entries):
+                    if ts > now:
+                        break
+                    index = i
+        data = entries[index][1]
+        return data[-limit:] if limit else data
+
+    def __getattr__(self, method):
+        if not method.startswith('futures_'):
+            raise AttributeError(method)
+        return lambda **params: self._serve(method, params)
+
+# 응답 기록기 (start_recording으로 활성화)
+_recorder = None
+
+def start_recording(path):
+    """이후의 모든 거래소 응답을 path에 기록합니다."""
+    global _recorder
+    stop_recording()
+    _recorder = TrafficRecorder(path)
+    print(f"거래소 응답 기록을 시작합니다: {path}")
+
+def stop_recording():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        print(f"거래소 응답 기록을 종료합니다. ({_recorder.count}건)")
+        _recorder = None
+
+def use_replay(path, speed=1.0):
+    """실제 거래소 대신 기록 파일을 재생하는 클라이언트로 전환합니다."""
+    global client, _exchange_info_cache
+    client = ReplayClient(path, speed)
+    _exchange_info_cache = None
+
+def _mock_client(base_url):
+    """로컬 대역 서버(mock_exchange.py)를 바라보는 클라이언트를 만듭니다."""
+    base_url = base_url.rstrip('/')
+    mock_class = type('MockTunedClient', (TunedClient,), {'API_URL': base_url + '/api', 'FUTURES_URL': base_url + '/fapi',
+                                                          'FUTURES_DATA_URL': base_url + '/futures/data'})
+    return mock_class(BINANCE_API_KEY, BINANCE_API_SECRET)
+
+def use_mock_server(base_url):
+    """실제 거래소 대신 로컬 대역 서버로 요청을 보내도록 전환합니다. 예: http://127.0.0.1:8765"""
+    global client, _exchange_info_cache
+    client = _mock_client(base_url)
+    _exchange_info_cache = None
+
+# 바이낸스 클라이언트 객체 생성
+# BINANCE_REPLAY_PATH가 있으면 기록 재생, BINANCE_MOCK_URL이 있으면 로컬 대역 서버 사용,
+# BINANCE_RECORD_PATH가 있으면 응답 기록
+_replay_path = os.environ.get('BINANCE_REPLAY_PATH')
+if _replay_path:
+    _replay_speed = os.environ.get('BINANCE_REPLAY_SPEED', '1')
+    client = ReplayClient(_replay_path, speed=None if _replay_speed == 'step' else float(_replay_speed))
+elif os.environ.get('BINANCE_MOCK_URL'):
+    client = _mock_client(os.environ['BINANCE_MOCK_URL'])
+    print(f"로컬 대역 서버를 사용합니다: {os.environ['BINANCE_MOCK_URL']}")
+else:
+    try:
+        client = TunedClient(BINANCE_API_KEY, BINANCE_API_SECRET)
+    except Exception as e:
+        print(f"바이낸스 클라이언트 초기화 실패: {e}")
+        client = None
+
+if os.environ.get('BINANCE_RECORD_PATH'):
+    start_recording(os.environ['BINANCE_RECORD_PATH'])
+    atexit.register(stop_recording)
+
+def _klines_weight(limit):
+    """klines 요청 가중치 (limit 구간별)"""
+    if limit < 100: return 1
+    if limit < 500: return 2
+    if limit <= 1000: return 5
+    return 10
+
+# 같은 요청을 하나로 합치고(single-flight) 받은 결과를 잠시 재사용하는 메서드와 재사용 시간(초)
+# GUI 시세 루프, 엔진, 스크리너가 같은 순간에 같은 티커/캔들을 요청해도 네트워크 요청은 한 번만 나갑니다.
+REQUEST_FRESHNESS_SECONDS = {'futures_ticker': 1.0, 'futures_klines': 1.0, 'futures_mark_price': 1.0}
+# 구간(startTime/endTime)을 지정한 요청은 같은 구간을 다시 읽는 일이 거의 없으므로 진행 중인 요청 합치기만 하고 결과는 보관하지 않음
+RANGE_PARAMS = ('startTime', 'endTime')
+
+class _Flight:
+    """진행 중인 요청 하나. 먼저 요청한 스레드가 결과를 채우고 기다리던 스레드들을 깨웁니다."""
+    __slots__ = ('event', 'data', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.data = None
+        self.error = None
+
+_flights = {} # {(method, params_key): _Flight}
+_fresh_results = {} # {(method, params_key): (받은 시각, 결과)}
+_flight_lock = threading.Lock()
+_last_fresh_sweep = 0.0 # 재사용 시간이 지난 결과를 마지막으로 정리한 시각
+_request_cache_stats = {'hits': 0, 'coalesced': 0, 'misses': 0}
+
+def get_request_cache_stats():
+    """
+    요청 합치기 통계: hits(재사용 결과로 응답), coalesced(진행 중인 같은 요청에 합류), misses(실제 요청)
+    hit_rate는 실제 요청 없이 응답한 비율입니다.
+    """
+    with _flight_lock:
+        stats = dict(_request_cache_stats)
+        stats['cached'] = len(_fresh_results)
+    total = stats['hits'] + stats['coalesced'] + stats['misses']
+    stats['hit_rate'] = (stats['hits'] + stats['coalesced']) / total if total else 0.0
+    return stats
+
+def clear_request_cache():
+    with _flight_lock:
+        _fresh_results.clear()
+
+def _request(method, weight, priority=PRIORITY_ENGINE, **params):
+    """
+    가중치 예산을 확보한 뒤 client 메서드를 호출합니다.
+    표시용 요청은 기다리지 않으며, 예산이 부족해 거절되면 None을 반환합니다.
+    REQUEST_FRESHNESS_SECONDS에 있는 메서드는 같은 파라미터의 요청이 진행 중이면 그 결과를 함께 쓰고,
+    재사용 시간 안에 받은 결과가 있으면 요청하지 않습니다. 공유되는 결과이므로 호출한 쪽에서 수정하면 안 됩니다.
+    구간을 지정한 요청(RANGE_PARAMS)은 진행 중인 요청만 합치고 결과는 재사용하지 않습니다.
+    """
+    global _last_fresh_sweep
+    freshness = REQUEST_FRESHNESS_SECONDS.get(method)
+    # 재생 클라이언트는 기록된 순서대로 응답하므로 합치지 않음
+    if freshness is None or getattr(client, 'is_offline', False):
+        return _send_request(method, weight, priority, **params)
+
+    key = (method, _params_key(params))
+    keep_result = not any(name in params for name in RANGE_PARAMS)
+    with _flight_lock:
+        fresh = _fresh_results.get(key)
+        if fresh is not None and time.time() - fresh[0] < freshness:
+            _request_cache_stats['hits'] += 1
+            return fresh[1]
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _Flight()
+            _flights[key] = flight
+            _request_cache_stats['misses'] += 1
+        else:
+            _request_cache_stats['coalesced'] += 1
+
+    if not is_leader:
+        flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        if flight.data is None:
+            # 먼저 요청한 쪽이 표시용이라 예산 부족으로 거절된 경우, 자기 우선순위로 다시 요청
+            return _send_request(method, weight, priority, **params)
+        return flight.data
+
+    try:
+        flight.data = _send_request(method, weight, priority, **params)
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flight_lock:
+            _flights.pop(key, None)
+            now = time.time()
+            if keep_result and flight.data is not None:
+                _fresh_results[key] = (now, flight.data)
+            # 재사용 시간마다 한 번씩 지난 결과를 지워서 응답을 재사용 시간 이상 붙잡아 두지 않음
+            if now - _last_fresh_sweep >= min(REQUEST_FRESHNESS_SECONDS.values()):
+                _last_fresh_sweep = now
+                for stale_key in [k for k, (received_at, _) in _fresh_results.items()
+                                  if now - received_at >= REQUEST_FRESHNESS_SECONDS[k[0]]]:
+                    del _fresh_results[stale_key]
+        flight.event.set()
+    return flight.data
+
+def _send_request(method, weight, priority=PRIORITY_ENGINE, **params):
+    # 재생 클라이언트는 네트워크를 쓰지 않으므로 가중치 예산을 거치지 않음
+    if not getattr(client, 'is_offline', False):
+        timeout = 0 if priority >= PRIORITY_DISPLAY else None
+        if not governor.acquire(weight, priority, timeout=timeout):
+            return None
+    data = getattr(client, method)(**params)
+    if _recorder is not None:
+        _recorder.write(method, params, data)
+    return data
 
 # Exchange 정보 캐싱
 _exchange_info_cache = None
@@ -23,7 +397,7 @@ def get_usdt_futures_symbol_info():
         return _exchange_info_cache
 
     try:
-        exchange_info = client.futures_exchange_info()
+        exchange_info = _request('futures_exchange_info', 1)
         symbols = []
         price_precisions = {}
         for s in exchange_info['symbols']:
@@ -58,26 +432,229 @@ def get_usdt_futures_symbols():
     symbols, _ = get_usdt_futures_symbol_info()
     return symbols
 
-def get_historical_klines(symbol, interval, limit=100):
-    """특정 코인의 지정된 시간봉 과거 캔들 데이터를 가져옵니다."""
+def get_historical_klines(symbol, interval, limit=100, priority=PRIORITY_ENGINE, start_time=None, end_time=None):
+    """
+    특정 코인의 지정된 시간봉 과거 캔들 데이터를 가져옵니다.
+    start_time/end_time(밀리초)을 주면 해당 구간에서 최대 limit개를 가져옵니다.
+    """
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    if start_time is not None: params['startTime'] = int(start_time)
+    if end_time is not None: params['endTime'] = int(end_time)
     try:
-        klines = client.futures_klines(symbol=symbol, interval=interval, limit=limit)
-        return klines
+        klines = _request('futures_klines', _klines_weight(limit), priority, **params)
+        return klines or []
     except Exception as e:
         print(f"{symbol} {interval} 캔들 데이터를 가져오는 데 실패했습니다: {e}")
         return []
 
-def get_futures_ticker_data():
-    """USDT 기반 모든 선물 코인의 24시간 티커 정보를 가져옵니다."""
+def get_klines_range(symbol, interval, start_time, end_time=None, priority=PRIORITY_ENGINE):
+    """start_time부터 (end_time 또는 현재까지) 캔들을 1500개 단위로 차례로 요청해 이어 붙입니다."""
+    klines = []
+    cursor = int(start_time)
+    while True:
+        page = get_historical_klines(symbol, interval, limit=MAX_KLINES_PER_REQUEST, priority=priority, start_time=cursor, end_time=end_time)
+        if not page:
+            break
+        klines.extend(page)
+        if len(page) < MAX_KLINES_PER_REQUEST:
+            break
+        cursor = int(page[-1][0]) + 1
+    return klines
+
+# 대량 적재용 페이지 크기. klines 가중치는 limit 구간별 계단식이라 499개(가중치 2)일 때 가중치당 캔들 수가 가장 많습니다.
+BULK_PAGE_LIMIT = 499
+BULK_MAX_RETRIES = 3
+
+def _fetch_kline_page(symbol, interval, start_time, end_time, priority, segment):
+    """
+    대량 적재용 페이지 하나를 요청합니다. 빈 구간과 실패를 구분하기 위해 재시도 후에도 실패하면 예외를 올립니다.
+    같은 구간의 앞 페이지가 이미 실패했다면 요청하지 않고 None을 반환합니다.
+    """
+    params = {'symbol': symbol, 'interval': interval, 'limit': BULK_PAGE_LIMIT,
+              'startTime': int(start_time), 'endTime': int(end_time)}
+    for attempt in range(BULK_MAX_RETRIES):
+        if segment['failed']:
+            return None
+        try:
+            return _request('futures_klines', _klines_weight(BULK_PAGE_LIMIT), priority, **params) or []
+        except Exception:
+            if attempt == BULK_MAX_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+def bulk_load_klines(symbols, interval, start_time, end_time=None, archive=None, max_workers=8,
+                     priority=PRIORITY_ENGINE, on_progress=None):
+    """
+    여러 심볼의 start_time~end_time(밀리초, 생략 시 현재) 캔들을 페이지로 나눠 동시에 받아 보관소에 바로 씁니다.
+    - 모든 요청은 가중치 예산(governor)을 거치므로 작업자 수를 늘려도 한도를 넘지 않습니다.
+    - 보관소에 이미 있는 구간은 건너뛰고 마지막 보관 캔들 다음부터 이어 받으므로, 중단 후 다시 실행하면 이어서 적재합니다.
+    - 페이지는 도착 순서와 상관없이 심볼별로 시간 순서대로 덧붙이며, 겹치는 캔들은 한 번만 보관됩니다.
+    - 보관분보다 과거 구간은 모두 받은 뒤 보관분과 합쳐 교체합니다.
+    - 닫힌 캔들만 보관합니다.
+    반환값: {'pages', 'candles', 'failed': {symbol: 오류 메시지}}
+    """
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"지원하지 않는 시간봉입니다: {interval}")
+    archive = archive if archive is not None else KlineArchive()
+    interval_ms = INTERVAL_MS[interval]
+    now_ms = int(time.time() * 1000)
+    end_time = min(int(end_time), now_ms) if end_time is not None else now_ms
+    start_time = int(start_time) - int(start_time) % interval_ms
+    page_ms = BULK_PAGE_LIMIT * interval_ms
+
+    # 심볼별로 받아야 할 구간(segment)과 페이지 나누기
+    segments = []
+    jobs = []
+    for symbol in symbols:
+        first_open = archive.first_open_time(symbol, interval)
+        last_open = archive.last_open_time(symbol, interval)
+        ranges = []
+        if last_open is None:
+            ranges.append(('append', start_time, end_time))
+        else:
+            if start_time < first_open:
+                ranges.append(('merge', start_time, first_open - 1))
+            if last_open + interval_ms <= end_time:
+                ranges.append(('append', last_open + interval_ms, end_time))
+
+        for mode, range_start, range_end in ranges:
+            pages = [(t, min(t + page_ms - 1, range_end)) for t in range(range_start, range_end + 1, page_ms)]
+            segment = {'symbol': symbol, 'mode': mode, 'pages': len(pages), 'next': 0, 'done': {}, 'collected': [], 'failed': False}
+            segments.append(segment)
+            jobs.extend((segment, index, page_start, page_end) for index, (page_start, page_end) in enumerate(pages))
+
+    total_pages = len(jobs)
+    result = {'pages': 0, 'candles': 0, 'failed': {}}
+
+    def write(segment, klines):
+        if not klines:
+            return
+        candles = klines_to_candles(klines)
+        closed = candles['close_time'] < now_ms
+        candles = {col: values[closed] for col, values in candles.items()}
+        if segment['mode'] == 'append':
+            result['candles'] += archive.append(segment['symbol'], interval, candles)
+        else:
+            segment['collected'].append(candles)
+
+    # 작업자 스레드는 요청만 하고, 보관소 쓰기는 이 스레드 하나에서만 합니다.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_kline_page, segment['symbol'], interval, page_start, page_end, priority, segment): (segment, index)
+                   for segment, index, page_start, page_end in jobs}
+        for future in as_completed(futures):
+            segment, index = futures[future]
+            result['pages'] += 1
+            if on_progress:
+                on_progress(result['pages'], total_pages)
+            if segment['failed']:
+                continue
+            try:
+                klines = future.result()
+            except Exception as e:
+                # 실패한 페이지 뒤쪽은 쓰지 않음 (다음 실행 때 이어 받음)
+                segment['failed'] = True
+                result['failed'][segment['symbol']] = str(e)
+                print(f"{segment['symbol']} {interval} 대량 적재 실패: {e}")
+                continue
+
+            segment['done'][index] = klines
+            while segment['next'] in segment['done']:
+                write(segment, segment['done'].pop(segment['next']))
+                segment['next'] += 1
+
+            if segment['mode'] == 'merge' and segment['next'] == segment['pages'] and segment['collected']:
+                merged = {col: np.concatenate([part[col] for part in segment['collected']]) for col in segment['collected'][0]}
+                result['candles'] += archive.merge(segment['symbol'], interval, merged)
+                segment['collected'] = []
+
+    return result
+
+def get_futures_ticker_data(priority=PRIORITY_ENGINE):
+    """
+    USDT 기반 모든 선물 코인의 24시간 티커 정보를 가져옵니다.
+    priority=PRIORITY_DISPLAY이면 예산이 빠듯할 때 요청하지 않고 빈 목록을 반환합니다.
+    """
     try:
-        tickers = client.futures_ticker()
+        tickers = _request('futures_ticker', 40, priority)
+        if tickers is None:
+            return []
         usdt_tickers = [t for t in tickers if t['symbol'].endswith('USDT')]
         return usdt_tickers
     except Exception as e:
         print(f"바이낸스 선물 티커 정보를 가져오는 데 실패했습니다: {e}")
         return []
 
+def get_premium_index(priority=PRIORITY_ENGINE):
+    """
+    모든 심볼의 최근 펀딩비, 마크 가격, 인덱스 가격을 요청 한 번으로 가져옵니다. (premiumIndex, 가중치 10)
+    반환값: {symbol: {'funding_rate', 'mark_price', 'index_price'}}. 실패하면 빈 딕셔너리
+    """
+    try:
+        entries = _request('futures_mark_price', 10, priority)
+        premium = {}
+        for entry in entries or []:
+            try:
+                premium[entry['symbol']] = {
+                    'funding_rate': float(entry['lastFundingRate']),
+                    'mark_price': float(entry['markPrice']),
+                    'index_price': float(entry['indexPrice']),
+                }
+            except (KeyError, ValueError, TypeError):
+                continue
+        return premium
+    except Exception as e:
+        print(f"펀딩비/프리미엄 정보를 가져오는 데 실패했습니다: {e}")
+        return {}
+
+# 미결제약정 기록(openInterestHist)이 지원하는 기간
+OPEN_INTEREST_PERIODS = ("5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d")
+
+def get_open_interest_history(symbol, period, limit=30, priority=PRIORITY_ENGINE):
+    """
+    한 코인의 미결제약정(sumOpenInterest) 기록을 시간순 numpy 배열로 가져옵니다. 실패하면 None
+    바이낸스에는 전체 심볼의 미결제약정을 한 번에 주는 엔드포인트가 없어 심볼마다 요청합니다.
+    """
+    try:
+        entries = _request('futures_open_interest_hist', 1, priority, symbol=symbol, period=period, limit=limit)
+        if not entries:
+            return None
+        entries = sorted(entries, key=lambda entry: int(entry['timestamp']))
+        return np.array([float(entry['sumOpenInterest']) for entry in entries])
+    except Exception as e:
+        print(f"{symbol} {period} 미결제약정 기록을 가져오는 데 실패했습니다: {e}")
+        return None
+
+def _bulk_load_main(argv):
+    """명령줄 대량 적재: python binance_client.py bulk 5m --days 365 [--symbols BTCUSDT ETHUSDT] [--workers 8]"""
+    import argparse
+    parser = argparse.ArgumentParser(description="과거 캔들을 병렬로 받아 캔들 보관소에 적재합니다.")
+    parser.add_argument("interval", help="시간봉 (예: 5m)")
+    parser.add_argument("--days", type=float, default=365, help="현재로부터 며칠 전까지 받을지")
+    parser.add_argument("--symbols", nargs="*", help="심볼 목록 (생략 시 모든 USDT 무기한 선물)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--archive", default="kline_archive", help="보관소 디렉터리")
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols or get_usdt_futures_symbols()
+    start_time = int((time.time() - args.days * 86400) * 1000)
+    started = time.time()
+
+    def on_progress(done, total):
+        if done % 200 == 0 or done == total:
+            elapsed = time.time() - started
+            print(f"{done}/{total} 페이지 ({elapsed:.0f}초 경과, 예산 사용률 {governor.utilization() * 100:.0f}%)")
+
+    result = bulk_load_klines(symbols, args.interval, start_time, archive=KlineArchive(args.archive),
+                              max_workers=args.workers, on_progress=on_progress)
+    print(f"적재 완료: {len(symbols)}개 심볼, {result['pages']}페이지, 새 캔들 {result['candles']}개, "
+          f"실패 {len(result['failed'])}개 심볼, {time.time() - started:.0f}초")
+
 if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bulk":
+        _bulk_load_main(sys.argv[2:])
+        sys.exit(0)
+
     # 파일 단독 실행 시 테스트
     print("USDT 선물 코인 정보 테스트:")
     symbols, precisions = get_usdt_futures_symbol_info()
@@ -92,3 +669,6 @@ if __name__ == '__main__':
         klines = get_historical_klines('BTCUSDT', '15m')
         if klines:
             print(klines[0])
+
+    print("\n전송 통계:", get_transport_stats())
+    print("요청 합치기 통계:", get_request_cache_stats())
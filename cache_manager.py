@@ -0,0 +1,194 @@
+# cache_manager.py
+# (symbol, timeframe) 단위로 보관하는 캔들/지표 버퍼의 메모리를 바이트 예산 안으로 제한합니다.
+# 항목마다 실제 배열 크기(nbytes)를 세고, 예산을 넘으면 가장 오래 평가하지 않은 항목부터 내보냅니다.
+# 특정 코인을 지정한 조건의 항목은 고정(pin)해서 "All Coins" 조건이 많아도 밀려나지 않습니다.
+# 딕셔너리처럼 쓸 수 있으므로 엔진의 candle_buffers를 그대로 대체합니다.
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MB = 1024 * 1024
+# 캔들 버퍼 기본 예산. 심볼 300개 x 시간봉 3개 x 캔들 250개 정도가 약 50MB
+DEFAULT_CACHE_BUDGET_MB = 256
+
+def buffer_nbytes(value):
+    """배열은 nbytes, 딕셔너리/튜플/리스트는 안의 값을 모두 더한 크기 (바이트)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(buffer_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(buffer_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+class BufferCache:
+    """
+    바이트 예산이 있는 LRU 딕셔너리. get()/[]로 읽은 항목이 가장 최근 항목이 되며,
+    items()/copy()는 순서를 바꾸지 않으므로 스크리너나 스냅샷 저장처럼 훑어보는 용도로 씁니다.
+    값을 제자리에서 바꾸면 크기가 다시 계산되지 않으므로 크기가 달라지는 변경은 다시 대입해야 합니다.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_CACHE_BUDGET_MB * MB, on_evict=None):
+        self.lock = threading.RLock()
+        self._entries = OrderedDict() # {key: 값}, 앞쪽이 가장 오래 쓰지 않은 항목
+        self._sizes = {} # {key: 바이트}
+        self._pinned = set()
+        self._budget = int(budget_bytes)
+        self.on_evict = on_evict # 내보낸 키를 받는 콜백 (엔진의 보조 상태 정리용)
+        self.nbytes = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'hits': 0, 'misses': 0, 'inserts': 0, 'evictions': 0, 'evicted_bytes': 0}
+            self._stats_since = time.time()
+
+    @property
+    def budget_bytes(self):
+        return self._budget
+
+    @budget_bytes.setter
+    def budget_bytes(self, value):
+        """예산을 바꾸면 바로 예산에 맞게 내보냅니다."""
+        with self.lock:
+            self._budget = int(value)
+            self._evict()
+
+    def pin(self, keys):
+        """고정할 키 집합을 교체합니다. 고정된 항목은 예산을 넘어도 내보내지 않습니다."""
+        with self.lock:
+            self._pinned = set(keys)
+            self._evict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self._entries:
+                self.stats['misses'] += 1
+                return default
+            self.stats['hits'] += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __getitem__(self, key):
+        with self.lock:
+            value = self._entries[key]
+            self.stats['hits'] += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        size = buffer_nbytes(value)
+        with self.lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self.stats['inserts'] += 1
+            self._evict(keep=key)
+
+    def setdefault(self, key, value):
+        with self.lock:
+            if key in self._entries:
+                return self._entries[key]
+            self[key] = value
+            return value
+
+    def pop(self, key, *default):
+        with self.lock:
+            if key not in self._entries:
+                if default:
+                    return default[0]
+                raise KeyError(key)
+            self.nbytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self.lock:
+            return list(self._entries)
+
+    def items(self):
+        """(키, 값) 목록의 복사본. 사용 순서는 바꾸지 않습니다."""
+        with self.lock:
+            return list(self._entries.items())
+
+    def copy(self):
+        with self.lock:
+            return dict(self._entries)
+
+    def _evict(self, keep=None):
+        """예산을 넘으면 고정되지 않은 항목을 오래된 순서로 내보냅니다. 방금 넣은 keep은 남깁니다."""
+        if self.nbytes <= self._budget:
+            return
+        evicted = []
+        for key in list(self._entries):
+            if self.nbytes <= self._budget:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            size = self._sizes.pop(key)
+            del self._entries[key]
+            self.nbytes -= size
+            self.stats['evictions'] += 1
+            self.stats['evicted_bytes'] += size
+            evicted.append(key)
+        if self.on_evict is not None:
+            for key in evicted:
+                self.on_evict(key)
+
+    def get_stats(self):
+        """
+        항목 수, 사용량/예산, 점유율, 고정 항목 수, 적중률, 분당 내보낸 항목 수
+        점유율이 1을 넘으면 고정 항목만으로 예산을 넘은 상태입니다.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['pinned'] = sum(1 for key in self._pinned if key in self._entries)
+            stats['bytes'] = self.nbytes
+            stats['budget'] = self._budget
+        stats['occupancy'] = stats['bytes'] / stats['budget'] if stats['budget'] else 0.0
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        minutes = max((time.time() - self._stats_since) / 60.0, 1 / 60.0)
+        stats['evictions_per_min'] = stats['evictions'] / minutes
+        return stats
+
+    def describe(self):
+        """로그용 한 줄 요약"""
+        stats = self.get_stats()
+        return (f"{stats['entries']}개 ({stats['pinned']}개 고정), {stats['bytes'] / MB:.1f}/{stats['budget'] / MB:.1f}MB "
+                f"({stats['occupancy']:.0%}), 적중률 {stats['hit_rate']:.0%}, 내보냄 {stats['evictions']}개 "
+                f"({stats['evictions_per_min']:.1f}/분)")
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 작은 예산으로 내보내기와 고정 동작 확인
+    def make_candles(n):
+        return {col: np.zeros(n) for col in ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')}
+
+    cache = BufferCache(budget_bytes=200_000, on_evict=lambda key: print("내보냄:", key))
+    cache.pin([("BTCUSDT", "5m")])
+    cache[("BTCUSDT", "5m")] = (300, make_candles(300)) # 약 16.8KB
+    for i in range(20):
+        cache[(f"COIN{i}USDT", "5m")] = (300, make_candles(300))
+        cache.get(("COIN0USDT", "5m")) # 자주 평가하는 항목은 남음
+    print("남은 키:", cache.keys())
+    print(cache.describe())
@@ -0,0 +1,29 @@
+# candles.py
+# 바이낸스 kline 행 목록을 컬럼별 numpy 배열로 변환합니다.
+# 엔진과 지표 모듈은 DataFrame 대신 이 {컬럼: 배열} 딕셔너리(candles)를 주고받습니다.
+
+import numpy as np
+
+KLINE_COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+    'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+]
+
+# 정수로 보관하는 컬럼
+INT_COLUMNS = ('open_time', 'close_time', 'number_of_trades')
+
+def klines_to_candles(klines):
+    """kline 행 목록(문자열/숫자 혼합)을 {컬럼: numpy 배열}로 변환합니다. 'ignore' 컬럼은 버립니다."""
+    rows = np.array([k[:11] for k in klines], dtype=np.float64).reshape(-1, 11)
+    candles = {}
+    for i, col in enumerate(KLINE_COLUMNS[:11]):
+        column = rows[:, i]
+        candles[col] = column.astype(np.int64) if col in INT_COLUMNS else np.ascontiguousarray(column)
+    return candles
+
+def candles_len(candles):
+    return len(candles['close'])
+
+def tail_candles(candles, n):
+    """마지막 n개 캔들만 남긴 뷰를 반환합니다 (복사 없음)."""
+    return {col: values[-n:] for col, values in candles.items()}
@@ -0,0 +1,97 @@
+# condition_planner.py
+# 코인별 조건 평가 순서를 비용 기준으로 정합니다.
+# 그룹(AND) 조건은 싼 조건부터 평가하고 하나라도 불만족이면 나머지는 평가하지 않으므로,
+# 앞쪽 조건이 선택적일수록 뒤쪽 조건의 캔들 요청이 대부분 생략됩니다.
+
+# 지표 계산 상대 비용 (캔들 데이터가 이미 있을 때)
+INDICATOR_COST = {
+    "Candle_Trend": 1,
+    "Envelope": 2,
+    "MASlope": 2,
+    "MA_Trend": 2,
+    "MA_Compare": 3,
+    "RSI": 3,
+    "BollingerBands": 3,
+    "MA": 2,
+    "VolumeSpike": 2,
+    "ATR": 3,
+    "Stochastic": 3,
+    "MACD": 4,
+}
+DEFAULT_INDICATOR_COST = 3
+
+# 캔들 요청 1회의 상대 비용. 지표 계산보다 압도적으로 비쌉니다.
+KLINE_FETCH_COST = 100
+
+# 캔들 대신 다른 데이터를 쓰는 지표의 비용. 펀딩비/프리미엄은 전체 심볼을 한 번에 받아 캐시하므로 거의 공짜이고,
+# 미결제약정은 심볼마다 요청이 필요합니다.
+NON_KLINE_COST = {"FundingRate": 1, "Premium": 1, "OpenInterest": KLINE_FETCH_COST}
+# 비용 순위와 상관없이 그룹에서 항상 마지막에 평가하는 지표 (다른 조건이 모두 만족할 때만 요청)
+DEFERRED_INDICATORS = ("OpenInterest",)
+
+def estimate_cost(cond, is_cached):
+    """
+    조건 하나를 평가하는 비용을 추정합니다.
+    is_cached(timeframe)은 해당 시간봉 데이터가 이번 사이클에 이미 준비되어 있는지 반환합니다.
+    """
+    if cond['indicator'] in NON_KLINE_COST:
+        return NON_KLINE_COST[cond['indicator']]
+    cost = INDICATOR_COST.get(cond['indicator'], DEFAULT_INDICATOR_COST)
+    if not is_cached(cond['timeframe']):
+        cost += KLINE_FETCH_COST
+    return cost
+
+class ConditionPlanner:
+    """조건별 만족률 통계를 유지하며 평가 순서를 정합니다."""
+
+    def __init__(self):
+        self.stats = {} # {cond_key: [평가 횟수, 만족 횟수]}
+
+    def _pass_rate(self, cond):
+        evaluated, passed = self.stats.get(str(cond['original_cond_values']), (0, 0))
+        # 라플라스 보정: 기록이 없으면 0.5로 가정
+        return (passed + 1) / (evaluated + 2)
+
+    def rank(self, cond, is_cached):
+        """
+        AND 단락 평가의 기대 비용 기준 순위. 값이 작을수록 먼저 평가합니다.
+        비용이 낮고 불만족 확률이 높은 조건일수록 앞에 옵니다.
+        """
+        return estimate_cost(cond, is_cached) / max(1.0 - self._pass_rate(cond), 0.05)
+
+    def order_key(self, cond, is_cached):
+        """평가 순서 정렬 키. 미루는 지표는 순위와 상관없이 뒤로 보냅니다."""
+        return (cond['indicator'] in DEFERRED_INDICATORS, self.rank(cond, is_cached))
+
+    def record(self, cond, is_met):
+        stat = self.stats.setdefault(str(cond['original_cond_values']), [0, 0])
+        stat[0] += 1
+        if is_met:
+            stat[1] += 1
+
+    def pop_next(self, remaining, is_cached):
+        """남은 조건 중 지금 평가하기 가장 유리한 조건을 꺼냅니다. (캐시 상태가 바뀌므로 매번 다시 계산)"""
+        best = min(range(len(remaining)), key=lambda i: self.order_key(remaining[i], is_cached))
+        return remaining.pop(best)
+
+    def plan_units(self, symbol_tasks, is_cached):
+        """
+        한 코인의 {시간봉: [조건]}을 평가 단위 목록으로 바꿉니다.
+        반환값: [(group_name 또는 None, [조건, ...]), ...], 가장 유리한 조건이 싼 단위부터 정렬
+        """
+        groups = {}
+        units = []
+        for cond_list in symbol_tasks.values():
+            for cond in cond_list:
+                if cond['group']:
+                    # 그룹 이름은 프로필마다 따로 쓰므로 (프로필, 그룹)으로 묶음
+                    group_key = (cond.get('profile', ""), cond['group'])
+                    if group_key not in groups:
+                        groups[group_key] = []
+                        units.append((cond['group'], groups[group_key]))
+                    groups[group_key].append(cond)
+                else:
+                    units.append((None, [cond]))
+
+        units.sort(key=lambda unit: min(self.order_key(c, is_cached) for c in unit[1]))
+        return units
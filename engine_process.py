@@ -0,0 +1,222 @@
+# engine_process.py
+# 모니터링 엔진을 Tk GUI와 다른 프로세스에서 실행합니다.
+# 지표 계산이 GUI 프로세스의 GIL을 차지하지 않으므로 스캔 중에도 화면이 끊기지 않고,
+# 엔진 프로세스가 죽어도 GUI는 살아남아 다시 시작할 수 있습니다.
+#
+# 두 프로세스는 multiprocessing 큐 두 개로만 통신합니다.
+#   GUI -> 엔진 (commands): ('conditions', 조건 목록), ('ticker', [(symbol, 현재가)], 스크리너 설정), ('stop',)
+#   엔진 -> GUI (events):   ('log', 메시지), ('progress', 진행 스냅샷), ('screener', 열 이름, 행), ('stopped',)
+# GUI 쪽 EngineProcess는 MonitoringEngine과 같은 이름의 메서드(start/stop/on_ticker)와 progress.snapshot()을 제공합니다.
+#
+# 두 프로세스는 가중치 예산(weight_governor.governor)을 공유할 수 없으므로, 실행하는 동안
+# IP 예산의 ENGINE_PROCESS_WEIGHT_SHARE를 엔진 프로세스가, 나머지를 GUI 프로세스가 씁니다.
+# 응답 기록(BINANCE_RECORD_PATH)은 GUI 프로세스만 하며, 엔진 프로세스는 기록하지 않습니다. (같은 파일에 섞여 쓰이지 않도록)
+
+import os
+import queue
+import time
+import traceback
+import multiprocessing
+
+from engine_progress import PHASE_IDLE
+from weight_governor import governor
+
+# 엔진 프로세스가 명령을 기다리며 진행 상황을 보내는 주기 (초)
+ENGINE_EVENT_INTERVAL = 0.25
+# 중지 요청 후 엔진 프로세스가 끝나기를 기다리는 최대 시간 (초)
+ENGINE_STOP_TIMEOUT = 30
+# 엔진 프로세스가 쓰는 IP 가중치 예산 비율. GUI 프로세스는 나머지로 시세 표시 (예산이 빠듯하면 갱신 주기를 늘림)
+ENGINE_PROCESS_WEIGHT_SHARE = 0.7
+
+def apply_engine_settings(engine, settings):
+    """
+    GUI 체크박스 값으로 엔진 옵션을 설정합니다. 스레드 모드와 프로세스 모드가 같은 함수를 씁니다.
+    settings: {'use_resampling', 'use_archive', 'use_proximity_scheduling', 'use_intrabar_patching',
+               'use_evaluation_log', 'snapshot_path', 'cache_budget_mb'}
+    """
+    from kline_archive import KlineArchive
+    from evaluation_log import EvaluationLog
+    from cache_manager import DEFAULT_CACHE_BUDGET_MB, MB
+    engine.use_resampling = settings.get('use_resampling', False)
+    engine.archive = KlineArchive() if settings.get('use_archive') else None
+    engine.use_proximity_scheduling = settings.get('use_proximity_scheduling', False)
+    engine.use_intrabar_patching = settings.get('use_intrabar_patching', False)
+    engine.evaluation_log = EvaluationLog() if settings.get('use_evaluation_log') else None
+    engine.snapshot_path = settings.get('snapshot_path')
+    engine.candle_buffers.budget_bytes = settings.get('cache_budget_mb', DEFAULT_CACHE_BUDGET_MB) * MB
+
+class _ChildApp:
+    """엔진 프로세스 안에서 MonitoringEngine이 쓰는 app 대역. 조건은 GUI가 보낸 최신 목록, 로그는 큐로 전송"""
+
+    def __init__(self, events, conditions):
+        self.events = events
+        self.conditions = conditions
+
+    def get_conditions(self):
+        return list(self.conditions)
+
+    def log(self, message):
+        self.events.put(('log', message))
+
+def _engine_main(commands, events, settings, conditions):
+    """엔진 프로세스의 시작 함수. 엔진은 작업 스레드에서 돌고, 이 함수는 명령 처리와 진행 상황 전송을 맡습니다."""
+    try:
+        governor.set_share(settings.get('weight_share', ENGINE_PROCESS_WEIGHT_SHARE))
+        from monitoring_engine import MonitoringEngine
+        from screener import Screener
+
+        app = _ChildApp(events, conditions)
+        engine = MonitoringEngine(app)
+        apply_engine_settings(engine, settings)
+        screener = None
+        engine.start()
+
+        last_version = None
+        while True:
+            try:
+                command = commands.get(timeout=ENGINE_EVENT_INTERVAL)
+            except queue.Empty:
+                command = None
+
+            if command is not None:
+                kind = command[0]
+                if kind == 'stop':
+                    break
+                if kind == 'conditions':
+                    app.conditions = command[1]
+                elif kind == 'ticker':
+                    _, prices, screener_settings = command
+                    engine.on_ticker([{'symbol': symbol, 'lastPrice': price} for symbol, price in prices])
+                    if screener_settings is not None:
+                        if screener is None:
+                            screener = Screener(engine, *screener_settings)
+                        elif screener.settings != screener_settings:
+                            screener.configure(*screener_settings)
+                        events.put(('screener',) + screener.compute())
+
+            snapshot = engine.progress.snapshot()
+            if snapshot['version'] != last_version or snapshot['wait_left'] is not None:
+                last_version = snapshot['version']
+                events.put(('progress', snapshot))
+
+        engine.stop()
+    except Exception:
+        events.put(('log', f"엔진 프로세스 오류: {traceback.format_exc()}"))
+    events.put(('stopped',))
+
+class _RemoteProgress:
+    """엔진 프로세스가 마지막으로 보낸 진행 스냅샷. 대기 시간은 받은 시각 기준으로 줄여서 보여 줍니다."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.latest = {'phase': PHASE_IDLE, 'current': 0, 'total': 0, 'rate': None, 'eta': None,
+                       'wait_left': None, 'version': 0}
+        self.received_at = time.time()
+
+    def update(self, snapshot):
+        self.latest = snapshot
+        self.received_at = time.time()
+
+    def snapshot(self):
+        snapshot = dict(self.latest)
+        if snapshot['wait_left'] is not None:
+            snapshot['wait_left'] = max(snapshot['wait_left'] - (time.time() - self.received_at), 0.0)
+        return snapshot
+
+class EngineProcess:
+    """
+    GUI 프로세스 쪽에서 엔진 프로세스를 대신하는 객체.
+    poll()은 GUI 메인 스레드에서 after()로 주기적으로 호출해야 하며, 조건 변경 전달과 이벤트 처리를 합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.process = None
+        self.commands = None
+        self.events = None
+        self.is_running = False
+        self.progress = _RemoteProgress()
+        self._sent_conditions = None
+        # spawn: Tk와 스레드가 있는 프로세스를 fork하지 않도록 새 인터프리터로 시작
+        self.context = multiprocessing.get_context("spawn")
+
+    def start(self, settings):
+        settings = dict(settings, weight_share=ENGINE_PROCESS_WEIGHT_SHARE)
+        conditions = [list(c) for c in self.app.get_conditions()]
+        self.commands = self.context.Queue()
+        self.events = self.context.Queue()
+        self.process = self.context.Process(target=_engine_main, args=(self.commands, self.events, settings, conditions),
+                                            daemon=True, name="MonitoringEngine")
+        # spawn된 프로세스는 _engine_main보다 먼저 GUI의 메인 모듈(과 binance_client)을 다시 불러오므로,
+        # 시작하는 동안 환경 변수에서 기록 경로를 빼야 엔진 프로세스가 같은 기록 파일을 열지 않음
+        record_path = os.environ.pop('BINANCE_RECORD_PATH', None)
+        try:
+            self.process.start()
+        finally:
+            if record_path is not None:
+                os.environ['BINANCE_RECORD_PATH'] = record_path
+        governor.set_share(1.0 - ENGINE_PROCESS_WEIGHT_SHARE)
+        self._sent_conditions = conditions
+        self.progress.reset()
+        self.is_running = True
+        self.app.log(f"모니터링 엔진을 별도 프로세스(PID {self.process.pid})에서 시작합니다.")
+
+    def stop(self):
+        """엔진 프로세스에 중지를 요청하고 끝날 때까지 기다립니다. (GUI 스레드가 아닌 곳에서 호출)"""
+        if self.process is None:
+            return
+        process = self.process
+        self.commands.put(('stop',))
+        process.join(ENGINE_STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join(5)
+        self.is_running = False
+
+    def on_ticker(self, tickers, screener_settings=None):
+        """현재가만 추려서 보냅니다. screener_settings가 있으면 엔진 프로세스가 스크리너 표를 계산해서 돌려줍니다."""
+        if not self.is_running or not tickers:
+            return
+        prices = [(t['symbol'], t['lastPrice']) for t in tickers if 'symbol' in t and 'lastPrice' in t]
+        self.commands.put(('ticker', prices, screener_settings))
+
+    def poll(self):
+        """
+        조건이 바뀌었으면 전달하고, 쌓인 이벤트를 처리합니다. 엔진 프로세스가 끝났으면 False
+        (GUI 메인 스레드에서만 호출)
+        """
+        if self.process is None:
+            return False
+        if self.is_running:
+            conditions = [list(c) for c in self.app.get_conditions()]
+            if conditions != self._sent_conditions:
+                self._sent_conditions = conditions
+                self.commands.put(('conditions', conditions))
+
+        stopped = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == 'log':
+                self.app.log(event[1])
+            elif kind == 'progress':
+                self.progress.update(event[1])
+            elif kind == 'screener':
+                self.app.update_screener_table(event[1], event[2])
+            elif kind == 'stopped':
+                stopped = True
+
+        if not stopped and not self.process.is_alive():
+            self.app.log(f"엔진 프로세스가 비정상 종료되었습니다. (종료 코드 {self.process.exitcode})")
+            stopped = True
+        if stopped:
+            self.is_running = False
+            self.progress.reset()
+            self.process = None
+            governor.set_share(1.0)
+        return not stopped
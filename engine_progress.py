@@ -0,0 +1,62 @@
+# engine_progress.py
+# 엔진 작업 스레드가 진행 상황을 기록하고, GUI 메인 스레드가 after()로 일정 주기마다 읽어 가는 공유 카운터.
+# 작업 스레드에서 Tk 위젯을 직접 건드리지 않으므로 코인마다 화면을 다시 그리는 비용도 없어집니다.
+
+import time
+import threading
+
+PHASE_IDLE = "대기 중"
+PHASE_PREPARE = "조건 준비"
+PHASE_CHECK = "코인 확인"
+PHASE_SCREEN = "수식 일괄 평가"
+PHASE_ALERT = "알림 전송"
+PHASE_WAIT = "다음 확인 대기"
+
+class EngineProgress:
+    """단계(phase)와 처리 개수를 잠금으로 보호해서 보관합니다. snapshot()은 어느 스레드에서든 호출할 수 있습니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phase = PHASE_IDLE
+        self.current = 0
+        self.total = 0
+        self.started_at = None # 현재 단계의 시작 시각
+        self.wait_until = None # 대기 단계가 끝나는 시각
+        self.version = 0 # 값이 바뀔 때마다 증가 (GUI가 바뀐 경우에만 다시 그리도록)
+
+    def set_phase(self, phase, total=0, wait_seconds=None):
+        with self.lock:
+            self.phase = phase
+            self.current = 0
+            self.total = total
+            self.started_at = time.time()
+            self.wait_until = self.started_at + wait_seconds if wait_seconds is not None else None
+            self.version += 1
+
+    def advance(self, count=1):
+        with self.lock:
+            self.current += count
+            self.version += 1
+
+    def reset(self):
+        self.set_phase(PHASE_IDLE)
+
+    def snapshot(self):
+        """
+        {'phase', 'current', 'total', 'rate'(개/초), 'eta'(초), 'wait_left'(초), 'version'}
+        rate/eta는 단계 시작 이후 평균 처리 속도로 계산하며, 알 수 없으면 None
+        """
+        with self.lock:
+            phase, current, total = self.phase, self.current, self.total
+            started_at, wait_until, version = self.started_at, self.wait_until, self.version
+        now = time.time()
+        rate = eta = wait_left = None
+        if started_at is not None and current > 0:
+            elapsed = now - started_at
+            if elapsed > 0:
+                rate = current / elapsed
+                eta = max(total - current, 0) / rate
+        if wait_until is not None:
+            wait_left = max(wait_until - now, 0.0)
+        return {'phase': phase, 'current': current, 'total': total, 'rate': rate, 'eta': eta,
+                'wait_left': wait_left, 'version': version}
@@ -0,0 +1,51 @@
+# engine_snapshot.py
+# 엔진 상태(캔들 버퍼, 알림 쿨다운, 플래너 통계, 갱신 일정, 조건 목록)를 .npz 파일 하나에 저장하고 복원합니다.
+# 캔들 배열은 그대로 이진 배열로, 나머지 상태는 JSON 문자열 하나로 담기 때문에 pickle 없이 읽을 수 있습니다.
+
+import os
+import json
+import time
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+def save_snapshot(path, buffers, state):
+    """
+    buffers: {(symbol, timeframe): (limit, candles)}
+    state: JSON으로 직렬화할 수 있는 나머지 상태 딕셔너리
+    임시 파일에 쓴 뒤 교체하므로 저장 도중 종료되어도 이전 스냅샷은 남습니다.
+    """
+    arrays = {}
+    buffer_meta = []
+    for i, ((symbol, timeframe), (limit, candles)) in enumerate(buffers.items()):
+        buffer_meta.append({'symbol': symbol, 'timeframe': timeframe, 'limit': int(limit), 'columns': list(candles)})
+        for col, values in candles.items():
+            arrays[f"b{i}_{col}"] = np.asarray(values)
+
+    meta = dict(state, version=SNAPSHOT_VERSION, saved_at=time.time(), buffers=buffer_meta)
+    arrays['meta'] = np.array(json.dumps(meta, ensure_ascii=False))
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return len(buffer_meta)
+
+def load_snapshot(path):
+    """
+    저장된 스냅샷을 (buffers, state)로 반환합니다. 파일이 없거나 읽을 수 없으면 None
+    state에는 저장 시각 saved_at이 포함됩니다.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != SNAPSHOT_VERSION:
+                return None
+            buffers = {}
+            for i, info in enumerate(meta.pop('buffers')):
+                candles = {col: data[f"b{i}_{col}"] for col in info['columns']}
+                buffers[(info['symbol'], info['timeframe'])] = (info['limit'], candles)
+        return buffers, meta
+    except Exception as e:
+        print(f"엔진 스냅샷을 읽는 데 실패했습니다: {e}")
+        return None
@@ -0,0 +1,246 @@
+# evaluation_log.py
+# 모든 조건 평가 결과(만족 여부와 상관없이)를 백그라운드 스레드가 모아서 컬럼형 파일로 저장합니다.
+# 적중률, 아깝게 놓친 경우(near-miss) 분석과 임계값 조정용입니다.
+#
+# - 엔진은 record()로 큐에 넣기만 하며 절대 기다리지 않습니다. 큐가 가득 차면 행을 버리고 개수만 셉니다.
+# - pyarrow가 설치되어 있으면 Parquet 파일에 배치마다 row group을 추가하고,
+#   없으면 배치마다 NumPy .npz 청크 파일을 하나씩 씁니다.
+# - rotate_rows 행 또는 rotate_seconds초마다 새 세그먼트로 넘어가며, keep_segments개를 넘는 오래된 세그먼트는 지웁니다.
+#   .npz는 세그먼트 하나가 청크 파일 여러 개이므로 파일 개수가 아니라 세그먼트 단위로 보존합니다.
+
+import os
+import re
+import json
+import glob
+import time
+import queue
+import zlib
+import threading
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+LOG_COLUMNS = ("timestamp", "symbol", "timeframe", "cond_id", "indicator", "value", "rhs", "met", "latency_ms")
+FLOAT_COLUMNS = ("timestamp", "value", "rhs", "latency_ms")
+# 파일 이름에서 세그먼트 이름(evaluations_날짜_시각)을 꺼냄. .npz 청크는 뒤에 _00000 번호가 붙음
+SEGMENT_PATTERN = re.compile(r"^(evaluations_\d{8}_\d{6})(?:_\d+)?\.(?:npz|parquet)$")
+
+def condition_id(original_cond_values):
+    """조건 튜플의 짧은 고정 ID (conditions.json에 원래 조건과 함께 기록)"""
+    return f"{zlib.crc32(str(original_cond_values).encode('utf-8')):08x}"
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+class EvaluationLog:
+    """조건 평가 기록기. close()를 호출해야 남은 행이 모두 기록됩니다."""
+
+    def __init__(self, directory="evaluation_logs", batch_rows=5000, flush_seconds=5,
+                 rotate_rows=500_000, rotate_seconds=3600, keep_segments=200, max_queue=100_000, use_parquet=None):
+        self.directory = directory
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.rotate_rows = rotate_rows
+        self.rotate_seconds = rotate_seconds
+        self.keep_segments = keep_segments
+        self.use_parquet = (pq is not None) if use_parquet is None else (use_parquet and pq is not None)
+        os.makedirs(directory, exist_ok=True)
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closing = threading.Event()
+        self.stats_lock = threading.Lock()
+        self.stats = {'recorded': 0, 'dropped': 0, 'written': 0, 'files': 0, 'errors': 0}
+
+        self._known_conditions = {}
+        self._conditions_path = os.path.join(directory, "conditions.json")
+        if os.path.exists(self._conditions_path):
+            try:
+                with open(self._conditions_path, 'r', encoding='utf-8') as f:
+                    self._known_conditions = json.load(f)
+            except (OSError, ValueError):
+                self._known_conditions = {}
+
+        self._segment_name = None
+        self._segment_started = 0
+        self._segment_rows = 0
+        self._chunk_index = 0
+        self._parquet_writer = None
+
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def record(self, symbol, timeframe, original_cond_values, indicator, value, rhs, met, latency, timestamp=None):
+        """평가 한 건을 큐에 넣습니다. 큐가 가득 차 있으면 기다리지 않고 버립니다."""
+        row = (timestamp if timestamp is not None else time.time(), symbol, timeframe,
+               original_cond_values, indicator, value, rhs, bool(met), latency * 1000.0)
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self.stats_lock:
+                self.stats['dropped'] += 1
+            return
+        with self.stats_lock:
+            self.stats['recorded'] += 1
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['queued'] = self.queue.qsize()
+        return stats
+
+    def close(self, timeout=10):
+        """큐에 남은 행을 모두 기록하고 기록 스레드를 끝냅니다."""
+        self.closing.set()
+        self.thread.join(timeout)
+
+    # --- 기록 스레드 ---
+
+    def _writer_loop(self):
+        rows = []
+        last_flush = time.time()
+        while True:
+            try:
+                rows.append(self.queue.get(timeout=0.5))
+                while len(rows) < self.batch_rows:
+                    rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            closing = self.closing.is_set() and self.queue.empty()
+            if rows and (len(rows) >= self.batch_rows or time.time() - last_flush >= self.flush_seconds or closing):
+                self._flush(rows)
+                rows = []
+                last_flush = time.time()
+            if closing:
+                self._close_segment()
+                return
+
+    def _columns(self, rows):
+        columns = {col: [] for col in LOG_COLUMNS}
+        new_conditions = False
+        for timestamp, symbol, timeframe, cond_values, indicator, value, rhs, met, latency_ms in rows:
+            cond_id = condition_id(cond_values)
+            if cond_id not in self._known_conditions:
+                self._known_conditions[cond_id] = [str(v) for v in cond_values]
+                new_conditions = True
+            for col, item in zip(LOG_COLUMNS, (timestamp, symbol, timeframe, cond_id, indicator, value, rhs, met, latency_ms)):
+                columns[col].append(_to_float(item) if col in FLOAT_COLUMNS else item)
+        if new_conditions:
+            with open(self._conditions_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(self._known_conditions, f, ensure_ascii=False, indent=1)
+            os.replace(self._conditions_path + ".tmp", self._conditions_path)
+
+        arrays = {}
+        for col, values in columns.items():
+            if col in FLOAT_COLUMNS:
+                arrays[col] = np.asarray(values, dtype=np.float64)
+            elif col == 'met':
+                arrays[col] = np.asarray(values, dtype=bool)
+            else:
+                arrays[col] = np.asarray(values, dtype=str)
+        return arrays
+
+    def _flush(self, rows):
+        try:
+            arrays = self._columns(rows)
+            now = time.time()
+            if self._segment_name is None or self._segment_rows >= self.rotate_rows or now - self._segment_started >= self.rotate_seconds:
+                self._close_segment()
+                self._segment_name = time.strftime("evaluations_%Y%m%d_%H%M%S", time.localtime(now))
+                self._segment_started = now
+                self._segment_rows = 0
+                self._chunk_index = 0
+                self._prune_segments()
+
+            if self.use_parquet:
+                table = pa.table({col: arrays[col] for col in LOG_COLUMNS})
+                if self._parquet_writer is None:
+                    path = os.path.join(self.directory, self._segment_name + ".parquet")
+                    self._parquet_writer = pq.ParquetWriter(path, table.schema)
+                    self._count_file()
+                self._parquet_writer.write_table(table)
+            else:
+                path = os.path.join(self.directory, f"{self._segment_name}_{self._chunk_index:05d}.npz")
+                np.savez(path + ".tmp.npz", **arrays)
+                os.replace(path + ".tmp.npz", path)
+                self._chunk_index += 1
+                self._count_file()
+
+            self._segment_rows += len(rows)
+            with self.stats_lock:
+                self.stats['written'] += len(rows)
+        except Exception as e:
+            print(f"평가 기록 저장 오류: {e}")
+            with self.stats_lock:
+                self.stats['errors'] += 1
+                self.stats['dropped'] += len(rows)
+
+    def _close_segment(self):
+        if self._parquet_writer is not None:
+            try:
+                self._parquet_writer.close()
+            except Exception as e:
+                print(f"평가 기록 파일 닫기 오류: {e}")
+            self._parquet_writer = None
+
+    def _count_file(self):
+        with self.stats_lock:
+            self.stats['files'] += 1
+
+    def _prune_segments(self):
+        """새 세그먼트를 시작할 때, 지금 세그먼트를 포함해 keep_segments개를 넘는 오래된 세그먼트의 파일을 모두 지웁니다."""
+        segments = {}
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match and match.group(1) != self._segment_name:
+                segments.setdefault(match.group(1), []).append(name)
+        old_segments = sorted(segments)
+        for segment in old_segments[:max(0, len(old_segments) - (self.keep_segments - 1))]:
+            for name in segments[segment]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+def read_evaluation_log(directory="evaluation_logs"):
+    """저장된 평가 기록을 {컬럼: numpy 배열}로 모두 읽어 옵니다. (분석용)"""
+    parts = []
+    for path in sorted(glob.glob(os.path.join(directory, "evaluations_*.npz"))):
+        with np.load(path) as data:
+            parts.append({col: data[col] for col in LOG_COLUMNS})
+    if pq is not None:
+        for path in sorted(glob.glob(os.path.join(directory, "evaluations_*.parquet"))):
+            table = pq.read_table(path)
+            parts.append({col: table.column(col).to_numpy() for col in LOG_COLUMNS})
+    if not parts:
+        return None
+    return {col: np.concatenate([part[col] for part in parts]) for col in LOG_COLUMNS}
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 저장된 기록으로 조건별 적중률 요약 출력
+    import sys
+    directory = sys.argv[1] if len(sys.argv) > 1 else "evaluation_logs"
+    data = read_evaluation_log(directory)
+    if data is None:
+        print(f"{directory}에 평가 기록이 없습니다.")
+        sys.exit(0)
+    conditions = {}
+    conditions_path = os.path.join(directory, "conditions.json")
+    if os.path.exists(conditions_path):
+        with open(conditions_path, 'r', encoding='utf-8') as f:
+            conditions = json.load(f)
+
+    print(f"총 {len(data['met'])}건, 평균 지연 {np.nanmean(data['latency_ms']):.1f}ms")
+    for cond_id in np.unique(data['cond_id']):
+        mask = data['cond_id'] == cond_id
+        met = data['met'][mask]
+        print(f"[{cond_id}] {' '.join(conditions.get(cond_id, [])[:9])}")
+        print(f"    평가 {mask.sum()}건, 만족 {met.sum()}건 ({met.mean() * 100:.2f}%)")
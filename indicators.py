@@ -0,0 +1,254 @@
+# indicators.py
+# pandas_ta 호출 없이 numpy 배열에 직접 계산하는 지표 모음.
+# 모든 함수는 1차원 배열(봉 순서) 또는 2차원 배열(심볼 x 봉)을 받아 마지막 축을 따라 계산하며,
+# 계산할 수 없는 앞부분은 NaN으로 채웁니다. 결과는 pandas_ta 기본 설정과 같은 값을 냅니다.
+
+import sys
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def _as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+def _rolling(values, length, func):
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if length <= 0 or values.shape[-1] < length:
+        return out
+    windows = sliding_window_view(values, length, axis=-1)
+    out[..., length - 1:] = func(windows, axis=-1)
+    return out
+
+def _rows(values):
+    """재귀형 지표를 행 단위로 계산하기 위해 (행 수, 봉 수) 모양으로 바꿉니다."""
+    return values.reshape(-1, values.shape[-1]) if values.size else values.reshape(0, values.shape[-1])
+
+def sma(values, length):
+    """단순 이동평균"""
+    return _rolling(values, length, np.mean)
+
+def rolling_std(values, length):
+    """모표준편차(ddof=0) 이동 계산, pandas_ta bbands와 동일"""
+    return _rolling(values, length, np.std)
+
+def rolling_min(values, length):
+    return _rolling(values, length, np.min)
+
+def rolling_max(values, length):
+    return _rolling(values, length, np.max)
+
+def _ema_row(row, length, alpha, result):
+    count = 0
+    total = 0.0
+    prev = np.nan
+    for t, x in enumerate(row.tolist()):
+        if x != x: # NaN
+            if count >= length:
+                result[t] = prev
+            continue
+        count += 1
+        if count < length:
+            total += x
+            continue
+        if count == length:
+            prev = (total + x) / length
+        else:
+            prev = alpha * x + (1.0 - alpha) * prev
+        result[t] = prev
+
+def _rma_row(row, length, beta, result):
+    num = 0.0
+    den = 0.0
+    count = 0
+    for t, x in enumerate(row.tolist()):
+        num *= beta
+        den *= beta
+        if x == x:
+            num += x
+            den += 1.0
+            count += 1
+        if count >= length:
+            result[t] = num / den
+
+def ema(values, length):
+    """
+    지수 이동평균. pandas_ta처럼 첫 유효값부터 length개의 단순평균으로 시작한 뒤
+    alpha=2/(length+1) 재귀식을 적용합니다. 앞쪽 NaN은 건너뜁니다.
+    여러 행(심볼 x 봉)이면 봉 축으로 한 번만 돌면서 모든 행을 열 단위로 함께 계산합니다.
+    """
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    alpha = 2.0 / (length + 1)
+    rows = _rows(values)
+    out_rows = _rows(out)
+    if rows.shape[0] <= 1:
+        # 한 행은 배열 연산보다 파이썬 반복이 빠름 (봉마다 넘파이 호출 비용이 더 큼)
+        for r, row in enumerate(rows):
+            _ema_row(row, length, alpha, out_rows[r])
+        return out
+
+    columns = np.ascontiguousarray(rows.T) # (봉 수, 행 수)
+    valid = ~np.isnan(columns)
+    counts = np.cumsum(valid, axis=0)
+    # 행마다 유효값이 length개째 되는 봉에서 그때까지의 단순평균으로 시작
+    seeds = np.cumsum(np.where(valid, columns, 0.0), axis=0) / length
+    out_columns = np.full(columns.shape, np.nan)
+    prev = np.full(columns.shape[1], np.nan)
+    for t in range(columns.shape[0]):
+        count = counts[t]
+        is_seed = valid[t] & (count == length)
+        is_step = valid[t] & (count > length)
+        prev = np.where(is_seed, seeds[t], np.where(is_step, alpha * columns[t] + (1.0 - alpha) * prev, prev))
+        out_columns[t] = np.where(count >= length, prev, np.nan)
+    out_rows[:] = out_columns.T
+    return out
+
+def rma(values, length):
+    """
+    와일더 이동평균. pandas_ta rma와 같이 alpha=1/length,
+    adjust=True인 지수 가중 평균이며 유효값이 length개 모인 뒤부터 값을 냅니다.
+    여러 행이면 ema와 같이 봉 축으로 한 번만 돌며 모든 행을 함께 계산합니다.
+    """
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    beta = 1.0 - 1.0 / length
+    rows = _rows(values)
+    out_rows = _rows(out)
+    if rows.shape[0] <= 1:
+        for r, row in enumerate(rows):
+            _rma_row(row, length, beta, out_rows[r])
+        return out
+
+    columns = np.ascontiguousarray(rows.T)
+    valid = ~np.isnan(columns)
+    counts = np.cumsum(valid, axis=0)
+    inputs = np.where(valid, columns, 0.0)
+    weights = valid.astype(np.float64)
+    out_columns = np.empty(columns.shape)
+    num = np.zeros(columns.shape[1])
+    den = np.zeros(columns.shape[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for t in range(columns.shape[0]):
+            num *= beta
+            num += inputs[t]
+            den *= beta
+            den += weights[t]
+            out_columns[t] = num / den
+    out_columns[counts < length] = np.nan
+    out_rows[:] = out_columns.T
+    return out
+
+def rsi(close, length=14):
+    """상대강도지수 (0~100)"""
+    close = _as_float(close)
+    diff = np.diff(close, axis=-1, prepend=np.nan)
+    up_avg = rma(np.clip(diff, 0, None), length)
+    down_avg = rma(np.clip(-diff, 0, None), length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * up_avg / (up_avg + down_avg)
+
+def envelope(close, length=20, percent=5):
+    """엔벨로프: 단순 이동평균 기준 ±percent% 밴드"""
+    middle = sma(close, length)
+    ratio = percent / 100.0
+    return {'upper': middle * (1 + ratio), 'middle': middle, 'lower': middle * (1 - ratio)}
+
+def bbands(close, length=20, std=2):
+    """볼린저 밴드. %B(percent_b)와 밴드폭(bandwidth, %)도 함께 반환합니다."""
+    close = _as_float(close)
+    middle = sma(close, length)
+    deviation = rolling_std(close, length)
+    upper = middle + std * deviation
+    lower = middle - std * deviation
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_b = (close - lower) / (upper - lower)
+        bandwidth = 100.0 * (upper - lower) / middle
+    return {'upper': upper, 'middle': middle, 'lower': lower, 'percent_b': percent_b, 'bandwidth': bandwidth}
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD 선, 시그널 선, 히스토그램"""
+    if fast > slow:
+        fast, slow = slow, fast
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return {'macd': macd_line, 'signal': signal_line, 'histogram': macd_line - signal_line}
+
+def stoch(high, low, close, k=14, d=3, smooth_k=3):
+    """스토캐스틱 %K(smooth_k로 평활), %D"""
+    lowest_low = rolling_min(low, k)
+    highest_high = rolling_max(high, k)
+    price_range = highest_high - lowest_low
+    price_range = np.where(price_range == 0, sys.float_info.epsilon, price_range)
+    raw_k = 100.0 * (_as_float(close) - lowest_low) / price_range
+    stoch_k = sma(raw_k, smooth_k)
+    return {'k': stoch_k, 'd': sma(stoch_k, d)}
+
+def true_range(high, low, close):
+    high = _as_float(high)
+    low = _as_float(low)
+    prev_close = np.roll(_as_float(close), 1, axis=-1)
+    ranges = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    ranges[..., 0] = np.nan
+    return ranges
+
+def atr(high, low, close, length=14):
+    """평균 실제 범위 (와일더 평균)"""
+    return rma(true_range(high, low, close), length)
+
+def volume_spike(volume, length=20):
+    """현재 거래량 / 직전 length개 봉의 평균 거래량"""
+    volume = _as_float(volume)
+    prev_mean = np.full(volume.shape, np.nan)
+    prev_mean[..., 1:] = sma(volume, length)[..., :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return volume / prev_mean
+
+def streak(values):
+    """연속 상승(+n) 또는 하락(-n) 봉 수. 직전 봉과 같으면 0에서 다시 셉니다."""
+    values = _as_float(values)
+    steps = np.zeros(values.shape)
+    steps[..., 1:] = np.nan_to_num(np.sign(np.diff(values, axis=-1)))
+    out = np.zeros(values.shape)
+    for t in range(1, values.shape[-1]):
+        step = steps[..., t]
+        prev = out[..., t - 1]
+        out[..., t] = np.where((step != 0) & (np.sign(prev) == step), prev + step, step)
+    return out
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 pandas_ta 결과와 비교 검증
+    import pandas as pd
+    import pandas_ta as ta
+
+    rng = np.random.default_rng(7)
+    n = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.uniform(100, 1000, n)
+    df = pd.DataFrame({'high': high, 'low': low, 'close': close, 'volume': volume})
+
+    def check(name, ours, reference):
+        reference = np.asarray(reference, dtype=np.float64)
+        both = ~np.isnan(ours) & ~np.isnan(reference)
+        same_nan = np.array_equal(np.isnan(ours), np.isnan(reference))
+        max_diff = np.max(np.abs(ours[both] - reference[both])) if both.any() else 0.0
+        print(f"{name:10s} 최대 오차={max_diff:.2e} NaN 위치 일치={same_nan}")
+
+    check("SMA", sma(close, 20), ta.sma(df['close'], length=20))
+    check("EMA", ema(close, 20), ta.ema(df['close'], length=20))
+    check("RSI", rsi(close, 14), ta.rsi(df['close'], length=14))
+    bb = ta.bbands(df['close'], length=20, std=2)
+    check("BB upper", bbands(close, 20, 2)['upper'], bb.iloc[:, 2])
+    check("BB lower", bbands(close, 20, 2)['lower'], bb.iloc[:, 0])
+    m = ta.macd(df['close'])
+    check("MACD", macd(close)['macd'], m.iloc[:, 0])
+    check("MACD sig", macd(close)['signal'], m.iloc[:, 2])
+    st = ta.stoch(df['high'], df['low'], df['close'])
+    check("Stoch K", stoch(high, low, close)['k'], st.iloc[:, 0])
+    check("Stoch D", stoch(high, low, close)['d'], st.iloc[:, 1])
+    check("ATR", atr(high, low, close, 14), ta.atr(df['high'], df['low'], df['close'], length=14, talib=False))
+
+    # 2차원 (심볼 x 봉) 입력은 행별 1차원 계산과 같아야 함
+    stacked = np.vstack([close, close * 1.5])
+    print("2D RSI 일치:", np.allclose(rsi(stacked, 14)[1], rsi(close * 1.5, 14), equal_nan=True))
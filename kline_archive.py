@@ -0,0 +1,129 @@
+# kline_archive.py
+# (심볼, 시간봉)별 닫힌 캔들을 고정 폭 바이너리 컬럼 파일로 디스크에 보관합니다.
+# 읽기는 np.memmap으로 복사 없이 이루어지며, 쓰기는 새 캔들을 파일 끝에 덧붙이기만 하므로
+# 엔진, 백테스터, 차트 등 여러 프로세스가 같은 보관소를 읽기 전용으로 공유할 수 있습니다.
+#
+# 디렉터리 구조: <root>/<SYMBOL>/<timeframe>/<컬럼>.bin (컬럼당 int64 또는 float64 하나씩)
+
+import os
+import threading
+import numpy as np
+
+from candles import KLINE_COLUMNS, INT_COLUMNS
+
+# 보관하는 컬럼과 자료형. open_time은 행이 온전히 기록되었음을 나타내므로 항상 마지막에 씁니다.
+ARCHIVE_COLUMNS = [col for col in KLINE_COLUMNS[:11] if col != 'open_time'] + ['open_time']
+COLUMN_DTYPES = {col: np.dtype(np.int64) if col in INT_COLUMNS else np.dtype(np.float64) for col in ARCHIVE_COLUMNS}
+ITEM_SIZE = 8
+
+class KlineArchive:
+    """(심볼, 시간봉)별 캔들 보관소. 한 보관소 디렉터리에는 쓰기 프로세스가 하나만 있어야 합니다."""
+
+    def __init__(self, root="kline_archive"):
+        self.root = root
+        self.lock = threading.Lock()
+        self._maps = {} # {(symbol, timeframe, col): (행 수, memmap)}
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol, timeframe)
+
+    def _path(self, symbol, timeframe, col):
+        return os.path.join(self._dir(symbol, timeframe), f"{col}.bin")
+
+    def row_count(self, symbol, timeframe):
+        """온전히 기록된 행 수 (모든 컬럼 파일 길이의 최솟값)"""
+        try:
+            return min(os.path.getsize(self._path(symbol, timeframe, col)) for col in ARCHIVE_COLUMNS) // ITEM_SIZE
+        except OSError:
+            return 0
+
+    def _column(self, symbol, timeframe, col, rows):
+        key = (symbol, timeframe, col)
+        cached = self._maps.get(key)
+        if cached is None or cached[0] != rows:
+            cached = (rows, np.memmap(self._path(symbol, timeframe, col), dtype=COLUMN_DTYPES[col], mode='r', shape=(rows,)))
+            self._maps[key] = cached
+        return cached[1]
+
+    def read(self, symbol, timeframe, limit=None):
+        """
+        보관된 캔들을 {컬럼: 읽기 전용 memmap 뷰}로 반환합니다. limit이 있으면 마지막 limit개만.
+        보관된 캔들이 없으면 None
+        """
+        with self.lock:
+            rows = self.row_count(symbol, timeframe)
+            if rows == 0:
+                return None
+            start = 0 if limit is None else max(0, rows - limit)
+            return {col: self._column(symbol, timeframe, col, rows)[start:] for col in ARCHIVE_COLUMNS}
+
+    def last_open_time(self, symbol, timeframe):
+        rows = self.row_count(symbol, timeframe)
+        if rows == 0:
+            return None
+        with open(self._path(symbol, timeframe, 'open_time'), 'rb') as f:
+            f.seek((rows - 1) * ITEM_SIZE)
+            return int(np.frombuffer(f.read(ITEM_SIZE), dtype=np.int64)[0])
+
+    def first_open_time(self, symbol, timeframe):
+        if self.row_count(symbol, timeframe) == 0:
+            return None
+        with open(self._path(symbol, timeframe, 'open_time'), 'rb') as f:
+            return int(np.frombuffer(f.read(ITEM_SIZE), dtype=np.int64)[0])
+
+    def append(self, symbol, timeframe, candles):
+        """
+        마지막으로 보관된 캔들보다 뒤의 캔들만 덧붙이고 덧붙인 개수를 반환합니다.
+        candles에는 닫힌 캔들만 넘겨야 합니다.
+        """
+        with self.lock:
+            last_open = self.last_open_time(symbol, timeframe)
+            rows = self.row_count(symbol, timeframe)
+            open_times = np.asarray(candles['open_time'], dtype=np.int64)
+            mask = open_times > last_open if last_open is not None else np.ones(len(open_times), dtype=bool)
+            if not mask.any():
+                return 0
+
+            os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+            for col in ARCHIVE_COLUMNS:
+                path = self._path(symbol, timeframe, col)
+                with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                    # 이전에 중간에 끊긴 쓰기가 있었다면 온전한 행 뒤부터 덮어씀
+                    f.truncate(rows * ITEM_SIZE)
+                    f.seek(rows * ITEM_SIZE)
+                    f.write(np.ascontiguousarray(np.asarray(candles[col])[mask], dtype=COLUMN_DTYPES[col]).tobytes())
+            return int(mask.sum())
+
+    def replace(self, symbol, timeframe, candles):
+        """보관된 캔들 전체를 candles로 바꿉니다. 임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 이전 파일을 계속 볼 수 있습니다."""
+        with self.lock:
+            for col in ARCHIVE_COLUMNS:
+                self._maps.pop((symbol, timeframe, col), None)
+            os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+            # open_time을 먼저 비워 두면 교체 도중 읽는 쪽은 빈 보관소로 봅니다.
+            self._write_file(self._path(symbol, timeframe, 'open_time'), b'')
+            for col in ARCHIVE_COLUMNS:
+                self._write_file(self._path(symbol, timeframe, col), np.ascontiguousarray(candles[col], dtype=COLUMN_DTYPES[col]).tobytes())
+            return len(candles['open_time'])
+
+    def merge(self, symbol, timeframe, candles):
+        """
+        candles를 보관분과 합쳐 open_time 순으로 정렬하고 중복을 없앤 뒤 통째로 교체합니다.
+        보관분보다 과거 구간을 보충할 때 씁니다. 늘어난 행 수를 반환합니다.
+        """
+        existing = self.read(symbol, timeframe)
+        old_rows = 0 if existing is None else len(existing['open_time'])
+        parts = [{col: np.asarray(candles[col], dtype=COLUMN_DTYPES[col]) for col in ARCHIVE_COLUMNS}]
+        if existing is not None:
+            parts.append({col: np.array(existing[col]) for col in ARCHIVE_COLUMNS})
+        combined = {col: np.concatenate([part[col] for part in parts]) for col in ARCHIVE_COLUMNS}
+        # 같은 open_time이면 새로 받은 캔들(앞쪽)을 남김
+        _, first_index = np.unique(combined['open_time'], return_index=True)
+        merged = {col: values[first_index] for col, values in combined.items()}
+        return self.replace(symbol, timeframe, merged) - old_rows
+
+    @staticmethod
+    def _write_file(path, data):
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
@@ -3,9 +3,19 @@ import tkinter as tk
 import threading
 import time
 from tkinter import ttk, scrolledtext
-from binance_client import get_usdt_futures_symbol_info, get_futures_ticker_data
+from binance_client import get_usdt_futures_symbol_info, get_futures_ticker_data, OPEN_INTEREST_PERIODS
+from weight_governor import governor, PRIORITY_DISPLAY
 
-from monitoring_engine import MonitoringEngine
+from monitoring_engine import MonitoringEngine, parse_params, UNIVERSE_FILTER_KEYS, EXPRESSION_INDICATOR
+from screen_expr import ExpressionCompiler, ExpressionError
+from engine_process import EngineProcess, apply_engine_settings
+from screener import Screener, DEFAULT_SCREENER_COLUMNS
+from cache_manager import DEFAULT_CACHE_BUDGET_MB
+
+# 상태 표시줄이 엔진 진행 상황을 읽어 가는 주기 (밀리초)
+PROGRESS_POLL_MS = 250
+# 엔진 상태 스냅샷 파일
+ENGINE_SNAPSHOT_PATH = "engine_snapshot.npz"
 
 class App(tk.Tk):
     def __init__(self):
@@ -17,8 +27,10 @@ class App(tk.Tk):
         self.sort_column = "No"
         self.sort_reverse = False
 
-        # 엔진 초기화
+        # 엔진 초기화 (같은 프로세스의 스레드 엔진과, 선택 시 쓰는 별도 프로세스 엔진)
         self.engine = MonitoringEngine(self)
+        self.engine_process = EngineProcess(self)
+        self.active_engine = self.engine # 지금 실행 중이거나 마지막으로 실행한 엔진
 
         # 시세 업데이트 스레드 관련
         self.price_updater_thread = None
@@ -30,9 +42,12 @@ class App(tk.Tk):
         main_paned_window = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         main_paned_window.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        # --- 왼쪽 프레임 (코인 목록) ---
-        left_frame = ttk.LabelFrame(main_paned_window, text="코인 시세 (3초마다 자동 갱신)", padding="10")
-        main_paned_window.add(left_frame, weight=1)
+        # --- 왼쪽 탭 (코인 목록 / 스크리너) ---
+        self.left_notebook = ttk.Notebook(main_paned_window)
+        main_paned_window.add(self.left_notebook, weight=1)
+
+        left_frame = ttk.Frame(self.left_notebook, padding="10")
+        self.left_notebook.add(left_frame, text="코인 시세 (3초마다 자동 갱신)")
 
         self.coin_list_tree = ttk.Treeview(
             left_frame,
@@ -79,7 +94,7 @@ class App(tk.Tk):
 
         self.condition_tree = ttk.Treeview(
             list_frame, 
-            columns=("Group", "Shift", "Timeframe", "Coin", "Indicator", "Parameters", "Detail", "Operator", "Value"), 
+            columns=("Group", "Shift", "Timeframe", "Coin", "Indicator", "Parameters", "Detail", "Operator", "Value", "Universe", "Profile"), 
             show="headings",
             height=5
         )
@@ -103,6 +118,10 @@ class App(tk.Tk):
         self.condition_tree.column("Operator", width=50, anchor=tk.CENTER)
         self.condition_tree.heading("Value", text="기준값")
         self.condition_tree.column("Value", width=80, anchor=tk.CENTER)
+        self.condition_tree.heading("Universe", text="유니버스")
+        self.condition_tree.column("Universe", width=120)
+        self.condition_tree.heading("Profile", text="프로필")
+        self.condition_tree.column("Profile", width=80, anchor=tk.CENTER)
 
         # --- 3. 조건 추가 프레임 ---
         self.add_condition_frame = ttk.LabelFrame(right_frame, text="조건 추가", padding="10")
@@ -112,7 +131,9 @@ class App(tk.Tk):
         self.timeframe_options = ['1m', '3m', '5m', '15m', '30m', '1h', '4h', '1d']
         coin_list, self.price_precisions = get_usdt_futures_symbol_info()
         self.coin_options = ["All Coins"] + coin_list
-        self.indicator_options = ["RSI", "Envelope", "BollingerBands", "MASlope", "MA_Compare", "Candle_Trend", "MA_Trend"]
+        self.indicator_options = ["RSI", "Envelope", "BollingerBands", "MA", "MASlope", "MA_Compare", "Candle_Trend", "MA_Trend",
+                                  "MACD", "Stochastic", "ATR", "VolumeSpike", "FundingRate", "Premium", "OpenInterest",
+                                  EXPRESSION_INDICATOR]
         self.operator_options = [">", ">=", "<", "<=", "=="]
 
         # --- 위젯 생성 및 배치 ---
@@ -139,6 +160,16 @@ class App(tk.Tk):
         self.shift_entry.grid(row=1, column=5, padx=5, pady=5, sticky=tk.W)
         self.shift_entry.insert(0, "0")
 
+        # 유니버스 필터 (예: min_volume=50000000, top_n=100, min_change=-5, max_change=5)
+        ttk.Label(self.add_condition_frame, text="유니버스:").grid(row=2, column=4, padx=5, pady=5, sticky=tk.W)
+        self.universe_entry = ttk.Entry(self.add_condition_frame, width=10)
+        self.universe_entry.grid(row=2, column=5, padx=5, pady=5, sticky=tk.W)
+
+        # 프로필: 이름이 같은 조건끼리 알림 상태와 텔레그램 채팅방을 따로 가짐 (비우면 기본 프로필)
+        ttk.Label(self.add_condition_frame, text="프로필:").grid(row=3, column=4, padx=5, pady=5, sticky=tk.W)
+        self.profile_entry = ttk.Entry(self.add_condition_frame, width=10)
+        self.profile_entry.grid(row=3, column=5, padx=5, pady=5, sticky=tk.W)
+
         ttk.Label(self.add_condition_frame, text="지표:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
         self.indicator_combo = ttk.Combobox(self.add_condition_frame, values=self.indicator_options, state="readonly")
         self.indicator_combo.grid(row=1, column=1, padx=5, pady=5, sticky=tk.EW)
@@ -193,6 +224,47 @@ class App(tk.Tk):
         self.stop_button = ttk.Button(control_frame, text="모니터링 중지", command=self.stop_monitoring, state=tk.DISABLED)
         self.stop_button.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.X, expand=True)
 
+        # 가장 낮은 시간봉만 받아서 상위 시간봉을 로컬에서 합성 (API 요청 수 절감)
+        self.resample_var = tk.BooleanVar(value=False)
+        self.resample_check = ttk.Checkbutton(control_frame, text="상위 시간봉 로컬 합성", variable=self.resample_var)
+        self.resample_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 닫힌 캔들을 디스크에 보관하고 빠진 구간만 요청 (긴 기간 지표 허용)
+        self.archive_var = tk.BooleanVar(value=False)
+        self.archive_check = ttk.Checkbutton(control_frame, text="캔들 디스크 보관", variable=self.archive_var)
+        self.archive_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 조건 경계값에 가까운 코인은 자주, 먼 코인은 드물게 갱신
+        self.proximity_var = tk.BooleanVar(value=False)
+        self.proximity_check = ttk.Checkbutton(control_frame, text="근접도 기반 갱신", variable=self.proximity_var)
+        self.proximity_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 봉이 끝나기 전에는 캔들을 다시 받지 않고 시세로 진행 중인 봉만 갱신
+        self.patch_var = tk.BooleanVar(value=False)
+        self.patch_check = ttk.Checkbutton(control_frame, text="시세로 진행 봉 갱신", variable=self.patch_var)
+        self.patch_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 모든 조건 평가 결과(지표 값, 만족 여부, 지연 시간)를 evaluation_logs/에 기록
+        self.evaluation_log_var = tk.BooleanVar(value=False)
+        self.evaluation_log_check = ttk.Checkbutton(control_frame, text="평가 기록 저장", variable=self.evaluation_log_var)
+        self.evaluation_log_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 중지할 때 캔들 버퍼와 알림 쿨다운을 저장해 두고 다음 시작 때 이어서 사용
+        self.snapshot_var = tk.BooleanVar(value=False)
+        self.snapshot_check = ttk.Checkbutton(control_frame, text="상태 저장 후 이어서 시작", variable=self.snapshot_var)
+        self.snapshot_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 엔진을 별도 프로세스에서 실행 (스캔 중에도 화면이 끊기지 않고, 엔진 오류가 GUI를 멈추지 않음)
+        self.engine_process_var = tk.BooleanVar(value=False)
+        self.engine_process_check = ttk.Checkbutton(control_frame, text="엔진 별도 프로세스", variable=self.engine_process_var)
+        self.engine_process_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 캔들 버퍼 메모리 예산 (MB). 넘으면 오래 평가하지 않은 코인의 버퍼부터 내보냄
+        ttk.Label(control_frame, text="캐시(MB):").pack(side=tk.LEFT, padx=(5, 0), pady=5)
+        self.cache_budget_entry = ttk.Entry(control_frame, width=6)
+        self.cache_budget_entry.insert(0, str(DEFAULT_CACHE_BUDGET_MB))
+        self.cache_budget_entry.pack(side=tk.LEFT, padx=5, pady=5)
+
         # --- 5. 상태 표시줄 프레임 ---
         status_frame = ttk.Frame(self, padding="5")
         status_frame.pack(side=tk.BOTTOM, fill=tk.X, expand=False)
@@ -203,24 +275,176 @@ class App(tk.Tk):
         self.progress_bar = ttk.Progressbar(status_frame, orient="horizontal", length=100, mode="determinate")
         self.progress_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5)
 
+        self._build_screener_tab()
+
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.update_indicator_details()
         self.populate_coin_list_table()
         self.start_price_updater()
+        self._progress_version = None
+        self.after(PROGRESS_POLL_MS, self._poll_progress)
+
+
+    def _build_screener_tab(self):
+        """엔진이 받아 둔 캔들로 심볼별 지표 값을 보여 주는 스크리너 탭 (열/필터는 수식으로 설정)"""
+        self.screener = Screener(self.engine)
+        self.screener_visible = False # 시세 스레드는 탭이 보일 때만 계산
+        self.screener_items = {} # {symbol: item_id}
+        self.screener_cells = {} # {symbol: [표시 문자열, ...]}, 바뀐 칸만 Tk에 반영하기 위한 마지막 값
+        self.screener_values = {} # {symbol: (숫자 값, ...)}, 정렬용
+        self.screener_column_names = None
+        self.screener_sort = ("Coin", False)
+
+        frame = ttk.Frame(self.left_notebook, padding="10")
+        self.left_notebook.add(frame, text="스크리너")
+        self.left_notebook.bind("<<NotebookTabChanged>>", self.on_left_tab_changed)
+
+        settings_frame = ttk.Frame(frame)
+        settings_frame.pack(fill=tk.X)
+        settings_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(settings_frame, text="시간봉:").grid(row=0, column=0, padx=5, pady=2, sticky=tk.W)
+        self.screener_timeframe_combo = ttk.Combobox(settings_frame, values=self.timeframe_options, state="readonly", width=6)
+        self.screener_timeframe_combo.grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
+        self.screener_timeframe_combo.set(self.screener.timeframe)
+
+        # 열 설정: "이름=수식; 이름=수식" (예: RSI=rsi(14); %B=bb(20,2).percent_b)
+        ttk.Label(settings_frame, text="열:").grid(row=1, column=0, padx=5, pady=2, sticky=tk.W)
+        self.screener_columns_entry = ttk.Entry(settings_frame)
+        self.screener_columns_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=2, sticky=tk.EW)
+        self.screener_columns_entry.insert(0, DEFAULT_SCREENER_COLUMNS)
+
+        # 필터: 참/거짓 수식 (예: rsi(14) < 30), 비우면 전체
+        ttk.Label(settings_frame, text="필터:").grid(row=2, column=0, padx=5, pady=2, sticky=tk.W)
+        self.screener_filter_entry = ttk.Entry(settings_frame)
+        self.screener_filter_entry.grid(row=2, column=1, padx=5, pady=2, sticky=tk.EW)
+        ttk.Button(settings_frame, text="적용", command=self.apply_screener_settings).grid(row=2, column=2, padx=5, pady=2)
+
+        self.screener_count_label = ttk.Label(frame, text="엔진이 받아 둔 캔들로 계산합니다. (모니터링 중인 코인/시간봉만 표시)")
+        self.screener_count_label.pack(fill=tk.X, pady=2)
+
+        self.screener_tree = ttk.Treeview(frame, show="headings", height=25)
+        screener_scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.screener_tree.yview)
+        self.screener_tree.configure(yscrollcommand=screener_scrollbar.set)
+        self.screener_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        screener_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._rebuild_screener_columns([])
+
+    def on_left_tab_changed(self, event=None):
+        self.screener_visible = self.left_notebook.index("current") == 1
+
+    def apply_screener_settings(self):
+        try:
+            self.screener.configure(self.screener_timeframe_combo.get(), self.screener_columns_entry.get(),
+                                    self.screener_filter_entry.get())
+        except ExpressionError as e:
+            self.log(f"스크리너 설정 오류: {e}")
+            return
+        self.log("스크리너 설정을 적용했습니다. 다음 시세 갱신부터 반영됩니다.")
+
+    def _rebuild_screener_columns(self, names):
+        """열 구성이 바뀌면 Treeview 열을 새로 만들고 행을 비웁니다."""
+        self.screener_tree.delete(*self.screener_tree.get_children())
+        self.screener_items.clear()
+        self.screener_cells.clear()
+        self.screener_values.clear()
+        self.screener_column_names = list(names)
+        column_ids = ["Coin"] + [f"c{i}" for i in range(len(names))]
+        self.screener_tree["columns"] = column_ids
+        self.screener_tree.heading("Coin", text="코인", command=lambda: self.sort_screener_column("Coin"))
+        self.screener_tree.column("Coin", width=110, anchor=tk.W)
+        for column_id, name in zip(column_ids[1:], names):
+            self.screener_tree.heading(column_id, text=name, command=lambda c=column_id: self.sort_screener_column(c))
+            self.screener_tree.column(column_id, width=80, anchor=tk.E)
+        if self.screener_sort[0] not in column_ids:
+            self.screener_sort = ("Coin", False)
+
+    def update_screener_table(self, names, rows):
+        """
+        스크리너 표를 갱신합니다. 값이 바뀐 칸만 tree.set()으로 반영하고,
+        정렬 기준 열의 값이 바뀌었거나 행이 추가된 경우에만 다시 정렬합니다.
+        """
+        if names != self.screener_column_names:
+            self._rebuild_screener_columns(names)
+        tree = self.screener_tree
+        sort_column = self.screener_sort[0]
+        resort = False
+
+        for symbol in [s for s in self.screener_items if s not in rows]:
+            tree.delete(self.screener_items.pop(symbol))
+            self.screener_cells.pop(symbol, None)
+            self.screener_values.pop(symbol, None)
+
+        for symbol, values in rows.items():
+            cells = ["-" if v != v else f"{v:.2f}" for v in values]
+            self.screener_values[symbol] = values
+            item_id = self.screener_items.get(symbol)
+            if item_id is None:
+                self.screener_items[symbol] = tree.insert("", tk.END, values=[symbol] + cells)
+                self.screener_cells[symbol] = cells
+                resort = True
+                continue
+            previous = self.screener_cells[symbol]
+            for i, (old, new) in enumerate(zip(previous, cells)):
+                if old != new:
+                    tree.set(item_id, f"c{i}", new)
+                    if sort_column == f"c{i}":
+                        resort = True
+            self.screener_cells[symbol] = cells
+
+        if resort:
+            self._sort_screener()
+        self.screener_count_label.config(text=f"{self.screener_timeframe_combo.get()} 기준 {len(rows)}개 코인")
+
+    def sort_screener_column(self, column):
+        """같은 열을 다시 누르면 정렬 방향을 바꿉니다. 숫자 열은 처음에 큰 값부터"""
+        if column == self.screener_sort[0]:
+            self.screener_sort = (column, not self.screener_sort[1])
+        else:
+            self.screener_sort = (column, column != "Coin")
+        self._sort_screener()
 
-
-    def update_progress(self, current, total):
+    def _sort_screener(self):
+        column, reverse = self.screener_sort
+        if column == "Coin":
+            order = sorted(self.screener_items, reverse=reverse)
+        else:
+            index = int(column[1:])
+            valid = [s for s in self.screener_items if self.screener_values[s][index] == self.screener_values[s][index]]
+            missing = [s for s in self.screener_items if s not in set(valid)]
+            order = sorted(valid, key=lambda s: self.screener_values[s][index], reverse=reverse) + missing # 값 없는 행은 항상 아래
+        for position, symbol in enumerate(order):
+            self.screener_tree.move(self.screener_items[symbol], '', position)
+
+    def _poll_progress(self):
+        """엔진의 진행 카운터를 메인 스레드에서 일정 주기로 읽어 상태 표시줄에 반영합니다."""
+        try:
+            # 별도 프로세스 엔진은 조건 변경 전달과 로그/진행/스크리너 이벤트 처리를 여기서 함
+            if self.active_engine is self.engine_process and self.engine_process.process is not None:
+                if not self.engine_process.poll():
+                    self._finalize_stop() # 중지 완료 또는 비정상 종료
+            snapshot = self.active_engine.progress.snapshot()
+            # 대기 단계는 남은 시간을 보여 주므로 값이 그대로여도 매번 다시 그림
+            if snapshot['version'] != self._progress_version or snapshot['wait_left'] is not None:
+                self._progress_version = snapshot['version']
+                self.update_progress(snapshot)
+        finally:
+            self.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def update_progress(self, snapshot):
+        current, total = snapshot['current'], snapshot['total']
+        text = snapshot['phase']
         if total > 0:
             self.progress_bar["maximum"] = total
             self.progress_bar["value"] = current
-            self.progress_label.config(text=f"코인 확인 중: {current} / {total}")
+            text += f": {current} / {total}"
+            if snapshot['rate']:
+                text += f" ({snapshot['rate']:.1f}개/초, 남은 시간 약 {snapshot['eta']:.0f}초)"
         else:
             self.progress_bar["value"] = 0
-            self.progress_label.config(text="대기 중...")
-        self.update_idletasks() # GUI 업데이트 강제
-
-    def reset_progress(self):
-        self.update_progress(0, 0)
+            if snapshot['wait_left'] is not None:
+                text += f" ({snapshot['wait_left']:.0f}초 남음)"
+        self.progress_label.config(text=text)
 
     def update_indicator_details(self, event=None):
         # 이전 파라미터 위젯 삭제
@@ -255,7 +479,7 @@ class App(tk.Tk):
             self.add_param_entry("Length:", "14")
             self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
 
-        elif indicator in ["Envelope", "BollingerBands"]:
+        elif indicator in ["Envelope", "BollingerBands", "MA"]:
             if not hasattr(self, 'price_value_combo'):
                 self.price_value_combo = ttk.Combobox(self.add_condition_frame, state="readonly", width=15, values=["Close", "Open", "High", "Low"])
             self.price_value_combo.set("Close")
@@ -265,10 +489,13 @@ class App(tk.Tk):
                 details = ["Upper Band", "Lower Band", "Middle Band"]
                 self.add_param_entry("Length:", "20")
                 self.add_param_entry("Percent:", "5")
-            else: # BollingerBands
+            elif indicator == "BollingerBands":
                 details = ["Upper Band", "Middle Band", "Lower Band"]
                 self.add_param_entry("Length:", "20")
                 self.add_param_entry("StdDev:", "2")
+            else: # MA
+                details = ["SMA", "EMA"]
+                self.add_param_entry("Length:", "20")
 
         elif indicator == "MASlope":
             details = ["Direction", "Change", "Slope"]
@@ -289,6 +516,51 @@ class App(tk.Tk):
             details = ["연속 상승", "연속 하락"]
             self.add_param_entry("Length:", "20")
             self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "MACD":
+            details = ["MACD Line", "Signal Line", "Histogram"]
+            self.add_param_entry("Fast:", "12")
+            self.add_param_entry("Slow:", "26")
+            self.add_param_entry("Signal:", "9")
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "Stochastic":
+            details = ["%K", "%D"]
+            self.add_param_entry("K:", "14")
+            self.add_param_entry("D:", "3")
+            self.add_param_entry("Smooth:", "3")
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "ATR":
+            details = ["ATR Value", "ATR %"]
+            self.add_param_entry("Length:", "14")
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "VolumeSpike":
+            details = ["Ratio"]
+            self.add_param_entry("Length:", "20")
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "FundingRate":
+            details = ["Funding Rate %"]
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "Premium":
+            details = ["Premium %"]
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == "OpenInterest":
+            details = ["Change %"]
+            self.add_param_entry("Length:", "12")
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
+
+        elif indicator == EXPRESSION_INDICATOR:
+            # 기준값 칸에 수식 입력 (예: rsi(14)[1] < 30 and close > bb(20,2).lower and ma(20) rising)
+            details = ["True"]
+            self.operator_combo['values'] = ['==']
+            self.operator_combo.set('==')
+            self.operator_combo.grid_remove()
+            self.value_entry.grid(row=3, column=3, padx=5, pady=5, sticky=tk.EW)
         
         self.indicator_detail_combo['values'] = details
         if details:
@@ -357,7 +629,7 @@ class App(tk.Tk):
         value = ""
         if indicator == "MASlope" and detail in ["Direction", "Change"]:
             value = self.maslope_value_combo.get()
-        elif indicator in ["Envelope", "BollingerBands"]:
+        elif indicator in ["Envelope", "BollingerBands", "MA"]:
             value = self.price_value_combo.get()
         else:
             value = self.value_entry.get().strip()
@@ -374,9 +646,19 @@ class App(tk.Tk):
         if not all([timeframe, coin, indicator, detail, operator]):
             self.log("시간봉, 코인, 지표, 세부 항목, 조건은 필수입니다.")
             return None
+
+        universe = self.universe_entry.get().strip()
+        if universe:
+            universe_params = parse_params(universe)
+            keys = [p.split('=', 1)[0].strip() for p in universe.split(',')]
+            unknown_keys = [k for k in keys if k not in UNIVERSE_FILTER_KEYS or k not in universe_params]
+            if unknown_keys:
+                self.log(f"알 수 없는 유니버스 필터: {', '.join(unknown_keys)} (사용 가능: {', '.join(UNIVERSE_FILTER_KEYS)})")
+                return None
+            universe = ", ".join([f"{k}={v}" for k, v in universe_params.items()])
         
         # 숫자값이어야 하는 조건들에 대해 유효성 검사
-        if indicator == "RSI" or (indicator == "MASlope" and detail == "Slope") or indicator == "MA_Compare":
+        if indicator in ["RSI", "MA_Compare", "MACD", "Stochastic", "ATR", "VolumeSpike", "FundingRate", "Premium", "OpenInterest"] or (indicator == "MASlope" and detail == "Slope"):
             try:
                 float(value)
             except ValueError:
@@ -388,8 +670,25 @@ class App(tk.Tk):
             except ValueError:
                 self.log(f"'{indicator}'에 대한 기준값은 숫자(정수)여야 합니다.")
                 return None
+        if indicator in ["FundingRate", "Premium"] and shift != 0:
+            self.log(f"'{indicator}'는 현재 값만 있으므로 'N봉 전'은 0이어야 합니다.")
+            return None
+        if indicator == "OpenInterest" and timeframe not in OPEN_INTEREST_PERIODS:
+            self.log(f"미결제약정 기록은 {', '.join(OPEN_INTEREST_PERIODS)} 시간봉만 지원합니다.")
+            return None
+        if indicator == EXPRESSION_INDICATOR:
+            try:
+                ExpressionCompiler().compile(value)
+            except ExpressionError as e:
+                self.log(f"수식 오류: {e}")
+                return None
+            if group:
+                self.log("수식 조건은 그룹에 넣을 수 없습니다. 여러 조건은 수식 안에서 and/or로 묶어 주세요.")
+                return None
+
+        profile = self.profile_entry.get().strip()
 
-        return (group, shift, timeframe, coin, indicator, params_str, detail, operator, value)
+        return (group, shift, timeframe, coin, indicator, params_str, detail, operator, value, universe, profile)
 
     def add_condition(self):
         condition_data = self._get_condition_data_from_widgets()
@@ -418,12 +717,18 @@ class App(tk.Tk):
 
     def load_condition_to_widgets(self, item_id):
         values = self.condition_tree.item(item_id, 'values')
-        group, shift, timeframe, coin, indicator, params_str, detail, operator, value = values
+        group, shift, timeframe, coin, indicator, params_str, detail, operator, value = values[:9]
+        universe = values[9] if len(values) > 9 else ""
+        profile = values[10] if len(values) > 10 else ""
 
         self.group_entry.delete(0, tk.END)
         self.group_entry.insert(0, group)
         self.shift_entry.delete(0, tk.END)
         self.shift_entry.insert(0, shift)
+        self.universe_entry.delete(0, tk.END)
+        self.universe_entry.insert(0, universe)
+        self.profile_entry.delete(0, tk.END)
+        self.profile_entry.insert(0, profile)
 
         # Set the main combos first
         self.timeframe_combo.set(timeframe)
@@ -454,7 +759,7 @@ class App(tk.Tk):
         # Set the correct value widget based on the indicator and detail
         if indicator == 'MASlope' and detail in ["Direction", "Change"]:
             self.maslope_value_combo.set(value)
-        elif indicator in ["Envelope", "BollingerBands"]:
+        elif indicator in ["Envelope", "BollingerBands", "MA"]:
             self.price_value_combo.set(value)
         else:
             self.value_entry.delete(0, tk.END)
@@ -474,6 +779,8 @@ class App(tk.Tk):
         self.group_entry.delete(0, tk.END)
         self.shift_entry.delete(0, tk.END)
         self.shift_entry.insert(0, "0")
+        self.universe_entry.delete(0, tk.END)
+        self.profile_entry.delete(0, tk.END)
         
         # Disable modify button
         self.modify_button.config(state=tk.DISABLED)
@@ -501,7 +808,30 @@ class App(tk.Tk):
         if not self.get_conditions():
             self.log("알림 조건이 없습니다. 최소 하나 이상의 조건을 추가해주세요.")
             return
-        self.engine.start()
+        try:
+            cache_budget_mb = float(self.cache_budget_entry.get())
+            if cache_budget_mb <= 0:
+                raise ValueError
+        except ValueError:
+            self.log("캐시 크기는 0보다 큰 숫자(MB)여야 합니다.")
+            return
+        settings = {
+            'use_resampling': self.resample_var.get(),
+            'use_archive': self.archive_var.get(),
+            'use_proximity_scheduling': self.proximity_var.get(),
+            'use_intrabar_patching': self.patch_var.get(),
+            'use_evaluation_log': self.evaluation_log_var.get(),
+            'snapshot_path': ENGINE_SNAPSHOT_PATH if self.snapshot_var.get() else None,
+            'cache_budget_mb': cache_budget_mb,
+        }
+        if self.engine_process_var.get():
+            self.active_engine = self.engine_process
+            self.engine_process.start(settings)
+        else:
+            self.active_engine = self.engine
+            apply_engine_settings(self.engine, settings)
+            self.engine.start()
+        self.engine_process_check.config(state=tk.DISABLED)
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
 
@@ -511,11 +841,13 @@ class App(tk.Tk):
         thread.start()
 
     def _threaded_stop(self):
-        self.engine.stop()
+        self.active_engine.stop()
         self.after(0, self._finalize_stop)
 
     def _finalize_stop(self):
         self.start_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+        self.engine_process_check.config(state=tk.NORMAL)
 
     def get_conditions(self):
         conditions = []
@@ -526,7 +858,7 @@ class App(tk.Tk):
     def on_closing(self):
         self.log("애플리케이션을 종료합니다...")
         self.price_updater_stop_event.set() # 시세 업데이트 스레드 중지
-        if self.engine.is_running:
+        if self.active_engine.is_running:
             self.stop_monitoring()
             # Give the stop thread a moment to start and run
             self.after(100, self.destroy)
@@ -542,17 +874,32 @@ class App(tk.Tk):
 
     def _price_update_loop(self):
         """백그라운드에서 실행되며 주기적으로 시세 데이터를 가져오는 루프."""
+        interval = 3
         while not self.price_updater_stop_event.is_set():
             try:
-                tickers = get_futures_ticker_data()
+                tickers = get_futures_ticker_data(priority=PRIORITY_DISPLAY)
                 if tickers:
                     # GUI 업데이트는 메인 스레드에서 실행하도록 예약
                     self.after(0, self.update_coin_list_table, tickers)
+                    if self.active_engine is self.engine_process:
+                        # 별도 프로세스 엔진에는 현재가만 보내고, 스크리너 표도 엔진 프로세스가 계산해서 돌려줌
+                        self.engine_process.on_ticker(tickers, self.screener.settings if self.screener_visible else None)
+                    else:
+                        # 같은 시세로 엔진의 트리거 가격 인덱스를 확인 (봉 중간 알림)
+                        self.engine.on_ticker(tickers)
+                        # 스크리너 탭이 보이면 엔진 캔들 버퍼와 방금 받은 시세로 지표 표를 계산 (계산은 이 스레드에서)
+                        if self.screener_visible:
+                            names, rows = self.screener.compute()
+                            self.after(0, self.update_screener_table, names, rows)
             except Exception as e:
                 self.after(0, self.log, f"시세 업데이트 스레드 오류: {e}")
             
-            # 3초 대기 (중지 이벤트를 확인하며)
-            self.price_updater_stop_event.wait(3)
+            # 기본 3초 대기, API 가중치 예산이 빠듯하면 갱신 주기를 늘림 (중지 이벤트를 확인하며)
+            next_interval = governor.suggested_interval(3)
+            if next_interval != interval:
+                interval = next_interval
+                self.after(0, self.log, f"API 가중치 사용률에 따라 시세 갱신 주기를 {interval}초로 조정합니다.")
+            self.price_updater_stop_event.wait(interval)
 
     def populate_coin_list_table(self):
         """코인 목록을 최초로 한번만 로딩하고, 각 코인의 Treeview item을 맵에 저장합니다."""
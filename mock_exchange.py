@@ -0,0 +1,449 @@
+# mock_exchange.py
+# 부하 테스트용 로컬 바이낸스 선물 대역(stand-in) 서버.
+# 프로젝트가 쓰는 REST 엔드포인트(exchangeInfo, klines, ticker/24hr, premiumIndex, openInterestHist)와
+# kline/ticker 웹소켓 스트림을 흉내 내며, 심볼 수, 캔들 속도, 지연 시간, 가중치 한도를 조절할 수 있습니다.
+#
+# --time-scale이 1보다 크면 가상 시계가 실제 시각보다 앞서 가므로,
+# 벽시계로 봉 마감을 판단하는 기능(캔들 디스크 보관 등)은 1배속에서 확인해야 합니다.
+#
+# 실행 예: python mock_exchange.py --symbols 2000 --time-scale 60 --latency 0.05
+# 클라이언트 전환: BINANCE_MOCK_URL=http://127.0.0.1:8765 python main_gui.py
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import select
+import struct
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from resampler import INTERVAL_MS
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def klines_weight(limit):
+    if limit < 100: return 1
+    if limit < 500: return 2
+    if limit <= 1000: return 5
+    return 10
+
+class MockMarket:
+    """
+    심볼별 랜덤 워크 가격과 시간봉별 캔들을 만들어 냅니다.
+    time_scale배 빠르게 흐르는 가상 시계를 쓰므로 time_scale=60이면 1분봉이 1초마다 닫힙니다.
+    캔들은 요청을 받을 때 필요한 만큼만 만들어 둡니다.
+    """
+
+    def __init__(self, symbol_count=2000, time_scale=1.0, volatility=0.001, seed=1):
+        self.time_scale = time_scale
+        self.volatility = volatility # 가상 1분당 로그 수익률 표준편차
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.real_start = time.time()
+        self.virtual_start_ms = int(self.real_start * 1000)
+
+        names = ["BTCUSDT", "ETHUSDT", "XRPUSDT", "SOLUSDT", "DOGEUSDT"]
+        self.symbols = names[:symbol_count] + [f"MOCK{i:04d}USDT" for i in range(max(0, symbol_count - len(names)))]
+        self.prices = {}
+        self.ref_prices = {}
+        self.quote_volumes = {}
+        self.last_update_ms = {}
+        for symbol in self.symbols:
+            price = 10 ** self.random.uniform(-3, 4.5)
+            self.prices[symbol] = price
+            self.ref_prices[symbol] = price * math.exp(self.random.gauss(0, 0.03))
+            self.quote_volumes[symbol] = 10 ** self.random.uniform(5, 10)
+            self.last_update_ms[symbol] = self.virtual_start_ms
+        self.series = {} # {(symbol, interval): [[open_time, o, h, l, c, v], ...]}
+        self.funding_rates = {symbol: self.random.gauss(0.0001, 0.0003) for symbol in self.symbols}
+        self.premiums = {symbol: self.random.gauss(0, 0.001) for symbol in self.symbols}
+        self.open_interests = {symbol: self.quote_volumes[symbol] / self.prices[symbol] * self.random.uniform(0.05, 0.3)
+                               for symbol in self.symbols}
+
+    def now_ms(self):
+        return self.virtual_start_ms + int((time.time() - self.real_start) * 1000 * self.time_scale)
+
+    def _step(self, price, elapsed_ms):
+        minutes = max(elapsed_ms, 0) / 60_000
+        return price * math.exp(self.random.gauss(0, self.volatility * math.sqrt(minutes))) if minutes else price
+
+    def price(self, symbol):
+        """가상 시계에 맞춰 현재가를 갱신해서 반환합니다. (lock 안에서 호출)"""
+        now = self.now_ms()
+        elapsed = now - self.last_update_ms[symbol]
+        if elapsed > 0:
+            self.prices[symbol] = self._step(self.prices[symbol], elapsed)
+            self.last_update_ms[symbol] = now
+        return self.prices[symbol]
+
+    def _new_candle(self, open_time, open_price, interval_ms):
+        """open_price에서 시작하는 닫힌 캔들 하나를 만듭니다."""
+        close = self._step(open_price, interval_ms)
+        wiggle = abs(self.random.gauss(0, self.volatility * math.sqrt(interval_ms / 60_000)))
+        high = max(open_price, close) * (1 + wiggle)
+        low = min(open_price, close) * (1 - wiggle)
+        return [open_time, open_price, high, low, close, self.random.uniform(10, 1000)]
+
+    def _series(self, symbol, interval, min_count, start_time=None):
+        """(symbol, interval) 캔들 목록을 현재 시각까지 맞추고, 필요하면 과거 방향으로 늘립니다."""
+        interval_ms = INTERVAL_MS[interval]
+        price = self.price(symbol)
+        now = self.now_ms()
+        current_open = now - now % interval_ms
+        key = (symbol, interval)
+        candles = self.series.get(key)
+
+        if candles is None:
+            candles = [[current_open, price, price, price, price, 0.0]]
+            self.series[key] = candles
+
+        # 앞으로: 지나간 버킷을 닫고 새 버킷을 엽니다.
+        last = candles[-1]
+        while last[0] < current_open:
+            if last[0] + interval_ms < current_open:
+                candle = self._new_candle(last[0] + interval_ms, last[4], interval_ms)
+            else:
+                candle = [current_open, last[4], max(last[4], price), min(last[4], price), price, 0.0]
+            candles.append(candle)
+            last = candle
+
+        # 진행 중인 캔들에 현재가 반영
+        last[2] = max(last[2], price)
+        last[3] = min(last[3], price)
+        last[4] = price
+        last[5] += self.random.uniform(0, 5)
+
+        # 뒤로: 요청한 개수나 시작 시각을 덮을 때까지 과거 캔들을 만듭니다. (역방향 랜덤 워크)
+        needed_first = current_open - (min_count - 1) * interval_ms
+        if start_time is not None:
+            needed_first = min(needed_first, start_time - start_time % interval_ms)
+        older = []
+        first_open, first_price = candles[0][0], candles[0][1]
+        while first_open > needed_first:
+            first_open -= interval_ms
+            candle = self._new_candle(first_open, first_price, interval_ms)
+            # 역방향으로 만들었으므로 시가/종가를 뒤집어 연속성을 맞춤
+            candle[1], candle[4] = candle[4], first_price
+            older.append(candle)
+            first_price = candle[1]
+        if older:
+            older.reverse()
+            candles[:0] = older
+        return candles
+
+    def klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        interval_ms = INTERVAL_MS[interval]
+        with self.lock:
+            candles = self._series(symbol, interval, limit, start_time)
+            if start_time is not None:
+                selected = [c for c in candles if c[0] >= start_time and (end_time is None or c[0] <= end_time)][:limit]
+            elif end_time is not None:
+                selected = [c for c in candles if c[0] <= end_time][-limit:]
+            else:
+                selected = candles[-limit:]
+            return [
+                [c[0], f"{c[1]:.8g}", f"{c[2]:.8g}", f"{c[3]:.8g}", f"{c[4]:.8g}", f"{c[5]:.3f}",
+                 c[0] + interval_ms - 1, f"{c[5] * c[4]:.3f}", int(c[5]), f"{c[5] / 2:.3f}", f"{c[5] * c[4] / 2:.3f}", "0"]
+                for c in selected
+            ]
+
+    def ticker(self, symbol):
+        """lock 안에서 호출"""
+        price = self.price(symbol)
+        ref = self.ref_prices[symbol]
+        self.quote_volumes[symbol] *= math.exp(self.random.gauss(0, 0.001))
+        return {
+            'symbol': symbol,
+            'lastPrice': f"{price:.8g}",
+            'openPrice': f"{ref:.8g}",
+            'priceChange': f"{price - ref:.8g}",
+            'priceChangePercent': f"{(price / ref - 1) * 100:.3f}",
+            'quoteVolume': f"{self.quote_volumes[symbol]:.2f}",
+            'volume': f"{self.quote_volumes[symbol] / price:.3f}",
+            'closeTime': self.now_ms(),
+        }
+
+    def tickers(self, symbol=None):
+        with self.lock:
+            if symbol:
+                return self.ticker(symbol)
+            return [self.ticker(s) for s in self.symbols]
+
+    def premium_index(self, symbol=None):
+        """마크 가격 = 현재가 x (1 + 심볼별 프리미엄), 펀딩비는 심볼별 고정값"""
+        with self.lock:
+            entries = []
+            for s in ([symbol] if symbol else self.symbols):
+                price = self.price(s)
+                entries.append({
+                    'symbol': s, 'markPrice': f"{price * (1 + self.premiums[s]):.8g}", 'indexPrice': f"{price:.8g}",
+                    'estimatedSettlePrice': f"{price:.8g}", 'lastFundingRate': f"{self.funding_rates[s]:.8f}",
+                    'interestRate': "0.00010000", 'nextFundingTime': self.now_ms() - self.now_ms() % 28_800_000 + 28_800_000,
+                    'time': self.now_ms(),
+                })
+            return entries[0] if symbol else entries
+
+    def open_interest_hist(self, symbol, period, limit=30):
+        """
+        기간마다 결정적으로 변하는 미결제약정 기록. 같은 시각에 다시 요청하면 같은 값을 돌려줍니다.
+        바이낸스와 같이 마지막 값은 가장 최근에 마감된 기간입니다.
+        """
+        if symbol not in self.open_interests:
+            raise KeyError(symbol)
+        period_ms = INTERVAL_MS[period]
+        now = self.now_ms()
+        last = now - now % period_ms - period_ms
+        entries = []
+        for i in range(min(int(limit), 500) - 1, -1, -1):
+            timestamp = last - i * period_ms
+            wave = (zlib.crc32(f"{symbol}{timestamp // period_ms}".encode()) % 2001 - 1000) / 1000
+            value = self.open_interests[symbol] * (1 + 0.05 * math.sin(timestamp / (period_ms * 20)) + 0.01 * wave)
+            entries.append({'symbol': symbol, 'sumOpenInterest': f"{value:.3f}",
+                            'sumOpenInterestValue': f"{value * self.prices[symbol]:.3f}", 'timestamp': timestamp})
+        return entries
+
+    def exchange_info(self):
+        symbols = []
+        for symbol in self.symbols:
+            precision = max(0, min(8, 4 - int(math.floor(math.log10(self.prices[symbol])))))
+            tick_size = f"{10 ** -precision:.{precision}f}" if precision else "1"
+            symbols.append({
+                'symbol': symbol, 'status': 'TRADING', 'contractType': 'PERPETUAL',
+                'baseAsset': symbol[:-4], 'quoteAsset': 'USDT',
+                'filters': [{'filterType': 'PRICE_FILTER', 'tickSize': tick_size}],
+            })
+        return {'timezone': 'UTC', 'serverTime': self.now_ms(), 'symbols': symbols}
+
+class WeightLimiter:
+    """클라이언트 IP별 분당 가중치 사용량 (실제 시간 기준 1분 고정 창)"""
+
+    def __init__(self, limit=2400):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.windows = {} # {ip: (minute, used)}
+
+    def add(self, ip, weight):
+        """사용량을 더하고 (현재 사용량, 한도 초과 여부, 다음 창까지 남은 초)를 반환"""
+        now = time.time()
+        minute = int(now // 60)
+        with self.lock:
+            window_minute, used = self.windows.get(ip, (minute, 0))
+            if window_minute != minute:
+                used = 0
+            used += weight
+            self.windows[ip] = (minute, used)
+        return used, used > self.limit, 60 - now % 60
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self._serve_websocket(url, query)
+            return
+
+        route = self.server.routes.get(url.path)
+        if route is None:
+            self._send_json(404, {'code': -1, 'msg': f'Unknown path {url.path}'})
+            return
+
+        latency = self.server.latency + random.uniform(0, self.server.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+        try:
+            weight, handler = route
+            weight = weight(query) if callable(weight) else weight
+            used, exceeded, retry_after = self.server.limiter.add(self.client_address[0], weight)
+            headers = {'X-MBX-USED-WEIGHT-1M': str(used)}
+            if exceeded:
+                headers['Retry-After'] = str(int(math.ceil(retry_after)))
+                self._send_json(429, {'code': -1003, 'msg': 'Too many requests; current limit is exceeded.'}, headers)
+                return
+            self._send_json(200, handler(self.server.market, query), headers)
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'code': -1100, 'msg': f'Illegal parameter: {e}'})
+
+    # --- 웹소켓 ---
+    def _serve_websocket(self, url, query):
+        if url.path.startswith('/ws/'):
+            streams, combined = url.path[len('/ws/'):].split('/'), False
+        elif url.path == '/stream':
+            streams, combined = query.get('streams', '').split('/'), True
+        else:
+            self.send_error(404)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((self.headers['Sec-WebSocket-Key'] + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.send_response(101, "Switching Protocols")
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.close_connection = True
+
+        market = self.server.market
+        try:
+            while not self.server.stopping.is_set():
+                for stream in streams:
+                    payload = stream_payload(market, stream)
+                    if payload is None:
+                        continue
+                    if combined:
+                        payload = {'stream': stream, 'data': payload}
+                    self._send_frame(0x1, json.dumps(payload, separators=(',', ':')).encode())
+                if not self._handle_client_frames(self.server.stream_interval):
+                    break
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+
+    def _send_frame(self, opcode, data):
+        header = bytes([0x80 | opcode])
+        if len(data) < 126:
+            header += bytes([len(data)])
+        elif len(data) < 65536:
+            header += bytes([126]) + struct.pack('!H', len(data))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(data))
+        self.wfile.write(header + data)
+        self.wfile.flush()
+
+    def _handle_client_frames(self, timeout):
+        """timeout초 동안 클라이언트 프레임을 처리합니다. 연결이 닫히면 False"""
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return True
+            readable, _, _ = select.select([self.connection], [], [], remaining)
+            if not readable:
+                return True
+            head = self.rfile.read(2)
+            if len(head) < 2:
+                return False
+            opcode, length = head[0] & 0x0F, head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self.rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self.rfile.read(8))[0]
+            mask = self.rfile.read(4) if head[1] & 0x80 else b'\0\0\0\0'
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(length)))
+            if opcode == 0x8: # close
+                self._send_frame(0x8, data[:2])
+                return False
+            if opcode == 0x9: # ping
+                self._send_frame(0xA, data)
+
+def stream_payload(market, stream):
+    """'btcusdt@kline_1m' 또는 '!ticker@arr' 스트림의 현재 메시지를 만듭니다."""
+    now = market.now_ms()
+    if stream == '!ticker@arr':
+        return [{'e': '24hrTicker', 'E': now, 's': t['symbol'], 'c': t['lastPrice'], 'o': t['openPrice'],
+                 'p': t['priceChange'], 'P': t['priceChangePercent'], 'q': t['quoteVolume'], 'v': t['volume']}
+                for t in market.tickers()]
+    if '@kline_' in stream:
+        symbol, interval = stream.split('@kline_')
+        symbol = symbol.upper()
+        if symbol not in market.prices or interval not in INTERVAL_MS:
+            return None
+        k = market.klines(symbol, interval, limit=1)[-1]
+        return {'e': 'kline', 'E': now, 's': symbol, 'k': {
+            't': k[0], 'T': k[6], 's': symbol, 'i': interval, 'o': k[1], 'h': k[2], 'l': k[3], 'c': k[4],
+            'v': k[5], 'n': k[8], 'q': k[7], 'x': False}}
+    if stream.endswith('@ticker'):
+        symbol = stream[:-len('@ticker')].upper()
+        if symbol not in market.prices:
+            return None
+        t = market.tickers(symbol)
+        return {'e': '24hrTicker', 'E': now, 's': symbol, 'c': t['lastPrice'], 'P': t['priceChangePercent'], 'q': t['quoteVolume']}
+    return None
+
+def _klines_route(market, q):
+    return market.klines(
+        q['symbol'], q['interval'], int(q.get('limit', 500)),
+        int(q['startTime']) if 'startTime' in q else None,
+        int(q['endTime']) if 'endTime' in q else None,
+    )
+
+# {경로: (가중치 또는 가중치 함수, 처리 함수)}
+ROUTES = {
+    '/api/v3/ping': (1, lambda market, q: {}),
+    '/fapi/v1/ping': (1, lambda market, q: {}),
+    '/fapi/v1/time': (1, lambda market, q: {'serverTime': market.now_ms()}),
+    '/fapi/v1/exchangeInfo': (1, lambda market, q: market.exchange_info()),
+    '/fapi/v1/klines': (lambda q: klines_weight(int(q.get('limit', 500))), _klines_route),
+    '/fapi/v1/ticker/24hr': (lambda q: 1 if 'symbol' in q else 40, lambda market, q: market.tickers(q.get('symbol'))),
+    '/fapi/v1/premiumIndex': (lambda q: 1 if 'symbol' in q else 10, lambda market, q: market.premium_index(q.get('symbol'))),
+    '/futures/data/openInterestHist': (1, lambda market, q: market.open_interest_hist(q['symbol'], q['period'], int(q.get('limit', 30)))),
+}
+
+class MockExchangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, market, latency=0.0, jitter=0.0, weight_limit=2400, stream_interval=1.0, verbose=False):
+        super().__init__(address, MockExchangeHandler)
+        self.market = market
+        self.routes = ROUTES
+        self.latency = latency
+        self.jitter = jitter
+        self.limiter = WeightLimiter(weight_limit)
+        self.stream_interval = stream_interval
+        self.verbose = verbose
+        self.stopping = threading.Event()
+
+    def shutdown(self):
+        self.stopping.set()
+        super().shutdown()
+
+def start_mock_exchange(host='127.0.0.1', port=8765, symbols=2000, time_scale=1.0, latency=0.0, jitter=0.0,
+                        weight_limit=2400, stream_interval=1.0):
+    """백그라운드 스레드에서 대역 서버를 띄우고 서버 객체를 반환합니다. (테스트/벤치마크용)"""
+    server = MockExchangeServer((host, port), MockMarket(symbols, time_scale), latency, jitter, weight_limit, stream_interval)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="로컬 바이낸스 선물 대역 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbols', type=int, default=2000, help="USDT 무기한 심볼 수")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="가상 시계 배속 (60이면 1분봉이 1초마다 닫힘)")
+    parser.add_argument('--latency', type=float, default=0.0, help="요청당 지연 시간(초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 시간에 더할 최대 무작위 값(초)")
+    parser.add_argument('--weight-limit', type=int, default=2400, help="IP당 분당 가중치 한도 (초과 시 429)")
+    parser.add_argument('--stream-interval', type=float, default=1.0, help="웹소켓 메시지 간격(초)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    market = MockMarket(args.symbols, args.time_scale)
+    server = MockExchangeServer((args.host, args.port), market, args.latency, args.jitter,
+                                args.weight_limit, args.stream_interval, args.verbose)
+    print(f"대역 서버 실행 중: http://{args.host}:{args.port} (심볼 {len(market.symbols)}개, {args.time_scale}배속)")
+    print(f"클라이언트 전환: BINANCE_MOCK_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
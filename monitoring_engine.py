@@ -1,14 +1,23 @@
 # monitoring_engine.py
 import time
 import threading
-import pandas as pd
-import pandas_ta as ta
 import math
 import numpy as np
 from binance.exceptions import BinanceAPIException
 
-from binance_client import get_usdt_futures_symbols, get_historical_klines
-from telegram_notifier import send_telegram_message
+from binance_client import (get_usdt_futures_symbols, get_historical_klines, get_klines_range, get_futures_ticker_data,
+                            get_premium_index, get_open_interest_history)
+from telegram_notifier import send_telegram_message, profile_chat_id
+from resampler import plan_fetches, resample_klines, INTERVAL_MS, MAX_KLINES_PER_REQUEST
+from condition_planner import ConditionPlanner
+from proximity_scheduler import ProximityScheduler, trigger_distance
+from trigger_index import TriggerIndex, solve_trigger
+from candles import klines_to_candles, candles_len, tail_candles
+from engine_snapshot import save_snapshot, load_snapshot
+from cache_manager import BufferCache, MB
+from engine_progress import EngineProgress, PHASE_PREPARE, PHASE_CHECK, PHASE_SCREEN, PHASE_ALERT, PHASE_WAIT
+from screen_expr import ExpressionCompiler, ExpressionError, stack_candles, screen, price_fields
+from indicators import sma, ema, rsi, envelope, bbands, macd, stoch, atr, volume_spike
 
 def parse_params(params_str):
     """'length=14, std=2' 같은 문자열을 {'length': 14, 'std': 2} 딕셔너리로 변환"""
@@ -27,13 +36,175 @@ def parse_params(params_str):
             pass
     return params
 
+# 지표 값 하나를 숫자 또는 가격(Open/High/Low/Close)과 비교하는 지표
+VALUE_INDICATORS = ("RSI", "Envelope", "BollingerBands", "MA", "MACD", "Stochastic", "ATR", "VolumeSpike")
+
+COMPARATORS = {
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '==': lambda a, b: a == b,
+}
+
+def compare(lhs, operator, rhs):
+    """'>' 같은 비교 연산자 문자열로 두 값을 비교합니다."""
+    comparator = COMPARATORS.get(operator)
+    return bool(comparator(lhs, rhs)) if comparator else False
+
+def _band_key(detail):
+    """'Upper Band' 같은 세부 항목을 밴드 키('upper')로 변환"""
+    for key in ('upper', 'middle', 'lower'):
+        if key in detail.lower():
+            return key
+    return None
+
+def indicator_lookback(indicator, params):
+    """지표 계산에 필요한 캔들 수 (shift 제외)"""
+    if indicator == "MACD":
+        return max(params.get('fast', 12), params.get('slow', 26)) + params.get('signal', 9)
+    if indicator == "Stochastic":
+        return params.get('k', 14) + params.get('smooth', 3) + params.get('d', 3)
+    if indicator == "MA_Compare":
+        return max(params.get('short ma', 20), params.get('long ma', 60))
+    lookback = 0
+    if 'length' in params: lookback = max(lookback, params.get('length', 0))
+    if 'long ma' in params: lookback = max(lookback, params.get('long ma', 0))
+    return lookback
+
+UNIVERSE_FILTER_KEYS = ("min_volume", "top_n", "min_change", "max_change")
+# 유니버스 필터용 24시간 티커 재조회 주기 (초)
+UNIVERSE_REFRESH_SECONDS = 60
+
+# 조건에 프로필을 지정하지 않으면 기본 프로필 ("")
+DEFAULT_PROFILE = ""
+TELEGRAM_MAX_MESSAGE_LENGTH = 4000
+
+# 실행 중 스냅샷 저장 주기와, 복원할 스냅샷의 최대 나이 (초)
+SNAPSHOT_INTERVAL = 300
+SNAPSHOT_MAX_AGE = 24 * 60 * 60
+
+# 진행 중인 봉을 시세로 갱신할 때 허용하는 현재가의 최대 나이 (초)
+PATCH_PRICE_MAX_AGE = 15
+# 거래량처럼 시세만으로 갱신할 수 없는 값을 쓰는 지표 (항상 캔들을 다시 요청)
+PATCH_UNSAFE_INDICATORS = ("VolumeSpike",)
+
+# 캔들 대신 거래소 파생 데이터로 평가하는 지표. 펀딩비/프리미엄은 전체 심볼을 요청 한 번(premiumIndex)으로 받아 캐시하고,
+# 미결제약정은 전체 심볼 엔드포인트가 없어 심볼마다 요청하므로 플래너가 그룹의 마지막에 평가
+DERIVATIVES_INDICATORS = ("FundingRate", "Premium", "OpenInterest")
+# 펀딩비/프리미엄 재조회 주기와 미결제약정 기록 재사용 시간 (초)
+PREMIUM_REFRESH_SECONDS = 30
+OPEN_INTEREST_REFRESH_SECONDS = 60
+# 미결제약정 이력 캐시 예산 (MB)
+OPEN_INTEREST_CACHE_BUDGET_MB = 16
+
+# 수식 조건 (기준값 칸에 screen_expr 수식). 시간봉마다 모든 심볼을 한 번에 평가
+EXPRESSION_INDICATOR = "Expression"
+# 근접도 모드의 짧은 사이클에서 수식 조건을 다시 평가하는 최소 간격 (초)
+EXPRESSION_INTERVAL = 30
+
+def apply_universe_filter(symbols, tickers_map, filter_params):
+    """
+    24시간 티커 정보로 심볼 목록을 걸러냅니다.
+    min_volume(거래대금, USDT), min_change/max_change(등락률 %)를 먼저 적용한 뒤
+    남은 심볼 중 거래대금 상위 top_n개만 남깁니다. 티커가 없는 심볼은 제외됩니다.
+    """
+    if not filter_params:
+        return list(symbols)
+
+    min_volume = filter_params.get('min_volume')
+    min_change = filter_params.get('min_change')
+    max_change = filter_params.get('max_change')
+    top_n = filter_params.get('top_n')
+
+    passed = []
+    for symbol in symbols:
+        ticker = tickers_map.get(symbol)
+        if not ticker:
+            continue
+        try:
+            volume = float(ticker['quoteVolume'])
+            change = float(ticker['priceChangePercent'])
+        except (KeyError, ValueError):
+            continue
+        if min_volume is not None and volume < min_volume: continue
+        if min_change is not None and change < min_change: continue
+        if max_change is not None and change > max_change: continue
+        passed.append((symbol, volume))
+
+    if top_n is not None:
+        passed.sort(key=lambda x: x[1], reverse=True)
+        passed = passed[:int(top_n)]
+    return [symbol for symbol, _ in passed]
+
 class MonitoringEngine:
     def __init__(self, app):
         self.app = app
         self.is_running = False
         self.thread = None
         self.stop_event = threading.Event()
-        self.last_alert_times = {}
+        # 프로필별 상태 {이름: {'chat_id', 'last_alert_times', 'alert_count'}}. 캔들/지표 데이터는 모든 프로필이 공유
+        self.profiles = {}
+        self.last_alert_times = self._profile_state(DEFAULT_PROFILE)['last_alert_times']
+        # True이면 심볼별로 가장 낮은 시간봉만 요청하고 상위 시간봉은 로컬에서 합성
+        self.use_resampling = False
+        self.planner = ConditionPlanner()
+        # KlineArchive를 지정하면 닫힌 캔들을 디스크에 보관하고 빠진 구간만 요청 (1500개 제한 없음)
+        self.archive = None
+        # True이면 조건 경계값에 가까운 코인일수록 자주 갱신 (먼 코인은 최대 scheduler.max_staleness초 간격)
+        self.use_proximity_scheduling = False
+        self.scheduler = ProximityScheduler()
+        self._tickers_cache = (0, None) # (조회 시각, {symbol: 티커}), 유니버스 필터용
+        self._premium_cache = (0, None) # (조회 시각, {symbol: 펀딩비/마크/인덱스 가격})
+        self._open_interest_cache = BufferCache(OPEN_INTEREST_CACHE_BUDGET_MB * MB) # {(symbol, period): (조회 시각, 미결제약정 배열)}
+        # 진행 중인 봉의 트리거 가격 인덱스. on_ticker()로 들어온 가격을 확인해 봉 중간에 알림
+        self.trigger_index = TriggerIndex()
+        # True이면 봉이 끝나기 전까지는 캔들을 다시 받지 않고 보관 중인 캔들의 마지막 봉을 현재가로 갱신
+        self.use_intrabar_patching = False
+        # 마지막으로 받은 캔들. 다음에는 마지막 봉 이후 구간만 요청해서 이어 붙임
+        # 바이트 예산(candle_buffers.budget_bytes)을 넘으면 오래 평가하지 않은 버퍼부터 내보내고, 코인을 지정한 조건의 버퍼는 고정
+        self.candle_buffers = BufferCache(on_evict=self._on_buffer_evicted) # {(symbol, timeframe): (요청한 limit, candles)}
+        self._fresh_buffers = set() # 이번 실행에서 거래소 데이터로 갱신한 버퍼 (현재가 갱신은 이 버퍼에만)
+        self.last_prices = {} # {symbol: (현재가, 수신 시각)}
+        # EvaluationLog를 지정하면 모든 조건 평가 결과를 백그라운드에서 파일로 기록
+        self.evaluation_log = None
+        # 진행 상황은 공유 카운터에만 기록하고 GUI가 메인 스레드에서 주기적으로 읽어 감
+        self.progress = EngineProgress()
+        # 경로를 지정하면 중지할 때와 실행 중 주기적으로 상태를 저장하고, 시작할 때 복원
+        self.snapshot_path = None
+        self._last_snapshot = 0
+        self._last_conditions = []
+        # 수식 조건 컴파일러. 같은 부분식은 수식이 여러 개여도 노드 하나로 공유
+        self.expressions = ExpressionCompiler()
+        self._last_expression_run = 0
+        self._cycle_loaded = set() # 이번 사이클에 이미 받은 (symbol, timeframe) 버퍼
+
+    def _on_buffer_evicted(self, key):
+        self._fresh_buffers.discard(key)
+        self._cycle_loaded.discard(key)
+
+    def _profile_state(self, profile):
+        state = self.profiles.get(profile)
+        if state is None:
+            state = {'chat_id': profile_chat_id(profile), 'last_alert_times': {}, 'alert_count': 0}
+            self.profiles[profile] = state
+        return state
+
+    def _send_alerts(self, profile, lines, title="조건 만족 코인 알림"):
+        """프로필의 채팅방으로 알림 목록을 텔레그램 메시지 길이 제한에 맞춰 나눠 보냅니다."""
+        state = self._profile_state(profile)
+        state['alert_count'] += len(lines)
+        message_header = f"[{title} - {profile}]\n---\n" if profile else f"[{title}]\n---\n"
+        current_message_part = message_header
+
+        for line in lines:
+            if len(current_message_part) + len(line) + 2 > TELEGRAM_MAX_MESSAGE_LENGTH:
+                send_telegram_message(current_message_part, chat_id=state['chat_id'])
+                current_message_part = message_header
+            current_message_part += line + "\n\n"
+
+        if current_message_part != message_header:
+            send_telegram_message(current_message_part, chat_id=state['chat_id'])
 
     def start(self):
         if self.is_running:
@@ -41,6 +212,10 @@ class MonitoringEngine:
             return
         
         self.stop_event.clear()
+        self._fresh_buffers = set()
+        if self.snapshot_path:
+            self.restore_snapshot()
+            self._last_snapshot = time.time()
         self.is_running = True
         self.thread = threading.Thread(target=self.run, daemon=True)
         self.thread.start()
@@ -56,149 +231,706 @@ class MonitoringEngine:
         if self.thread and self.thread.is_alive():
             self.thread.join()
         
+        self.trigger_index = TriggerIndex()
+        if self.snapshot_path:
+            self.save_snapshot()
+        for profile, state in self.profiles.items():
+            if state['alert_count']:
+                self.app.log(f"프로필 '{profile or '기본'}': 알림 {state['alert_count']}건")
+        if self.evaluation_log is not None:
+            self.evaluation_log.close()
+            stats = self.evaluation_log.get_stats()
+            self.app.log(f"평가 기록: {stats['written']}건 저장, {stats['dropped']}건 누락, 파일 {stats['files']}개")
+        self.app.log(f"캔들 버퍼 캐시: {self.candle_buffers.describe()}")
         self.app.log("모니터링을 중지합니다.")
-        self.app.reset_progress()
+        self.progress.reset()
+
+    def save_snapshot(self):
+        """캔들 버퍼와 알림 쿨다운, 플래너 통계, 갱신 일정을 snapshot_path에 저장합니다."""
+        state = {
+            'conditions': [[str(v) for v in cond] for cond in self._last_conditions],
+            'last_alert_times': {profile: dict(s['last_alert_times']) for profile, s in self.profiles.items()},
+            'planner_stats': self.planner.stats,
+            'scheduler_next_due': self.scheduler.next_due,
+            'scheduler_distances': self.scheduler.distances,
+        }
+        try:
+            count = save_snapshot(self.snapshot_path, self.candle_buffers.copy(), state)
+            self._last_snapshot = time.time()
+            self.app.log(f"엔진 스냅샷 저장: 캔들 버퍼 {count}개")
+        except Exception as e:
+            self.app.log(f"엔진 스냅샷 저장 오류: {e}")
+
+    def restore_snapshot(self):
+        """
+        저장된 스냅샷으로 캔들 버퍼와 상태를 되살립니다. 복원한 버퍼는 다음 사이클에서
+        마지막 봉 이후 구간만 요청해서 이어 붙이므로 첫 사이클부터 전체 구간을 다시 받지 않습니다.
+        """
+        loaded = load_snapshot(self.snapshot_path)
+        if loaded is None:
+            return
+        buffers, state = loaded
+        age = time.time() - state['saved_at']
+        if age > SNAPSHOT_MAX_AGE:
+            self.app.log(f"엔진 스냅샷이 너무 오래되어({age / 3600:.1f}시간) 사용하지 않습니다.")
+            return
+        for key, buffered in buffers.items():
+            self.candle_buffers.setdefault(key, buffered)
+        for profile, times in state.get('last_alert_times', {}).items():
+            last_alert_times = self._profile_state(profile)['last_alert_times']
+            for alert_key, alerted_at in times.items():
+                last_alert_times[alert_key] = max(last_alert_times.get(alert_key, 0), alerted_at)
+        for cond_key, stat in state.get('planner_stats', {}).items():
+            self.planner.stats.setdefault(cond_key, stat)
+        self.scheduler.next_due.update(state.get('scheduler_next_due', {}))
+        self.scheduler.distances.update(state.get('scheduler_distances', {}))
+        self.app.log(f"엔진 스냅샷 복원: 캔들 버퍼 {len(buffers)}개, 저장 후 {age / 60:.0f}분 경과")
+
+    def on_ticker(self, tickers):
+        """
+        시세 피드(GUI가 이미 받는 24시간 티커 목록)의 현재가를 트리거 가격 인덱스와 비교합니다.
+        트리거를 넘어선 조건은 캔들 재요청이나 지표 재계산 없이 바로 알림을 보냅니다.
+        현재가는 진행 중인 봉 갱신(use_intrabar_patching)에도 쓰이도록 보관합니다.
+        """
+        if not self.is_running or not tickers:
+            return
+        now = time.time()
+        alert_messages = {} # {profile: [메시지]}
+        for ticker in tickers:
+            try:
+                symbol = ticker['symbol']
+                price = float(ticker['lastPrice'])
+            except (KeyError, ValueError, TypeError):
+                continue
+            self.last_prices[symbol] = (price, now)
+            if not len(self.trigger_index):
+                continue
+            for entry in self.trigger_index.check(symbol, price, now):
+                cond = entry['cond']
+                last_alert_times = self._profile_state(cond['profile'])['last_alert_times']
+                if now - last_alert_times.get(entry['alert_key'], 0) < 300:
+                    continue
+                last_alert_times[entry['alert_key']] = now
+                display_str = f"{cond['indicator']} {cond['detail']} {cond['operator']} {cond['value_str']} (트리거 {entry['price']:.4f}, 현재가 {price})"
+                self.app.log(f"[조건 만족-실시간]{self._profile_label(cond['profile'])} {symbol} ({cond['timeframe']}, 진행 중인 봉) - {display_str}")
+                alert_messages.setdefault(cond['profile'], []).append(f"- {symbol} ({cond['timeframe']}, 진행 중인 봉): {display_str}")
+
+        for profile, lines in alert_messages.items():
+            self._send_alerts(profile, lines, title="조건 만족 코인 알림-실시간")
+
+    @staticmethod
+    def _profile_label(profile):
+        return f"[{profile}]" if profile else ""
 
     def run(self):
         """메인 모니터링 루프"""
         all_symbols = get_usdt_futures_symbols()
         
         while self.is_running:
-            final_alert_messages = []
+            final_alert_messages = [] # [(profile, 메시지)]
             now = time.time()
+            self._cycle_loaded.clear()
             try:
-                conditions = self.app.get_conditions()
+                # 조건 값은 알림 쿨다운, 평가 기록 ID, 플래너 통계의 키가 되므로 튜플로 통일
+                # (스레드 모드는 Tk 트리의 튜플, 프로세스 모드는 큐로 받은 리스트)
+                conditions = [tuple(cond_values) for cond_values in self.app.get_conditions()]
+                self._last_conditions = conditions
                 if not conditions:
                     self.app.log("감시할 조건이 없습니다. 30초 후에 다시 확인합니다.")
-                    self.app.reset_progress()
+                    self.progress.set_phase(PHASE_WAIT, wait_seconds=30)
                     if self.stop_event.wait(timeout=30): break
                     continue
 
-                # 1. 조건들을 (코인, 시간봉) 기준으로 재구성
-                tasks = {}
+                self.progress.set_phase(PHASE_PREPARE)
+
+                # 1. 유니버스 필터 준비 (티커는 UNIVERSE_REFRESH_SECONDS마다 한 번만 조회)
+                tickers_map = None
+                tickers_loaded = False
+                universe_cache = {} # {유니버스 문자열: 심볼 집합 또는 None(티커가 없어 거르지 않음)}
+
+                # 2. 조건들을 코인별, 시간봉별로 재구성
+                tasks = {} # {symbol: {timeframe: [cond, ...]}}
+                pinned = set() # 코인을 지정한 조건의 (symbol, timeframe) 버퍼는 캐시 예산을 넘어도 유지
+                expression_tasks = {} # {timeframe: [(cond, symbols), ...]}, 심볼별 평가 대신 시간봉별로 일괄 평가
+                grouped = {} # {(profile, group): [(cond, symbols), ...]}, 그룹은 모든 조건의 대상 심볼에 든 코인만 평가
                 for cond_values in conditions:
-                    group, shift, timeframe, coin, indicator, params_str, detail, operator, value_str = cond_values
-                    
+                    group, shift, timeframe, coin, indicator, params_str, detail, operator, value_str = cond_values[:9]
+                    universe_str = cond_values[9] if len(cond_values) > 9 else ""
+                    profile = str(cond_values[10]) if len(cond_values) > 10 else DEFAULT_PROFILE
+
                     symbols_for_cond = all_symbols if coin == "All Coins" else [coin]
+                    if coin != "All Coins":
+                        pinned.add((coin, timeframe))
+
+                    if universe_str:
+                        if universe_str not in universe_cache:
+                            if not tickers_loaded:
+                                tickers_loaded = True
+                                tickers_map = self._get_tickers_map(now)
+                            if tickers_map is None:
+                                universe_cache[universe_str] = None
+                            else:
+                                universe_cache[universe_str] = set(apply_universe_filter(all_symbols, tickers_map, parse_params(universe_str)))
+                        universe = universe_cache[universe_str]
+                        if universe is not None:
+                            symbols_for_cond = [s for s in symbols_for_cond if s in universe]
                     
+                    cond = {
+                        'group': group, 'shift': int(shift), 'timeframe': timeframe, 'indicator': indicator, 
+                        'params_str': params_str, 'detail': detail, 'operator': operator, 
+                        'value_str': value_str, 'profile': profile, 'original_cond_values': cond_values
+                    }
+                    if indicator == EXPRESSION_INDICATOR:
+                        try:
+                            self.expressions.compile(value_str)
+                        except ExpressionError as e:
+                            self.app.log(f"수식 오류로 조건을 건너뜁니다 ({value_str}): {e}")
+                            continue
+                        expression_tasks.setdefault(timeframe, []).append((cond, symbols_for_cond))
+                        continue
+
+                    if group:
+                        grouped.setdefault((profile, group), []).append((cond, symbols_for_cond))
+                        continue
                     for symbol in symbols_for_cond:
-                        task_key = (symbol, timeframe)
-                        if task_key not in tasks:
-                            tasks[task_key] = []
-                        
-                        tasks[task_key].append({
-                            'group': group, 'shift': int(shift), 'indicator': indicator, 
-                            'params_str': params_str, 'detail': detail, 'operator': operator, 
-                            'value_str': value_str, 'original_cond_values': cond_values
-                        })
-
-                # 2. 작업 목록 순회
-                total_count = len(tasks)
-                self.app.update_progress(0, total_count)
+                        tasks.setdefault(symbol, {}).setdefault(timeframe, []).append(dict(cond))
+
+                # 한 조건의 유니버스 필터(또는 코인 지정)에서 빠진 심볼은 그룹의 나머지 조건만으로 알림이 나가지 않도록 그룹 전체에서 제외
+                for members in grouped.values():
+                    group_symbols = set(members[0][1]).intersection(*(symbols for _, symbols in members[1:]))
+                    for cond, symbols_for_cond in members:
+                        for symbol in symbols_for_cond:
+                            if symbol in group_symbols:
+                                tasks.setdefault(symbol, {}).setdefault(cond['timeframe'], []).append(dict(cond))
+
+                self.candle_buffers.pin(pinned)
+
+                # 3. 코인별로 실행 계획에 따라 평가 (근접도 모드에서는 평가 시각이 된 코인만, 가까운 순서로)
+                if self.use_proximity_scheduling:
+                    self.scheduler.prune(tasks)
+                    symbols_to_check = self.scheduler.due_symbols(tasks, now)
+                else:
+                    symbols_to_check = list(tasks)
+                self.progress.set_phase(PHASE_CHECK, total=len(symbols_to_check))
                 checked_count = 0
                 
-                for (symbol, timeframe), cond_list in tasks.items():
+                for symbol in symbols_to_check:
                     if not self.is_running: break
                     checked_count += 1
-                    self.app.update_progress(checked_count, total_count)
                     if checked_count % 50 == 0: time.sleep(0.5)
 
-                    # 2.1. 데이터 가져오기 및 지표 계산
-                    df = self._get_data_and_indicators(symbol, timeframe, cond_list)
-                    if df is None or df.empty:
-                        continue
+                    final_alert_messages.extend(self._evaluate_symbol(symbol, tasks[symbol], now))
+                    self.progress.advance()
 
-                    # 2.2. 조건 평가
-                    group_results = {}
-                    for cond in cond_list:
-                        if not self.is_running: break
-                        
-                        alert_key = f"{symbol}|{cond['original_cond_values']}"
-                        if now - self.last_alert_times.get(alert_key, 0) < 300:
-                            continue
-
-                        is_met, display_str = self._evaluate_condition(df, cond)
-
-                        if is_met:
-                            self.app.log(f"[조건 만족] {symbol} ({timeframe}, {cond['shift']}봉 전) - {display_str}")
-                        
-                        if cond['group']:
-                            group_name = cond['group']
-                            if group_name not in group_results:
-                                group_results[group_name] = {'met_all': True, 'details': []}
-                            
-                            group_results[group_name]['details'].append(f"  - ({timeframe}, {cond['shift']}봉 전) {display_str}")
-                            if not is_met:
-                                group_results[group_name]['met_all'] = False
-                        elif is_met:
-                            final_alert_messages.append(f"- {symbol} ({timeframe}, {cond['shift']}봉 전): {display_str}")
-                            self.last_alert_times[alert_key] = now
-                
-                    # 2.3. 그룹 조건 최종 판정
-                    for group_name, result in group_results.items():
-                        group_alert_key = f"{symbol}|{group_name}"
-                        if now - self.last_alert_times.get(group_alert_key, 0) < 300: continue
-                        
-                        if result['met_all']:
-                            alert_message = f"그룹 '{group_name}' 조건 동시 만족!\n- {symbol}\n" + "\n".join(result['details'])
-                            final_alert_messages.append(alert_message)
-                            self.last_alert_times[group_alert_key] = now
+                if expression_tasks and (not self.use_proximity_scheduling or now - self._last_expression_run >= EXPRESSION_INTERVAL):
+                    self._last_expression_run = now
+                    final_alert_messages.extend(self._evaluate_expressions(expression_tasks, now))
 
                 if not self.is_running: break
                 
                 if final_alert_messages:
-                    TELEGRAM_MAX_MESSAGE_LENGTH = 4000
-                    message_header = f"[조건 만족 코인 알림]\n---\n"
-                    current_message_part = message_header
-                    
-                    for line in final_alert_messages:
-                        if len(current_message_part) + len(line) + 2 > TELEGRAM_MAX_MESSAGE_LENGTH:
-                            send_telegram_message(current_message_part)
-                            current_message_part = message_header
-                        current_message_part += line + "\n\n"
-                    
-                    if current_message_part != message_header:
-                        send_telegram_message(current_message_part)
+                    # 프로필마다 자기 채팅방으로 전송
+                    self.progress.set_phase(PHASE_ALERT, total=len(final_alert_messages))
+                    by_profile = {}
+                    for profile, line in final_alert_messages:
+                        by_profile.setdefault(profile, []).append(line)
+                    for profile, lines in by_profile.items():
+                        self._send_alerts(profile, lines)
                     
                     self.app.log(f"이번 사이클에서 {len(final_alert_messages)}개 알림 발생. 텔레그램 전송 완료.")
-                else:
+                elif not self.use_proximity_scheduling:
                     self.app.log("이번 사이클에서 조건을 만족하는 코인이 없습니다.")
 
-                self.app.log(f"모든 조건 확인 완료. 다음 확인까지 30초 대기...")
-                self.app.reset_progress()
-                if self.stop_event.wait(timeout=30): break
+                if self.use_proximity_scheduling:
+                    # 가장 먼저 평가 시각이 되는 코인까지 대기 (몇 초마다 도는 짧은 사이클이므로 로그는 생략)
+                    wait_seconds = self.scheduler.seconds_until_next(tasks, time.time())
+                else:
+                    wait_seconds = 30
+                    self.app.log(f"모든 조건 확인 완료. 다음 확인까지 30초 대기...")
+                if self.snapshot_path and time.time() - self._last_snapshot >= SNAPSHOT_INTERVAL:
+                    self.save_snapshot()
+                self.progress.set_phase(PHASE_WAIT, wait_seconds=wait_seconds)
+                if self.stop_event.wait(timeout=wait_seconds): break
 
             except Exception as e:
                 import traceback
                 self.app.log(f"모니터링 루프 오류: {traceback.format_exc()}")
-                self.app.reset_progress()
+                self.progress.set_phase(PHASE_WAIT, wait_seconds=60)
                 if self.stop_event.wait(timeout=60): break
 
-    def _get_data_and_indicators(self, symbol, timeframe, cond_list):
+    def _get_tickers_map(self, now):
+        """
+        유니버스 필터용 24시간 티커. 짧은 사이클에서도 UNIVERSE_REFRESH_SECONDS마다 한 번만 조회합니다.
+        조회에 실패하면 마지막으로 받은 티커를 다시 쓰고(다음 사이클에 재조회), 그것도 없으면 None
+        """
+        fetched_at, tickers_map = self._tickers_cache
+        if tickers_map is None or now - fetched_at >= UNIVERSE_REFRESH_SECONDS:
+            fresh_map = {t['symbol']: t for t in get_futures_ticker_data()}
+            if not fresh_map:
+                # 빈 티커로 거르면 모든 심볼이 빠지므로 저장하지 않음
+                if tickers_map is None:
+                    self.app.log("유니버스 필터용 티커 조회에 실패했습니다. 이번 사이클은 유니버스 필터 없이 확인합니다.")
+                else:
+                    self.app.log(f"유니버스 필터용 티커 조회에 실패했습니다. {now - fetched_at:.0f}초 전 티커를 사용합니다.")
+                return tickers_map
+            tickers_map = fresh_map
+            self._tickers_cache = (now, tickers_map)
+            for symbol, ticker in tickers_map.items():
+                try:
+                    self.last_prices[symbol] = (float(ticker['lastPrice']), now)
+                except (KeyError, ValueError, TypeError):
+                    pass
+        return tickers_map
+
+    def _get_premium_map(self, now):
+        """펀딩비/프리미엄 조건용. 전체 심볼 premiumIndex를 PREMIUM_REFRESH_SECONDS마다 한 번만 조회합니다."""
+        fetched_at, premium_map = self._premium_cache
+        if premium_map is None or now - fetched_at >= PREMIUM_REFRESH_SECONDS:
+            premium_map = get_premium_index()
+            self._premium_cache = (now, premium_map)
+        return premium_map
+
+    def _get_open_interest(self, symbol, period, needed, now):
+        """미결제약정 기록을 OPEN_INTEREST_REFRESH_SECONDS 동안 재사용합니다. 더 긴 기록이 필요하면 다시 요청"""
+        cached = self._open_interest_cache.get((symbol, period))
+        if cached is not None and now - cached[0] < OPEN_INTEREST_REFRESH_SECONDS and len(cached[1]) >= needed:
+            return cached[1]
+        history = get_open_interest_history(symbol, period, limit=max(needed, 30))
+        if history is not None:
+            self._open_interest_cache[(symbol, period)] = (now, history)
+        return history
+
+    def _evaluate_derivatives_condition(self, symbol, cond, now):
+        """펀딩비(%), 프리미엄(%), 미결제약정 변화율(%) 조건. 반환값은 _evaluate_condition과 같습니다."""
+        indicator = cond['indicator']
+        operator = cond['operator']
+        shift = cond['shift']
+        try:
+            rhs_val = float(cond['value_str'])
+        except ValueError:
+            return False, "", None, None
+
+        if indicator in ("FundingRate", "Premium"):
+            entry = self._get_premium_map(now).get(symbol)
+            if entry is None or shift != 0:
+                return False, "", None, None # 현재 값만 있음
+            if indicator == "FundingRate":
+                lhs_val = entry['funding_rate'] * 100
+                label = "펀딩비"
+            else:
+                if entry['index_price'] <= 0:
+                    return False, "", None, None
+                lhs_val = (entry['mark_price'] - entry['index_price']) / entry['index_price'] * 100
+                label = "프리미엄"
+        elif indicator == "OpenInterest":
+            length = parse_params(cond['params_str']).get('length', 12)
+            needed = length + shift + 1
+            history = self._get_open_interest(symbol, cond['timeframe'], needed, now)
+            if history is None or len(history) < needed:
+                return False, "", None, None
+            current, past = history[-1 - shift], history[-1 - shift - length]
+            if past <= 0:
+                return False, "", None, None
+            lhs_val = (current - past) / past * 100
+            label = f"미결제약정 {length}봉 변화"
+        else:
+            return False, "", None, None
+
+        return compare(lhs_val, operator, rhs_val), f"{label}({lhs_val:.4f}%) {operator} {rhs_val}%", lhs_val, rhs_val
+
+    def _evaluate_symbol(self, symbol, symbol_tasks, now):
+        """
+        한 코인의 조건들을 플래너가 정한 순서로 평가하고 [(profile, 알림 메시지)] 목록을 반환합니다.
+        캔들 데이터는 필요해지는 시점에 시간봉별로 한 번만 가져오며,
+        그룹 조건은 하나라도 불만족이면 나머지 조건(과 그 데이터 요청)을 건너뜁니다.
+        평가한 조건 중 만족까지 가장 가까운 거리로 다음 평가 시각을 정합니다.
+        """
+        alert_messages = []
+        nearest = None # 이번 평가에서 가장 가까운 조건의 거리
+        frames = {} # {timeframe: candles 또는 None}
+        indicator_caches = {} # {timeframe: {지표 키: 계산 결과}}, 같은 지표는 조건이 여러 개여도 한 번만 계산
+        resampled_klines = {} # 합성 모드에서 미리 받아 둔 {(symbol, timeframe): klines}
+        resampled = False
+
+        def is_cached(timeframe):
+            return timeframe in frames or (symbol, timeframe) in resampled_klines or self._can_patch(symbol, timeframe, symbol_tasks[timeframe])
+
+        def get_frame(timeframe):
+            nonlocal resampled
+            if timeframe not in frames:
+                klines = None
+                if self.use_resampling and not self._can_patch(symbol, timeframe, symbol_tasks[timeframe]):
+                    if not resampled:
+                        resampled = True
+                        resampled_klines.update(self._fetch_resampled_klines(symbol, symbol_tasks))
+                    klines = resampled_klines.pop((symbol, timeframe), None)
+                frames[timeframe] = self._load_candles(symbol, timeframe, symbol_tasks[timeframe], klines)
+                indicator_caches[timeframe] = {}
+            return frames[timeframe]
+
+        for group_name, conds in self.planner.plan_units(symbol_tasks, is_cached):
+            if not self.is_running: break
+
+            profile = conds[0]['profile']
+            last_alert_times = self._profile_state(profile)['last_alert_times']
+            alert_key = f"{symbol}|{group_name}" if group_name else f"{symbol}|{conds[0]['original_cond_values']}"
+            if now - last_alert_times.get(alert_key, 0) < 300:
+                continue
+
+            remaining = list(conds)
+            details = []
+            met_all = True
+            while remaining:
+                cond = self.planner.pop_next(remaining, is_cached)
+                started = time.time()
+                if cond['indicator'] in DERIVATIVES_INDICATORS:
+                    candles = None # 캔들 없이 캐시된 파생 데이터로 평가
+                    is_met, display_str, lhs_val, rhs_val = self._evaluate_derivatives_condition(symbol, cond, now)
+                else:
+                    candles = get_frame(cond['timeframe'])
+                    if candles is None:
+                        is_met, display_str, lhs_val, rhs_val = False, "", None, None
+                    else:
+                        is_met, display_str, lhs_val, rhs_val = self._evaluate_condition(candles, cond, indicator_caches[cond['timeframe']])
+                self.planner.record(cond, is_met)
+                if self.evaluation_log is not None:
+                    self.evaluation_log.record(symbol, cond['timeframe'], cond['original_cond_values'], cond['indicator'],
+                                               lhs_val, rhs_val, is_met, time.time() - started)
+
+                if group_name is None and candles is not None:
+                    self._index_trigger(symbol, cond, candles, alert_key, is_met)
+
+                if not is_met:
+                    met_all = False
+                    # 그룹은 처음 불만족한 조건의 거리를 그룹 전체의 거리로 봅니다.
+                    price = float(candles['close'][-1]) if candles is not None else None
+                    distance = trigger_distance(cond, lhs_val, rhs_val, price)
+                    if distance is not None and (nearest is None or distance < nearest):
+                        nearest = distance
+                    break # AND 조건이므로 나머지는 평가할 필요 없음
+
+                self.app.log(f"[조건 만족]{self._profile_label(profile)} {symbol} ({cond['timeframe']}, {cond['shift']}봉 전) - {display_str}")
+                details.append((cond['timeframe'], cond['shift'], display_str))
+
+            if not met_all:
+                continue
+
+            nearest = 0.0
+            if group_name:
+                alert_message = f"그룹 '{group_name}' 조건 동시 만족!\n- {symbol}\n" + "\n".join(
+                    f"  - ({timeframe}, {shift}봉 전) {display_str}" for timeframe, shift, display_str in details)
+            else:
+                timeframe, shift, display_str = details[0]
+                alert_message = f"- {symbol} ({timeframe}, {shift}봉 전): {display_str}"
+            alert_messages.append((profile, alert_message))
+            last_alert_times[alert_key] = now
+
+        self.scheduler.reschedule(symbol, now, nearest)
+        return alert_messages
+
+    def _evaluate_expressions(self, expression_tasks, now):
+        """
+        수식 조건을 시간봉마다 모든 심볼의 캔들을 (심볼 x 봉) 배열로 쌓아 한 번에 평가하고 [(profile, 알림 메시지)]를 반환합니다.
+        같은 시간봉의 수식들은 공통 부분식(예: 여러 수식에 나오는 rsi(14))을 한 번만 계산합니다.
+        """
+        alert_messages = []
+        for timeframe, entries in expression_tasks.items():
+            cond_list = [cond for cond, _ in entries]
+            symbols = sorted(set(symbol for _, cond_symbols in entries for symbol in cond_symbols))
+            self.progress.set_phase(PHASE_SCREEN, total=len(symbols))
+            candles_by_symbol = {}
+            for i, symbol in enumerate(symbols):
+                if not self.is_running: return alert_messages
+                if i and i % 50 == 0: time.sleep(0.5)
+                try:
+                    candles = self._load_candles(symbol, timeframe, cond_list)
+                except BinanceAPIException as e:
+                    self.app.log(f"{symbol} ({timeframe}) 캔들 조회 실패: {e}")
+                    candles = None
+                if candles is not None:
+                    candles_by_symbol[symbol] = candles
+                self.progress.advance()
+
+            started = time.time()
+            stacked_symbols, data = stack_candles(candles_by_symbol)
+            if not stacked_symbols:
+                continue
+            try:
+                masks = screen([self.expressions.compile(cond['value_str']) for cond in cond_list], data,
+                               [cond['shift'] for cond in cond_list])
+            except Exception as e:
+                self.app.log(f"수식 평가 오류 ({timeframe}): {e}")
+                continue
+            latency = (time.time() - started) / (len(stacked_symbols) * len(cond_list))
+            rows = {symbol: row for row, symbol in enumerate(stacked_symbols)}
+
+            for (cond, cond_symbols), mask in zip(entries, masks):
+                profile = cond['profile']
+                last_alert_times = self._profile_state(profile)['last_alert_times']
+                display_str = f"수식 [{cond['value_str']}]"
+                for symbol in cond_symbols:
+                    row = rows.get(symbol)
+                    if row is None:
+                        continue
+                    is_met = bool(mask[row])
+                    if self.evaluation_log is not None:
+                        self.evaluation_log.record(symbol, timeframe, cond['original_cond_values'], EXPRESSION_INDICATOR,
+                                                   None, None, is_met, latency)
+                    alert_key = f"{symbol}|{cond['original_cond_values']}"
+                    if not is_met or now - last_alert_times.get(alert_key, 0) < 300:
+                        continue
+                    self.app.log(f"[조건 만족]{self._profile_label(profile)} {symbol} ({timeframe}, {cond['shift']}봉 전) - {display_str}")
+                    alert_messages.append((profile, f"- {symbol} ({timeframe}, {cond['shift']}봉 전): {display_str}"))
+                    last_alert_times[alert_key] = now
+        return alert_messages
+
+    def _load_candles(self, symbol, timeframe, cond_list, klines=None):
+        """
+        조건 목록에 필요한 캔들을 반환하고 버퍼에 보관합니다. 데이터가 부족하면 None
+        이번 사이클에 이미 받은 버퍼가 충분히 길면 다시 요청하지 않으며, 가능하면 진행 중인 봉만 현재가로 갱신합니다.
+        """
+        key = (symbol, timeframe)
+        buffered = self.candle_buffers.get(key)
+        if key in self._cycle_loaded and buffered is not None and buffered[0] >= self._required_length(cond_list)[1]:
+            return buffered[1]
+        if klines is None and self._can_patch(symbol, timeframe, cond_list):
+            candles = self._patch_open_candle(symbol, timeframe)
+        else:
+            candles = self._get_data_and_indicators(symbol, timeframe, cond_list, klines)
+            if candles is None:
+                return None
+            self.candle_buffers[key] = (self._required_length(cond_list)[1], candles)
+            self._fresh_buffers.add(key)
+        self._cycle_loaded.add(key)
+        return candles
+
+    def _index_trigger(self, symbol, cond, candles, alert_key, is_met):
+        """단독 조건의 진행 중인 봉 트리거 가격을 인덱스에 등록합니다. 이미 만족했거나 풀 수 없으면 지웁니다."""
+        cond_key = str(cond['original_cond_values'])
+        expires_at = float(candles['close_time'][-1]) / 1000.0
+        trigger = None
+        if not is_met and expires_at > time.time():
+            try:
+                trigger = solve_trigger(candles, cond, parse_params(cond['params_str']))
+            except Exception as e:
+                self.app.log(f"트리거 가격 계산 오류 ({symbol}): {e}")
+        self.trigger_index.update(symbol, cond_key, trigger, alert_key=alert_key, cond=cond, expires_at=expires_at)
+
+    def _can_patch(self, symbol, timeframe, cond_list):
+        """보관 중인 캔들의 진행 중인 봉을 현재가로 갱신해서 쓸 수 있는지 (캔들 재요청이 필요 없는지) 여부"""
+        if not self.use_intrabar_patching:
+            return False
+        buffered = self.candle_buffers.get((symbol, timeframe))
+        if buffered is None or (symbol, timeframe) not in self._fresh_buffers:
+            return False # 스냅샷에서 복원한 버퍼는 중지된 동안의 고가/저가를 모르므로 한 번은 요청
+        limit, candles = buffered
+        if limit < self._required_length(cond_list)[1]:
+            return False # 조건이 바뀌어 더 긴 캔들이 필요
+        if any(cond['indicator'] in PATCH_UNSAFE_INDICATORS for cond in cond_list):
+            return False
+        if any(cond['indicator'] == EXPRESSION_INDICATOR and 'volume' in price_fields(self.expressions.compile(cond['value_str']))
+               for cond in cond_list):
+            return False
+        now = time.time()
+        if candles['close_time'][-1] < now * 1000:
+            return False # 봉이 마감되어 새 캔들을 받아야 함
+        latest = self.last_prices.get(symbol)
+        return latest is not None and now - latest[1] <= PATCH_PRICE_MAX_AGE
+
+    def _patch_open_candle(self, symbol, timeframe):
+        """
+        보관 중인 캔들의 마지막(진행 중인) 봉 종가/고가/저가를 최근 현재가로 갱신해서 반환합니다.
+        고가/저가는 관측한 현재가로만 넓어지므로 시세 조회 사이의 순간적인 고점/저점은 놓칠 수 있습니다.
+        """
+        _, candles = self.candle_buffers[(symbol, timeframe)]
+        price = self.last_prices[symbol][0]
+        candles['close'][-1] = price
+        candles['high'][-1] = max(candles['high'][-1], price)
+        candles['low'][-1] = min(candles['low'][-1], price)
+        return candles
+
+    def _required_length(self, cond_list):
+        """조건 목록에 필요한 최소 캔들 수와 요청할 캔들 수(limit)를 반환"""
         max_len = 0
         for cond in cond_list:
-            params = parse_params(cond['params_str'])
-            # 모든 기간 관련 파라미터를 확인하여 최대값 계산
-            cond_max_len = 0
-            if 'length' in params: cond_max_len = max(cond_max_len, params.get('length', 0))
-            if 'long ma' in params: cond_max_len = max(cond_max_len, params.get('long ma', 0))
-            
-            max_len = max(max_len, cond_max_len + cond['shift'])
-
-        limit = min(max_len + 50, 1500)
+            if cond['indicator'] == EXPRESSION_INDICATOR:
+                lookback = self.expressions.compile(cond['value_str']).lookback
+            elif cond['indicator'] in DERIVATIVES_INDICATORS:
+                continue # 캔들을 쓰지 않음
+            else:
+                lookback = indicator_lookback(cond['indicator'], parse_params(cond['params_str']))
+            max_len = max(max_len, lookback + cond['shift'])
+
+        limit = max_len + 50
+        if self.archive is None:
+            limit = min(limit, MAX_KLINES_PER_REQUEST)
         if limit < 50: limit = 50
+        return max_len, limit
+
+    def _fetch_resampled_klines(self, symbol, symbol_tasks):
+        """
+        한 심볼의 모든 시간봉에 필요한 캔들을 가장 낮은 시간봉 요청으로 받아 합성합니다.
+        반환값: {(symbol, timeframe): klines}. 직접 요청해야 하는 시간봉은 포함되지 않습니다.
+        """
+        requirements = {tf: self._required_length(cond_list)[1] for tf, cond_list in symbol_tasks.items()}
+        fetch_limits, sources = plan_fetches(requirements)
+
+        result = {}
+        for base, limit in fetch_limits.items():
+            derived = [tf for tf, source in sources.items() if source == base and tf != base]
+            if not derived:
+                continue # 합성할 상위 시간봉이 없으면 평소처럼 직접 요청
+            base_klines = get_historical_klines(symbol, base, limit=limit)
+            if not base_klines:
+                continue
+            if base in requirements:
+                result[(symbol, base)] = base_klines
+            for tf in derived:
+                result[(symbol, tf)] = resample_klines(base_klines, base, tf)
+        return result
+
+    def _get_data_and_indicators(self, symbol, timeframe, cond_list, klines=None):
+        """캔들 데이터를 {컬럼: numpy 배열} 형태로 반환합니다. 데이터가 부족하면 None"""
+        max_len, limit = self._required_length(cond_list)
 
-        klines = get_historical_klines(symbol, timeframe, limit=limit)
+        if klines is not None:
+            klines = klines[-limit:]
+        elif self.archive is not None and timeframe in INTERVAL_MS:
+            candles = self._get_archived_candles(symbol, timeframe, limit)
+            if candles is None or candles_len(candles) < max_len + 5:
+                return None
+            return candles
+        else:
+            candles = self._fetch_gap(symbol, timeframe, limit)
+            if candles is not None:
+                return candles if candles_len(candles) >= max_len + 5 else None
+            klines = get_historical_klines(symbol, timeframe, limit=limit)
         if not klines or len(klines) < max_len + 5:
             return None
 
-        df = pd.DataFrame(klines, columns=['open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'])
-        for col in ['close', 'high', 'low', 'open']:
-            df[col] = pd.to_numeric(df[col])
-        return df
+        return klines_to_candles(klines)
+
+    def _fetch_gap(self, symbol, timeframe, limit):
+        """
+        버퍼에 있는 캔들에 마지막 봉(당시 진행 중이던 봉)부터 지금까지만 요청해서 이어 붙입니다.
+        버퍼가 없거나 짧거나, 빠진 구간이 전체를 다시 받는 것과 비슷하면 None (전체 요청)
+        """
+        buffered = self.candle_buffers.get((symbol, timeframe))
+        if buffered is None or timeframe not in INTERVAL_MS:
+            return None
+        buffered_limit, candles = buffered
+        if buffered_limit < limit:
+            return None
+        interval_ms = INTERVAL_MS[timeframe]
+        now_ms = int(time.time() * 1000)
+        last_open = int(candles['open_time'][-1])
+        gap = (now_ms - now_ms % interval_ms - last_open) // interval_ms + 1
+        if gap < 1 or gap >= limit // 2:
+            return None
+
+        klines = get_historical_klines(symbol, timeframe, limit=gap, start_time=last_open)
+        if not klines or int(klines[0][0]) != last_open:
+            return None # 이어 붙일 수 없으면 전체 요청
+        fresh = klines_to_candles(klines)
+        kept = candles['open_time'] < last_open
+        return tail_candles({col: np.concatenate([candles[col][kept], fresh[col]]) for col in fresh}, limit)
+
+    def _get_archived_candles(self, symbol, timeframe, needed):
+        """
+        디스크 보관소의 닫힌 캔들에 마지막 보관 이후 구간만 요청해서 붙이고, 최근 needed개 캔들을 반환합니다.
+        보관분이 needed개에 못 미치면 필요한 구간 전체를 받아 보관소를 새로 채웁니다.
+        """
+        interval_ms = INTERVAL_MS[timeframe]
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % interval_ms
+        last_open = self.archive.last_open_time(symbol, timeframe)
+        stored = self.archive.row_count(symbol, timeframe)
+
+        if last_open is None or stored + (current_open - last_open) // interval_ms - 1 < needed - 1:
+            start_time = current_open - (needed - 1) * interval_ms
+            refill = True
+        else:
+            start_time = last_open + interval_ms
+            refill = False
+
+        # 보통은 마지막 보관 봉 이후 몇 봉만 빠져 있으므로 빠진 개수만큼만 요청 (limit가 작을수록 가중치가 낮음)
+        gap = (current_open - last_open) // interval_ms + 1 if not refill else None
+        if gap is not None and gap <= MAX_KLINES_PER_REQUEST:
+            klines = get_historical_klines(symbol, timeframe, limit=gap, start_time=start_time)
+        else:
+            klines = get_klines_range(symbol, timeframe, start_time)
+        if not klines:
+            if refill:
+                return None
+            # 보충 요청이 실패해도 보관분은 유효하므로 그대로 사용 (진행 중인 봉 없이)
+            archived = self.archive.read(symbol, timeframe, limit=needed)
+            return None if archived is None else tail_candles(archived, needed)
+        fetched = klines_to_candles(klines)
+        closed = fetched['close_time'] < now_ms
+        closed_candles = {col: values[closed] for col, values in fetched.items()}
+        if refill:
+            self.archive.replace(symbol, timeframe, closed_candles)
+        else:
+            self.archive.append(symbol, timeframe, closed_candles)
+
+        archived = self.archive.read(symbol, timeframe, limit=needed)
+        if archived is None:
+            return tail_candles(fetched, needed)
+        open_candles = {col: values[~closed] for col, values in fetched.items()}
+        return tail_candles({col: np.concatenate([archived[col], open_candles[col]]) for col in archived}, needed)
+
+    def _indicator_series(self, candles, indicator, detail, params, cached):
+        """조건의 좌변이 되는 지표 배열을 계산합니다. cached(key, compute)로 같은 지표 계산을 재사용합니다."""
+        close = candles['close']
+        if indicator == "RSI":
+            length = params.get('length', 14)
+            return cached(('rsi', length), lambda: rsi(close, length))
+
+        if indicator == "Envelope":
+            length = params.get('length', 20)
+            percent = params.get('percent', 5)
+            bands = cached(('envelope', length, percent), lambda: envelope(close, length, percent))
+            return bands.get(_band_key(detail))
 
-    def _evaluate_condition(self, df_original, cond):
-        df = df_original.copy()
+        if indicator == "BollingerBands":
+            length = params.get('length', 20)
+            std = params.get('stddev', 2)
+            bands = cached(('bbands', length, std), lambda: bbands(close, length, std))
+            return bands.get(_band_key(detail))
+
+        if indicator == "MA":
+            length = params.get('length', 20)
+            if detail == "EMA":
+                return cached(('ema', length), lambda: ema(close, length))
+            return cached(('sma', length), lambda: sma(close, length))
+
+        if indicator == "MACD":
+            fast, slow, signal = params.get('fast', 12), params.get('slow', 26), params.get('signal', 9)
+            lines = cached(('macd', fast, slow, signal), lambda: macd(close, fast, slow, signal))
+            return lines.get({"MACD Line": 'macd', "Signal Line": 'signal', "Histogram": 'histogram'}.get(detail))
+
+        if indicator == "Stochastic":
+            k, d, smooth = params.get('k', 14), params.get('d', 3), params.get('smooth', 3)
+            lines = cached(('stoch', k, d, smooth), lambda: stoch(candles['high'], candles['low'], close, k, d, smooth))
+            return lines.get({"%K": 'k', "%D": 'd'}.get(detail))
+
+        if indicator == "ATR":
+            length = params.get('length', 14)
+            series = cached(('atr', length), lambda: atr(candles['high'], candles['low'], close, length))
+            if detail == "ATR %":
+                return cached(('atr_pct', length), lambda: series / close * 100.0)
+            return series
+
+        if indicator == "VolumeSpike":
+            length = params.get('length', 20)
+            return cached(('volume_spike', length), lambda: volume_spike(candles['volume'], length))
+
+        return None
+
+    def _evaluate_condition(self, candles, cond, cache=None):
+        """반환값: (만족 여부, 표시 문자열, 좌변 값, 우변 값). 비교 값을 알 수 없으면 None"""
+        if cache is None:
+            cache = {}
         params = parse_params(cond['params_str'])
         shift = cond['shift']
         indicator = cond['indicator']
@@ -206,78 +938,59 @@ class MonitoringEngine:
         operator = cond['operator']
         value_str = cond['value_str']
 
-        if not (0 <= shift < len(df) - 5):
-            return False, ""
+        length_total = candles_len(candles)
+        if not (0 <= shift < length_total - 5):
+            return False, "", None, None
 
+        def cached(key, compute):
+            if key not in cache:
+                cache[key] = compute()
+            return cache[key]
+
+        idx = -1 - shift
         condition_met = False
+        lhs_val = rhs_val = None # 근접도 계산용 비교 값
         full_display_str = ""
 
-        if indicator in ["RSI", "Envelope", "BollingerBands"]:
-            indicator_value = None
-            indicator_col_name = ""
+        if indicator in VALUE_INDICATORS:
             try:
-                if indicator == "RSI":
-                    df.ta.rsi(length=params.get('length', 14), append=True)
-                    indicator_col_name = df.columns[-1]
-                elif indicator == "Envelope":
-                    length = params.get('length', 20)
-                    percent = params.get('percent', 5) / 100.0
-                    sma = df['close'].rolling(window=length).mean()
-                    df['ENV_UPPER'] = sma * (1 + percent)
-                    df['ENV_LOWER'] = sma * (1 - percent)
-                    df['ENV_MIDDLE'] = sma
-                    if "Upper" in detail: indicator_col_name = 'ENV_UPPER'
-                    elif "Lower" in detail: indicator_col_name = 'ENV_LOWER'
-                    elif "Middle" in detail: indicator_col_name = 'ENV_MIDDLE'
-                elif indicator == "BollingerBands":
-                    df.ta.bbands(length=params.get('length', 20), std=params.get('stddev', 2), append=True)
-                    for col in df.columns:
-                        if col.startswith("BBU_") and "Upper" in detail: indicator_col_name = col; break
-                        elif col.startswith("BBM_") and "Middle" in detail: indicator_col_name = col; break
-                        elif col.startswith("BBL_") and "Lower" in detail: indicator_col_name = col; break
-                
-                if indicator_col_name and indicator_col_name in df.columns and len(df) > shift:
-                    indicator_value = df[indicator_col_name].iloc[-1 - shift]
-                else: return False, ""
-
+                series = self._indicator_series(candles, indicator, detail, params, cached)
             except Exception as e:
                 self.app.log(f"지표 계산 오류: {e}")
-                return False, ""
-
-            if indicator_value is not None and pd.isna(indicator_value): return False, ""
+                return False, "", None, None
+            if series is None: return False, "", None, None
 
-            lhs_val = indicator_value
+            lhs_val = series[idx]
+            if np.isnan(lhs_val): return False, "", None, None
             display_lhs = f"{indicator} {detail}({lhs_val:.4f})"
 
-            rhs_val = None
-            display_rhs = ""
-            
             value_str_lower = str(value_str).lower()
             if value_str_lower in ["open", "high", "low", "close"]:
-                rhs_val = df[value_str_lower].iloc[-1 - shift]
+                rhs_val = candles[value_str_lower][idx]
                 display_rhs = f"{value_str}({rhs_val:.4f})"
             else:
                 try: 
                     rhs_val = float(value_str)
                     display_rhs = value_str
-                except ValueError: return False, ""
+                except ValueError: return False, "", None, None
 
-            if lhs_val is None or rhs_val is None: return False, ""
-            
-            eval_str = f"{lhs_val} {operator} {rhs_val}"
-            condition_met = eval(eval_str)
+            condition_met = compare(lhs_val, operator, rhs_val)
             full_display_str = f"{display_lhs} {operator} {display_rhs}"
 
         elif indicator == "MASlope":
             length = params.get('length', 20)
-            ma_series = df.ta.sma(length=length)
-            if ma_series is None or len(ma_series) < 3 + shift: return False, ""
+            ma_series = cached(('sma', length), lambda: sma(candles['close'], length))
+            if len(ma_series) < 3 + shift: return False, "", None, None
+
+            ma_val_1 = ma_series[-1 - shift]
+            ma_val_2 = ma_series[-2 - shift]
+            ma_val_3 = ma_series[-3 - shift]
 
-            ma_val_1 = ma_series.iloc[-1 - shift]
-            ma_val_2 = ma_series.iloc[-2 - shift]
-            ma_val_3 = ma_series.iloc[-3 - shift]
+            if np.isnan(ma_val_1) or np.isnan(ma_val_2) or np.isnan(ma_val_3): return False, "", None, None
 
-            if pd.isna(ma_val_1) or pd.isna(ma_val_2) or pd.isna(ma_val_3): return False, ""
+            if detail in ("Direction", "Change") and ma_val_2 != 0:
+                # 방향 전환까지의 거리는 직전 봉 대비 MA 변화율(%)로 봅니다.
+                lhs_val, rhs_val = (ma_val_1 - ma_val_2) / ma_val_2 * 100, 0.0
 
             if detail == "Direction":
                 if value_str == "Rising" and ma_val_1 > ma_val_2: condition_met = True
@@ -290,40 +1003,43 @@ class MonitoringEngine:
                 full_display_str = f"MA({length}) {value_str}"
 
             elif detail == "Slope":
-                if ma_val_1 == 0: return False, ""
-                y = ma_series.iloc[-3 - shift:-1 - shift].values if shift > 0 else ma_series.tail(3).values
+                if ma_val_1 == 0: return False, "", None, None
+                # shift봉 전을 끝으로 하는 최근 3개 MA 값의 기울기
+                y = np.array([ma_val_3, ma_val_2, ma_val_1])
                 x = np.arange(len(y))
                 slope, _ = np.polyfit(x, y, 1)
                 percent_slope = (slope / ma_val_1) * 100
                 try: 
                     target_percent_slope = float(value_str)
-                    condition_met = eval(f"{percent_slope} {operator} {target_percent_slope}")
+                    lhs_val, rhs_val = percent_slope, target_percent_slope
+                    condition_met = compare(percent_slope, operator, target_percent_slope)
                     full_display_str = f"MA({length}) Slope({percent_slope:.4f}%) {operator} {target_percent_slope}%"
-                except (ValueError, TypeError): return False, ""
+                except (ValueError, TypeError): return False, "", None, None
 
         elif indicator == "MA_Compare":
             short_length = params.get('short ma', 20)
             long_length = params.get('long ma', 60)
-            short_ma = df.ta.sma(length=short_length)
-            long_ma = df.ta.sma(length=long_length)
-            if short_ma is None or long_ma is None or len(short_ma) < 1 + shift or len(long_ma) < 1 + shift: return False, ""
-            short_ma_val = short_ma.iloc[-1 - shift]
-            long_ma_val = long_ma.iloc[-1 - shift]
-            if long_ma_val == 0 or pd.isna(short_ma_val) or pd.isna(long_ma_val): return False, ""
+            short_ma = cached(('sma', short_length), lambda: sma(candles['close'], short_length))
+            long_ma = cached(('sma', long_length), lambda: sma(candles['close'], long_length))
+            if len(short_ma) < 1 + shift or len(long_ma) < 1 + shift: return False, "", None, None
+            short_ma_val = short_ma[-1 - shift]
+            long_ma_val = long_ma[-1 - shift]
+            if long_ma_val == 0 or np.isnan(short_ma_val) or np.isnan(long_ma_val): return False, "", None, None
             percentage_diff = ((short_ma_val - long_ma_val) / long_ma_val) * 100
             try:
                 target_percentage = float(value_str)
-                condition_met = eval(f"{percentage_diff} {operator} {target_percentage}")
+                lhs_val, rhs_val = percentage_diff, target_percentage
+                condition_met = compare(percentage_diff, operator, target_percentage)
                 full_display_str = f"MA({short_length}) vs MA({long_length}) Diff({percentage_diff:.2f}%) {operator} {target_percentage}%"
-            except (ValueError, TypeError): return False, ""
+            except (ValueError, TypeError): return False, "", None, None
 
         elif indicator == "Candle_Trend":
             try:
                 n = int(value_str)
                 price_series_key = detail.split(' ')[0].lower()
-                price_series = df[price_series_key]
+                price_series = candles[price_series_key]
                 
-                if len(price_series) < n + shift + 1: return False, ""
+                if len(price_series) < n + shift + 1: return False, "", None, None
 
                 count = 0
                 # n개의 봉이 연속적인지 확인하려면 n번의 비교가 필요
@@ -334,28 +1050,29 @@ class MonitoringEngine:
                         count = 0 # 데이터가 부족하면 연속이 아님
                         break
                     
-                    if "상승" in detail and price_series.iloc[current_index] > price_series.iloc[previous_index]:
+                    if "상승" in detail and price_series[current_index] > price_series[previous_index]:
                         count += 1
-                    elif "하락" in detail and price_series.iloc[current_index] < price_series.iloc[previous_index]:
+                    elif "하락" in detail and price_series[current_index] < price_series[previous_index]:
                         count += 1
                     else:
                         break # 연속이 깨지면 중단
                 
-                if eval(f"{count} {operator} {n}"):
+                lhs_val, rhs_val = count, n
+                if compare(count, operator, n):
                     condition_met = True
                     trend_type = "상승" if "상승" in detail else "하락"
                     full_display_str = f"{detail.replace(trend_type, '').strip()} {count}봉 연속 {trend_type}"
 
-            except (ValueError, IndexError): return False, ""
+            except (ValueError, IndexError, KeyError): return False, "", None, None
 
         elif indicator == "MA_Trend":
             try:
                 n = int(value_str)
                 length = params.get('length', 20)
-                if len(df) < length + n + shift: return False, ""
+                if length_total < length + n + shift: return False, "", None, None
 
-                ma_series = df.ta.sma(length=length)
-                if ma_series is None or len(ma_series) < n + shift + 1: return False, ""
+                ma_series = cached(('sma', length), lambda: sma(candles['close'], length))
+                if len(ma_series) < n + shift + 1: return False, "", None, None
 
                 count = 0
                 for i in range(n):
@@ -365,10 +1082,10 @@ class MonitoringEngine:
                         count = 0
                         break
                     
-                    current_val = ma_series.iloc[current_index]
-                    previous_val = ma_series.iloc[previous_index]
+                    current_val = ma_series[current_index]
+                    previous_val = ma_series[previous_index]
 
-                    if pd.isna(current_val) or pd.isna(previous_val):
+                    if np.isnan(current_val) or np.isnan(previous_val):
                         count = 0
                         break
 
@@ -379,13 +1096,14 @@ class MonitoringEngine:
                     else:
                         break
                 
-                if eval(f"{count} {operator} {n}"):
+                lhs_val, rhs_val = count, n
+                if compare(count, operator, n):
                     condition_met = True
                     trend_type = "상승" if detail == "연속 상승" else "하락"
                     full_display_str = f"MA({length}) {count}봉 연속 {trend_type}"
-            except (ValueError, IndexError): return False, ""
+            except (ValueError, IndexError): return False, "", None, None
 
         if condition_met:
-            return True, full_display_str
+            return True, full_display_str, lhs_val, rhs_val
         
-        return False, ""
+        return False, "", lhs_val, rhs_val
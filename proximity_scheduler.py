@@ -0,0 +1,94 @@
+# proximity_scheduler.py
+# 조건 만족까지 남은 거리(근접도)에 따라 코인별 갱신 주기를 정합니다.
+# 경계값 근처의 코인은 몇 초마다, 멀리 떨어진 코인은 드물게 다시 평가하되
+# 어떤 코인도 max_staleness초보다 오래 방치되지 않도록 보장합니다.
+
+# 0~100 범위 지표는 1포인트를 1%로 봅니다.
+OSCILLATOR_INDICATORS = ("RSI", "Stochastic")
+# 좌변이 이미 % 단위인 지표
+PERCENT_INDICATORS = ("MA_Compare", "MASlope", "OpenInterest")
+# 기준값 자체가 작은 비율이라 기준값 대비 상대 차이로 보는 지표 (예: 펀딩비 0.01% vs 0.05%)
+RATIO_INDICATORS = ("VolumeSpike", "FundingRate", "Premium")
+# 연속 봉 개수를 세는 지표. 한 봉 부족을 1%로 봅니다.
+COUNT_INDICATORS = ("Candle_Trend", "MA_Trend")
+COUNT_STEP_DISTANCE = 0.01
+
+def trigger_distance(cond, lhs, rhs, price=None):
+    """
+    불만족 조건이 만족되기까지 남은 거리를 0 이상의 상대값으로 반환합니다. (0.01 = 약 1%)
+    가격 단위 지표(밴드, MA, MACD, ATR)는 현재가 price로 나눕니다. 계산할 수 없으면 None
+    """
+    if lhs is None or rhs is None:
+        return None
+    try:
+        gap = abs(float(lhs) - float(rhs))
+    except (TypeError, ValueError):
+        return None
+    if gap != gap: # NaN
+        return None
+
+    indicator = cond['indicator']
+    if indicator in COUNT_INDICATORS:
+        return gap * COUNT_STEP_DISTANCE
+    if indicator in OSCILLATOR_INDICATORS or indicator in PERCENT_INDICATORS:
+        return gap / 100.0
+    if indicator == "ATR" and cond['detail'] == "ATR %":
+        return gap / 100.0
+    if indicator in RATIO_INDICATORS:
+        return gap / max(abs(float(rhs)), 1e-12)
+    if price:
+        return gap / abs(price)
+    return gap / max(abs(float(rhs)), 1e-12)
+
+class ProximityScheduler:
+    """코인별 최근 근접도와 다음 평가 시각을 관리합니다."""
+
+    def __init__(self, min_interval=5, max_staleness=300, far_distance=0.05):
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        # 이 거리 이상 떨어진 코인은 max_staleness 주기로만 갱신
+        self.far_distance = far_distance
+        self.next_due = {} # {symbol: 다음 평가 시각}
+        self.distances = {} # {symbol: 최근 평가에서 가장 가까운 조건의 거리}
+
+    def interval_for(self, distance):
+        """거리에 따른 갱신 주기(초). 가까운 쪽에 촘촘하도록 거리 비율의 제곱으로 늘립니다."""
+        if distance is None:
+            return self.max_staleness
+        ratio = min(max(distance, 0.0) / self.far_distance, 1.0)
+        return self.min_interval + (self.max_staleness - self.min_interval) * ratio * ratio
+
+    def is_due(self, symbol, now):
+        return now >= self.next_due.get(symbol, 0)
+
+    def reschedule(self, symbol, now, distance):
+        self.distances[symbol] = distance
+        self.next_due[symbol] = now + self.interval_for(distance)
+
+    def due_symbols(self, symbols, now):
+        """지금 평가할 코인을 가까운 순서로 반환합니다. (처음 보는 코인은 바로 평가)"""
+        due = [s for s in symbols if self.is_due(s, now)]
+        due.sort(key=lambda s: (self.distances.get(s) is None, self.distances.get(s) or 0.0))
+        return due
+
+    def seconds_until_next(self, symbols, now):
+        """symbols 중 가장 먼저 평가 시각이 되는 코인까지 남은 시간(초)"""
+        if not symbols:
+            return self.min_interval
+        earliest = min(self.next_due.get(s, 0) for s in symbols)
+        return min(max(earliest - now, 1.0), self.max_staleness)
+
+    def prune(self, symbols):
+        """더 이상 감시하지 않는 코인의 기록을 지웁니다."""
+        for symbol in list(self.next_due):
+            if symbol not in symbols:
+                self.next_due.pop(symbol, None)
+                self.distances.pop(symbol, None)
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 간단한 동작 확인
+    scheduler = ProximityScheduler()
+    rsi_cond = {'indicator': "RSI", 'detail': "RSI Value"}
+    for rsi_value in (30.5, 31, 35, 45, 70):
+        distance = trigger_distance(rsi_cond, rsi_value, 30)
+        print(f"RSI {rsi_value}: 거리={distance:.3f}, 주기={scheduler.interval_for(distance):.0f}초")
@@ -0,0 +1,96 @@
+# resampler.py
+# 가장 낮은 시간봉 캔들 하나만 받아서 상위 시간봉 캔들을 로컬에서 합성합니다.
+
+# 시간봉별 길이 (밀리초). 1w, 1M은 정렬 기준이 달라 합성 대상에서 제외합니다.
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '2h': 2 * 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '6h': 6 * 60 * 60_000,
+    '8h': 8 * 60 * 60_000,
+    '12h': 12 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+}
+
+# 바이낸스 선물 klines 요청 1회당 최대 캔들 수
+MAX_KLINES_PER_REQUEST = 1500
+
+def can_resample(base_interval, target_interval):
+    """base 시간봉 캔들로 target 시간봉 캔들을 만들 수 있는지 여부"""
+    base_ms = INTERVAL_MS.get(base_interval)
+    target_ms = INTERVAL_MS.get(target_interval)
+    if not base_ms or not target_ms:
+        return False
+    return target_ms >= base_ms and target_ms % base_ms == 0
+
+def plan_fetches(requirements):
+    """
+    {시간봉: 필요한 캔들 수}를 받아 실제로 요청할 시간봉과 개수를 정합니다.
+    반환값: ({요청 시간봉: limit}, {시간봉: 요청 시간봉})
+    상위 시간봉은 이미 요청하기로 한 하위 시간봉에서 합성하되,
+    필요한 하위 캔들 수가 요청 1회 한도를 넘으면 직접 요청으로 되돌립니다.
+    """
+    fetch_limits = {}
+    sources = {}
+    for timeframe in sorted(requirements, key=lambda tf: INTERVAL_MS.get(tf, 0)):
+        needed = requirements[timeframe]
+        source = timeframe
+        for base in sorted(fetch_limits, key=lambda tf: INTERVAL_MS[tf]):
+            if base == timeframe or not can_resample(base, timeframe) or fetch_limits[base] > MAX_KLINES_PER_REQUEST:
+                continue
+            ratio = INTERVAL_MS[timeframe] // INTERVAL_MS[base]
+            # 맨 앞의 불완전한 버킷은 버려지므로 한 봉 분량을 더 받습니다.
+            base_needed = ratio * (needed + 1)
+            if base_needed <= MAX_KLINES_PER_REQUEST:
+                fetch_limits[base] = max(fetch_limits[base], base_needed)
+                source = base
+                break
+
+        if source == timeframe:
+            fetch_limits[timeframe] = max(fetch_limits.get(timeframe, 0), needed)
+        sources[timeframe] = source
+    return fetch_limits, sources
+
+def resample_klines(klines, base_interval, target_interval):
+    """
+    바이낸스 kline 행 목록을 상위 시간봉으로 합칩니다.
+    바이낸스와 같은 규칙을 따릅니다: 버킷은 UTC epoch 기준으로 정렬되고,
+    시가는 첫 캔들, 종가는 마지막 캔들, 고가/저가는 최대/최소, 거래량류는 합계입니다.
+    시작 시점이 잘린 첫 버킷은 버리고, 진행 중인 마지막 버킷은 그대로 둡니다.
+    """
+    if base_interval == target_interval:
+        return klines
+    if not can_resample(base_interval, target_interval):
+        raise ValueError(f"{base_interval} 캔들로 {target_interval} 캔들을 만들 수 없습니다.")
+
+    target_ms = INTERVAL_MS[target_interval]
+    resampled = []
+    current = None
+    for k in klines:
+        open_time = int(k[0])
+        bucket_start = open_time - open_time % target_ms
+
+        if current is None or current[0] != bucket_start:
+            if current is None and open_time != bucket_start:
+                continue # 잘린 첫 버킷
+            current = [
+                bucket_start, float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]),
+                bucket_start + target_ms - 1, float(k[7]), int(k[8]), float(k[9]), float(k[10]), "0"
+            ]
+            resampled.append(current)
+            continue
+
+        current[2] = max(current[2], float(k[2]))
+        current[3] = min(current[3], float(k[3]))
+        current[4] = float(k[4])
+        current[5] += float(k[5])
+        current[7] += float(k[7])
+        current[8] += int(k[8])
+        current[9] += float(k[9])
+        current[10] += float(k[10])
+    return resampled
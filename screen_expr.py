@@ -0,0 +1,438 @@
+# screen_expr.py
+# 스크리닝 수식 언어. 예: rsi(14)[1] < 30 and close > bb(20,2).lower and ma(20) rising
+#
+# 수식은 한 번만 파싱해서 노드 트리로 만들고, 같은 모양의 노드는 하나로 합칩니다(hash-consing).
+# 그래서 여러 수식에 rsi(14)가 몇 번 나오든 한 번만 계산됩니다.
+# 평가는 (심볼 x 봉) 2차원 배열 위에서 이루어지므로 한 시간봉의 모든 심볼을 한 번에 계산합니다.
+#
+# 문법:
+#   식       := or식
+#   or식     := and식 ('or' and식)*
+#   and식    := not식 ('and' not식)*
+#   not식    := 'not' not식 | 비교식
+#   비교식   := 산술식 [('<'|'<='|'>'|'>='|'=='|'!='|'crosses_above'|'crosses_below') 산술식 | 'rising' | 'falling']
+#   산술식   := 항 (('+'|'-') 항)*
+#   항       := 단항 (('*'|'/') 단항)*
+#   단항     := '-' 단항 | 후위식
+#   후위식   := 기본식 ('[' 정수 ']' | '.' 이름)*      [n]: n봉 전 값, .이름: 여러 값을 내는 지표의 항목
+#   기본식   := 숫자 | 가격(open/high/low/close/volume) | 함수 '(' 인자, ... ')' | '(' 식 ')'
+
+import re
+import numpy as np
+
+from indicators import sma, ema, rsi, envelope, bbands, macd, stoch, atr, volume_spike, rolling_max, rolling_min, streak
+
+class ExpressionError(ValueError):
+    """수식 문법 또는 의미 오류"""
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+# 참/거짓을 내는 노드 (조건 수식의 최상위 노드)
+BOOLEAN_OPS = ('cmp', 'and', 'or', 'not', 'rising', 'falling', 'cross_above', 'cross_below')
+
+# 함수: (기본 파라미터, 가격 대신 다른 시계열을 첫 인자로 받을 수 있는지, 여러 값을 내는 경우 항목 목록)
+FUNCTIONS = {
+    "sma": ((20,), True, None),
+    "ma": ((20,), True, None),
+    "ema": ((20,), True, None),
+    "rsi": ((14,), True, None),
+    "highest": ((20,), True, None),
+    "lowest": ((20,), True, None),
+    "streak": ((), True, None),
+    "bb": ((20, 2), False, ("upper", "middle", "lower", "percent_b", "bandwidth")),
+    "env": ((20, 5), False, ("upper", "middle", "lower")),
+    "macd": ((12, 26, 9), False, ("macd", "signal", "histogram")),
+    "stoch": ((14, 3, 3), False, ("k", "d")),
+    "atr": ((14,), False, None),
+    "vspike": ((20,), False, None),
+}
+
+COMPARISON_OPS = ("<", "<=", ">", ">=", "==", "!=")
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|[<>()\[\],.+\-*/]))")
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise ExpressionError(f"알 수 없는 문자: '{text[pos:].strip()[:10]}' (위치 {pos})")
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(('num', float(number)))
+        elif name is not None:
+            tokens.append(('name', name.lower()))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    return tokens
+
+class Node:
+    """수식 트리 노드. 같은 key의 노드는 컴파일러가 하나만 만듭니다."""
+    __slots__ = ('op', 'args', 'key', 'lookback')
+
+    def __init__(self, op, args, key, lookback):
+        self.op = op
+        self.args = args
+        self.key = key
+        self.lookback = lookback
+
+    def __repr__(self):
+        return f"Node{self.key}"
+
+def _function_lookback(name, params):
+    if name == "streak":
+        return 2
+    if name == "macd":
+        return max(params[0], params[1]) + params[2]
+    if name == "stoch":
+        return params[0] + params[1] + params[2]
+    if name in ("rsi", "vspike"):
+        return params[0] + 1
+    return params[0]
+
+class ExpressionCompiler:
+    """수식을 노드 트리로 컴파일합니다. 한 컴파일러로 만든 수식끼리는 공통 부분식을 공유합니다."""
+
+    def __init__(self):
+        self.nodes = {} # {key: Node}
+        self.compiled = {} # {수식 문자열: Node}
+
+    def node(self, op, *args):
+        key = (op,) + tuple(arg.key if isinstance(arg, Node) else arg for arg in args)
+        existing = self.nodes.get(key)
+        if existing is not None:
+            return existing
+        lookback = max([arg.lookback for arg in args if isinstance(arg, Node)] or [0])
+        if op == 'shift':
+            lookback += args[1]
+        elif op == 'call':
+            lookback += _function_lookback(args[0], args[2])
+        elif op in ('rising', 'falling', 'cross_above', 'cross_below'):
+            lookback += 1
+        node = Node(op, args, key, lookback)
+        self.nodes[key] = node
+        return node
+
+    def compile(self, text, boolean=True):
+        """boolean=False이면 rsi(14)처럼 값을 내는 수식도 허용합니다. (스크리너 열)"""
+        text = str(text).strip()
+        root = self.compiled.get(text)
+        if root is None:
+            if not text:
+                raise ExpressionError("수식이 비어 있습니다.")
+            root = _Parser(self, tokenize(text)).parse()
+            self.compiled[text] = root
+        if boolean and root.op not in BOOLEAN_OPS:
+            raise ExpressionError("수식은 참/거짓을 내는 비교식이어야 합니다. (예: rsi(14) < 30)")
+        return root
+
+class _Parser:
+    def __init__(self, compiler, tokens):
+        self.c = compiler
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind, value=None):
+        token = self.take()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise ExpressionError(f"'{value or kind}'이(가) 필요합니다. (받은 값: {token[1]})")
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"수식 끝에 알 수 없는 부분이 있습니다: {self.peek()[1]}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == ('name', 'or'):
+            self.take()
+            node = self.c.node('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == ('name', 'and'):
+            self.take()
+            node = self.c.node('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() == ('name', 'not'):
+            self.take()
+            return self.c.node('not', self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_arith()
+        kind, value = self.peek()
+        if kind == 'op' and value in COMPARISON_OPS:
+            self.take()
+            return self.c.node('cmp', value, left, self.parse_arith())
+        if kind == 'name' and value in ('crosses_above', 'crosses_below'):
+            self.take()
+            return self.c.node('cross_above' if value == 'crosses_above' else 'cross_below', left, self.parse_arith())
+        if kind == 'name' and value in ('rising', 'falling'):
+            self.take()
+            return self.c.node(value, left)
+        return left
+
+    def parse_arith(self):
+        node = self.parse_term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = self.take()[1]
+            node = self.c.node('add' if op == '+' else 'sub', node, self.parse_term())
+        return node
+
+    def parse_term(self):
+        node = self.parse_unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.take()[1]
+            node = self.c.node('mul' if op == '*' else 'div', node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            operand = self.parse_unary()
+            if operand.op == 'const':
+                return self.c.node('const', -operand.args[0])
+            return self.c.node('neg', operand)
+        return self.parse_postfix()
+
+    def parse_postfix(self):
+        node = self.parse_primary()
+        while True:
+            if self.peek() == ('op', '['):
+                self.take()
+                kind, value = self.take()
+                if kind != 'num' or value != int(value) or value < 0:
+                    raise ExpressionError("[n]의 n은 0 이상의 정수여야 합니다.")
+                self.expect('op', ']')
+                if value:
+                    node = node if node.op == 'const' else self.c.node('shift', node, int(value))
+            elif self.peek() == ('op', '.'):
+                self.take()
+                field = self.expect('name')[1]
+                if node.op != 'call' or not FUNCTIONS[node.args[0]][2] or field not in FUNCTIONS[node.args[0]][2]:
+                    raise ExpressionError(f"'.{field}' 항목을 쓸 수 없습니다.")
+                node = self.c.node('field', node, field)
+            else:
+                return node
+
+    def parse_primary(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return self.c.node('const', value)
+        if kind == 'op' and value == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if kind == 'name' and value in PRICE_FIELDS:
+            return self.c.node('price', value)
+        if kind == 'name' and value in FUNCTIONS:
+            return self.parse_call(value)
+        if kind is None:
+            raise ExpressionError("수식이 중간에 끝났습니다.")
+        raise ExpressionError(f"알 수 없는 이름 또는 기호: {value}")
+
+    def parse_call(self, name):
+        defaults, takes_source, fields = FUNCTIONS[name]
+        self.expect('op', '(')
+        args = []
+        if self.peek() != ('op', ')'):
+            args.append(self.parse_arith())
+            while self.peek() == ('op', ','):
+                self.take()
+                args.append(self.parse_arith())
+        self.expect('op', ')')
+
+        source = self.c.node('price', 'close')
+        if args and args[0].op != 'const':
+            if not takes_source:
+                raise ExpressionError(f"{name}()의 인자는 숫자여야 합니다.")
+            source = args.pop(0)
+        if any(arg.op != 'const' for arg in args):
+            raise ExpressionError(f"{name}()의 기간 인자는 숫자여야 합니다.")
+        if len(args) > len(defaults):
+            raise ExpressionError(f"{name}()의 인자가 너무 많습니다. (최대 {len(defaults)}개)")
+        params = [arg.args[0] for arg in args] + list(defaults[len(args):])
+        params = tuple(int(p) if float(p).is_integer() else float(p) for p in params)
+        if name in ("sma", "ma", "ema", "rsi", "highest", "lowest", "atr", "vspike") and params[0] < 1:
+            raise ExpressionError(f"{name}()의 기간은 1 이상이어야 합니다.")
+        return self.c.node('call', 'sma' if name == 'ma' else name, source, params)
+
+# 함수가 가격 인자와 상관없이 직접 읽는 캔들 필드
+_CALL_FIELDS = {"bb": ("close",), "env": ("close",), "macd": ("close",), "stoch": ("high", "low", "close"),
+                "atr": ("high", "low", "close"), "vspike": ("volume",)}
+
+def price_fields(root):
+    """수식이 읽는 캔들 필드 집합 (예: {'close', 'volume'})"""
+    fields = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.op == 'price':
+            fields.add(node.args[0])
+        elif node.op == 'call':
+            fields.update(_CALL_FIELDS.get(node.args[0], ()))
+        stack.extend(arg for arg in node.args if isinstance(arg, Node))
+    return fields
+
+def _shift(values, n):
+    out = np.full(values.shape, np.nan)
+    if n < values.shape[-1]:
+        out[..., n:] = values[..., :values.shape[-1] - n]
+    return out
+
+def _valid(*arrays):
+    mask = True
+    for values in arrays:
+        if isinstance(values, np.ndarray) and values.dtype != bool:
+            mask = mask & ~np.isnan(values)
+    return mask
+
+def _as_bool(values):
+    return values if isinstance(values, np.ndarray) and values.dtype == bool else np.asarray(values, dtype=float) != 0
+
+def evaluate(node, data, memo=None):
+    """
+    node를 data({'open','high','low','close','volume': (심볼 x 봉) 배열})에서 평가합니다.
+    memo를 여러 수식에 같이 넘기면 공통 부분식은 한 번만 계산됩니다.
+    """
+    if memo is None:
+        memo = {}
+    cached = memo.get(node.key)
+    if cached is not None:
+        return cached
+
+    op, args = node.op, node.args
+    if op == 'const':
+        result = args[0]
+    elif op == 'price':
+        result = np.asarray(data[args[0]], dtype=np.float64)
+    elif op == 'shift':
+        result = _shift(np.asarray(evaluate(args[0], data, memo), dtype=np.float64), args[1])
+    elif op == 'field':
+        result = evaluate(args[0], data, memo)[args[1]]
+    elif op == 'call':
+        result = _call(args[0], evaluate(args[1], data, memo), args[2], data)
+    elif op == 'neg':
+        result = -evaluate(args[0], data, memo)
+    elif op in ('add', 'sub', 'mul', 'div'):
+        a, b = evaluate(args[0], data, memo), evaluate(args[1], data, memo)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'div': np.divide}[op](a, b)
+    elif op == 'cmp':
+        a, b = evaluate(args[1], data, memo), evaluate(args[2], data, memo)
+        with np.errstate(invalid='ignore'):
+            compared = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+                        '==': np.equal, '!=': np.not_equal}[args[0]](a, b)
+        result = compared & _valid(a, b)
+    elif op in ('cross_above', 'cross_below'):
+        a, b = evaluate(args[0], data, memo), evaluate(args[1], data, memo)
+        diff = np.asarray(a - b, dtype=np.float64)
+        prev = _shift(diff, 1)
+        with np.errstate(invalid='ignore'):
+            result = (diff > 0) & (prev <= 0) if op == 'cross_above' else (diff < 0) & (prev >= 0)
+    elif op in ('rising', 'falling'):
+        values = np.asarray(evaluate(args[0], data, memo), dtype=np.float64)
+        prev = _shift(values, 1)
+        with np.errstate(invalid='ignore'):
+            result = values > prev if op == 'rising' else values < prev
+    elif op == 'and':
+        result = _as_bool(evaluate(args[0], data, memo)) & _as_bool(evaluate(args[1], data, memo))
+    elif op == 'or':
+        result = _as_bool(evaluate(args[0], data, memo)) | _as_bool(evaluate(args[1], data, memo))
+    elif op == 'not':
+        result = ~_as_bool(evaluate(args[0], data, memo))
+    else:
+        raise ExpressionError(f"알 수 없는 노드: {op}")
+
+    memo[node.key] = result
+    return result
+
+def _call(name, source, params, data):
+    if name == "sma": return sma(source, params[0])
+    if name == "ema": return ema(source, params[0])
+    if name == "rsi": return rsi(source, params[0])
+    if name == "highest": return rolling_max(source, params[0])
+    if name == "lowest": return rolling_min(source, params[0])
+    if name == "streak": return streak(source)
+    if name == "bb": return bbands(data['close'], params[0], params[1])
+    if name == "env": return envelope(data['close'], params[0], params[1])
+    if name == "macd": return macd(data['close'], params[0], params[1], params[2])
+    if name == "stoch": return stoch(data['high'], data['low'], data['close'], params[0], params[1], params[2])
+    if name == "atr": return atr(data['high'], data['low'], data['close'], params[0])
+    if name == "vspike": return volume_spike(data['volume'], params[0])
+    raise ExpressionError(f"알 수 없는 함수: {name}")
+
+def stack_candles(candles_by_symbol, fields=PRICE_FIELDS):
+    """
+    {symbol: candles}를 마지막 봉 기준으로 맞춰 (심볼 x 봉) 배열로 쌓습니다. 짧은 심볼은 앞쪽을 NaN으로 채웁니다.
+    마지막 봉 시각이 다수와 다른 심볼은 제외합니다. 반환값: (심볼 목록, {필드: 2차원 배열})
+    """
+    if not candles_by_symbol:
+        return [], {}
+    last_opens = [int(c['open_time'][-1]) for c in candles_by_symbol.values()]
+    current = max(set(last_opens), key=last_opens.count)
+    symbols = [s for s, c in candles_by_symbol.items() if int(c['open_time'][-1]) == current]
+    width = max(len(candles_by_symbol[s]['close']) for s in symbols)
+    data = {}
+    for field in fields:
+        stacked = np.full((len(symbols), width), np.nan)
+        for row, symbol in enumerate(symbols):
+            values = np.asarray(candles_by_symbol[symbol][field], dtype=np.float64)
+            stacked[row, width - len(values):] = values
+        data[field] = stacked
+    return symbols, data
+
+def screen(roots, data, shifts=None):
+    """
+    여러 수식 노드를 같은 데이터에서 평가해 수식마다 [심볼별 만족 여부 배열]을 반환합니다.
+    shifts: 수식별 기준 봉 (0이면 마지막 봉, 1이면 1봉 전). 공통 부분식은 수식 사이에서도 한 번만 계산됩니다.
+    """
+    memo = {}
+    results = []
+    for i, root in enumerate(roots):
+        shift = shifts[i] if shifts else 0
+        mask = _as_bool(evaluate(root, data, memo))
+        if np.ndim(mask) == 0:
+            mask = np.full(data['close'].shape, bool(mask))
+        results.append(mask[:, -1 - shift] if shift < mask.shape[-1] else np.zeros(mask.shape[0], dtype=bool))
+    return results
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 간단한 동작 확인
+    rng = np.random.default_rng(5)
+    n_symbols, n_bars = 300, 200
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_bars)), axis=1))
+    data = {'open': close, 'high': close * 1.005, 'low': close * 0.995, 'close': close,
+            'volume': rng.uniform(100, 1000, (n_symbols, n_bars))}
+
+    compiler = ExpressionCompiler()
+    texts = ["rsi(14)[1] < 30 and close > bb(20,2).lower and ma(20) rising",
+             "rsi(14) < 40 or ma(20) crosses_above ema(50)",
+             "(close - ma(20)) / ma(20) * 100 > 2 and vspike(20) > 1.5"]
+    roots = [compiler.compile(t) for t in texts]
+    print(f"노드 {len(compiler.nodes)}개 (공통 부분식 공유), 필요한 봉 수: {[r.lookback for r in roots]}")
+    for text, mask in zip(texts, screen(roots, data)):
+        print(f"{mask.sum():3d}/{n_symbols} 심볼 만족: {text}")
+
+    # 1차원 개별 계산과 비교
+    row = 7
+    manual = (rsi(close[row], 14)[-2] < 30) and (close[row][-1] > bbands(close[row], 20, 2)['lower'][-1]) and (sma(close[row], 20)[-1] > sma(close[row], 20)[-2])
+    print("개별 계산과 일치:", manual == screen(roots[:1], data)[0][row])
@@ -0,0 +1,122 @@
+# screener.py
+# 엔진이 받아 둔 캔들 버퍼로 심볼별 지표 값 표를 계산합니다. (새 API 요청 없음)
+# 열과 필터는 screen_expr 수식으로 지정하며, 모든 심볼을 (심볼 x 봉) 배열로 한 번에 계산합니다.
+# 열과 필터에 같은 부분식(예: rsi(14))이 있으면 한 번만 계산됩니다.
+
+import time
+import threading
+import numpy as np
+
+from screen_expr import ExpressionCompiler, ExpressionError, evaluate, stack_candles
+from resampler import INTERVAL_MS
+
+# "이름=수식; 이름=수식" 형식의 기본 열 설정
+DEFAULT_SCREENER_COLUMNS = "RSI=rsi(14); %B=bb(20,2).percent_b; MA거리%=(close-ma(20))/ma(20)*100; 연속=streak(close)"
+# 진행 중인 봉에 덮어쓸 현재가의 최대 나이 (초)
+SCREENER_PRICE_MAX_AGE = 15
+
+def parse_columns(text):
+    """'RSI=rsi(14); %B=bb(20,2).percent_b' 를 [('RSI', 'rsi(14)'), ('%B', 'bb(20,2).percent_b')]로 변환"""
+    columns = []
+    for part in str(text).split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, expression = part.partition('=')
+        if not sep or not name.strip() or not expression.strip():
+            raise ExpressionError(f"열 설정은 '이름=수식' 형식이어야 합니다: {part}")
+        columns.append((name.strip(), expression.strip()))
+    if not columns:
+        raise ExpressionError("스크리너 열이 하나 이상 필요합니다.")
+    return columns
+
+class Screener:
+    """
+    설정(configure)은 GUI 스레드에서, 계산(compute)은 백그라운드 스레드에서 호출합니다.
+    설정은 잠금 아래에서 한 번에 교체되므로 계산 도중 바뀌어도 섞이지 않습니다.
+    """
+
+    def __init__(self, engine, timeframe="5m", columns_text=DEFAULT_SCREENER_COLUMNS, filter_text=""):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.compiler = ExpressionCompiler()
+        self.configure(timeframe, columns_text, filter_text)
+
+    def configure(self, timeframe, columns_text, filter_text=""):
+        """설정을 검사해서 적용합니다. 시간봉이나 수식이 잘못되면 ExpressionError (이전 설정 유지)"""
+        if timeframe not in INTERVAL_MS:
+            raise ExpressionError(f"지원하지 않는 시간봉입니다: {timeframe}")
+        columns = [(name, self.compiler.compile(expression, boolean=False)) for name, expression in parse_columns(columns_text)]
+        filter_root = self.compiler.compile(filter_text) if str(filter_text).strip() else None
+        with self.lock:
+            self.timeframe = timeframe
+            self.columns = columns
+            self.filter_root = filter_root
+            self.settings = (timeframe, columns_text, filter_text) # 엔진 프로세스에 그대로 넘기는 설정
+
+    def compute(self):
+        """
+        (열 이름 목록, {symbol: (열 값, ...)})을 반환합니다. 값을 알 수 없으면 NaN
+        엔진이 해당 시간봉 캔들을 받아 둔 심볼만 나오며, 진행 중인 봉은 최근 현재가로 갱신해서 계산합니다.
+        """
+        with self.lock:
+            timeframe, columns, filter_root = self.timeframe, self.columns, self.filter_root
+        candles_by_symbol = {symbol: candles for (symbol, tf), (_, candles) in list(self.engine.candle_buffers.items())
+                             if tf == timeframe}
+        symbols, data = stack_candles(candles_by_symbol)
+        names = [name for name, _ in columns]
+        if not symbols:
+            return names, {}
+        self._apply_last_prices(symbols, data, candles_by_symbol)
+
+        memo = {}
+        shape = (len(symbols),)
+        values = [np.broadcast_to(np.asarray(evaluate(root, data, memo), dtype=np.float64)[..., -1], shape)
+                  for _, root in columns]
+        if filter_root is not None:
+            passed = np.broadcast_to(np.asarray(evaluate(filter_root, data, memo), dtype=bool)[..., -1], shape)
+        else:
+            passed = np.ones(shape, dtype=bool)
+        return names, {symbol: tuple(float(column[row]) for column in values)
+                       for row, symbol in enumerate(symbols) if passed[row]}
+
+    def _apply_last_prices(self, symbols, data, candles_by_symbol):
+        """쌓은 배열(복사본)의 진행 중인 봉 종가/고가/저가를 최근 현재가로 바꿉니다. 엔진 버퍼는 건드리지 않습니다."""
+        now = time.time()
+        for row, symbol in enumerate(symbols):
+            latest = self.engine.last_prices.get(symbol)
+            if latest is None or now - latest[1] > SCREENER_PRICE_MAX_AGE:
+                continue
+            if candles_by_symbol[symbol]['close_time'][-1] < now * 1000:
+                continue # 마지막 봉이 이미 마감됨
+            price = latest[0]
+            data['close'][row, -1] = price
+            data['high'][row, -1] = max(data['high'][row, -1], price)
+            data['low'][row, -1] = min(data['low'][row, -1], price)
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 임의 캔들 버퍼로 동작 확인
+    class _Engine:
+        candle_buffers = {}
+        last_prices = {}
+
+    rng = np.random.default_rng(3)
+    engine = _Engine()
+    for i in range(5):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))
+        open_time = np.arange(120, dtype=np.int64) * 300_000
+        engine.candle_buffers[(f"COIN{i}USDT", "5m")] = (170, {
+            'open_time': open_time, 'open': close, 'high': close * 1.002, 'low': close * 0.998, 'close': close,
+            'volume': rng.uniform(100, 1000, 120), 'close_time': open_time + 299_999})
+
+    screener = Screener(engine)
+    names, rows = screener.compute()
+    print(names)
+    for symbol, row in rows.items():
+        print(symbol, ["%.2f" % v for v in row])
+    screener.configure("5m", "RSI=rsi(14); 상승중=ma(20) rising", "rsi(14) > 50")
+    print("필터 rsi(14) > 50:", screener.compute()[1])
+    try:
+        screener.configure("7m", "RSI=rsi(14)")
+    except ExpressionError as e:
+        print("잘못된 시간봉:", e, "/ 유지된 설정:", screener.settings)
@@ -2,14 +2,22 @@
 
 import telegram
 import asyncio
+import config
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 
-def send_telegram_message(message):
-    """텔레그램 메시지를 비동기적으로 전송합니다."""
+# 프로필별 알림 채팅방. config.py에 TELEGRAM_PROFILE_CHAT_IDS = {"스캘핑": "-100...", ...} 형태로 지정
+PROFILE_CHAT_IDS = getattr(config, 'TELEGRAM_PROFILE_CHAT_IDS', {})
+
+def profile_chat_id(profile):
+    """프로필의 알림 채팅방 ID. 따로 지정하지 않은 프로필은 기본 채팅방을 씁니다."""
+    return PROFILE_CHAT_IDS.get(profile) or TELEGRAM_CHAT_ID
+
+def send_telegram_message(message, chat_id=None):
+    """텔레그램 메시지를 비동기적으로 전송합니다. chat_id를 생략하면 기본 채팅방으로 보냅니다."""
     async def main():
         try:
             bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
-            await bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+            await bot.send_message(chat_id=chat_id or TELEGRAM_CHAT_ID, text=message)
             print(f"텔레그램 메시지 전송 성공: {message}")
         except Exception as e:
             print(f"텔레그램 메시지 전송 실패: {e}")
@@ -0,0 +1,232 @@
+# trigger_index.py
+# 진행 중인 봉의 종가가 얼마가 되면 조건이 만족되는지(트리거 가격)를 이전 캔들로부터 닫힌 해로 구해 두고,
+# 코인별로 정렬된 목록에 보관합니다. 시세 피드에서 새 가격이 들어오면 이분 탐색으로
+# 넘어선 조건만 꺼내므로 캔들 재요청이나 지표 재계산 없이 봉 중간에 알림을 보낼 수 있습니다.
+#
+# 지원 조건 (shift=0, 단독 조건만):
+#   Envelope/MA(SMA, EMA)/BollingerBands 밴드 vs Close 또는 숫자 (볼린저 상/하단은 Close만)
+#   RSI vs 숫자
+
+import bisect
+import math
+import threading
+import numpy as np
+
+from indicators import ema, rma
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _sma_trigger(prev_closes, length, factor, value_str):
+    """
+    band = factor * SMA(length)에서 진행 중인 봉 종가 P에 대한 트리거 가격.
+    반환값: (트리거 가격, band - rhs가 P에 대해 증가하는지 여부)
+    """
+    prev_sum = float(np.sum(prev_closes[-(length - 1):])) if length > 1 else 0.0
+    if str(value_str).lower() == "close":
+        # factor*(S+P)/L = P  ->  P = factor*S/(L-factor), band - P는 P에 대해 감소
+        if length - factor <= 0:
+            return None
+        return factor * prev_sum / (length - factor), False
+    target = _to_float(value_str)
+    if target is None or factor == 0:
+        return None
+    return target * length / factor - prev_sum, True
+
+def _ema_trigger(prev_closes, length, value_str):
+    prev_ema = ema(prev_closes, length)[-1]
+    if np.isnan(prev_ema):
+        return None
+    alpha = 2.0 / (length + 1)
+    if str(value_str).lower() == "close":
+        # EMA - P = (1-alpha)(이전 EMA - P)
+        return float(prev_ema), False
+    target = _to_float(value_str)
+    if target is None:
+        return None
+    return (target - (1 - alpha) * prev_ema) / alpha, True
+
+def _bbands_trigger(prev_closes, length, std, band):
+    """P가 상단(또는 하단) 밴드와 같아지는 가격. 밴드 - P는 해당 근에서 양수에서 음수로 바뀝니다."""
+    window = prev_closes[-(length - 1):]
+    n = float(length)
+    s = float(np.sum(window))
+    q = float(np.sum(window * window))
+    k2 = float(std) ** 2
+    # ((L-1)P - S)^2 = k^2 ((L-1)P^2 - 2SP + LQ - S^2) 를 P에 대해 정리한 2차식
+    a = (n - 1) * (n - 1 - k2)
+    b = -2 * s * (n - 1 - k2)
+    c = s * s * (1 + k2) - k2 * n * q
+    if a <= 0:
+        return None
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    root = math.sqrt(disc)
+    high, low = (-b + root) / (2 * a), (-b - root) / (2 * a)
+    return (high if band == 'upper' else low), False
+
+def _rsi_trigger(prev_closes, length, value_str):
+    """RSI가 목표값이 되는 진행 중인 봉의 종가. RSI는 P에 대해 증가합니다."""
+    target = _to_float(value_str)
+    if target is None or not 0 < target < 100:
+        return None
+    diff = np.diff(prev_closes, prepend=np.nan)
+    up_avg = rma(np.clip(diff, 0, None), length)[-1]
+    down_avg = rma(np.clip(-diff, 0, None), length)[-1]
+    if np.isnan(up_avg) or np.isnan(down_avg):
+        return None
+    # rma는 가중치 합으로 나눈 평균이므로 분자/분모로 되돌려서 한 봉을 더 누적
+    beta = 1.0 - 1.0 / length
+    valid = len(prev_closes) - 1
+    den = (1 - beta ** valid) / (1 - beta)
+    up_num, down_num = beta * up_avg * den, beta * down_avg * den
+    ratio = target / 100.0
+    last_close = float(prev_closes[-1])
+    gain = (ratio * (up_num + down_num) - up_num) / (1 - ratio)
+    if gain >= 0:
+        return last_close + gain, True
+    loss = up_num / ratio - (up_num + down_num)
+    return last_close - loss, True
+
+def solve_trigger(candles, cond, params):
+    """
+    진행 중인 마지막 봉에서 조건이 만족되기 시작하는 종가와 방향을 구합니다.
+    반환값: (트리거 가격, '>' 또는 '<') - 가격이 트리거보다 크면(작으면) 만족. 풀 수 없으면 None
+    """
+    if cond['shift'] != 0 or cond['operator'] not in ('>', '>=', '<', '<='):
+        return None
+    indicator = cond['indicator']
+    detail = cond['detail']
+    value_str = cond['value_str']
+    closes = np.asarray(candles['close'], dtype=np.float64)
+    prev_closes = closes[:-1]
+    if len(prev_closes) == 0 or np.isnan(prev_closes).any():
+        return None
+    if str(value_str).lower() in ("open", "high", "low"):
+        return None
+
+    length = int(params.get('length', 14 if indicator == "RSI" else 20))
+    if length < 1 or len(prev_closes) < length:
+        return None
+
+    solved = None
+    detail_lower = str(detail).lower()
+    if indicator == "Envelope":
+        ratio = params.get('percent', 5) / 100.0
+        factor = 1 + ratio if 'upper' in detail_lower else 1 - ratio if 'lower' in detail_lower else 1.0
+        solved = _sma_trigger(prev_closes, length, factor, value_str)
+    elif indicator == "MA":
+        solved = _ema_trigger(prev_closes, length, value_str) if detail == "EMA" else _sma_trigger(prev_closes, length, 1.0, value_str)
+    elif indicator == "BollingerBands":
+        if 'middle' in detail_lower:
+            solved = _sma_trigger(prev_closes, length, 1.0, value_str)
+        elif str(value_str).lower() == "close" and length > 1:
+            solved = _bbands_trigger(prev_closes, length, params.get('stddev', 2), 'upper' if 'upper' in detail_lower else 'lower')
+    elif indicator == "RSI":
+        solved = _rsi_trigger(prev_closes, length, value_str)
+
+    if solved is None:
+        return None
+    trigger, increasing = solved
+    if not math.isfinite(trigger) or trigger <= 0:
+        return None
+    # lhs - rhs가 증가 함수이면 '>' 조건은 가격이 트리거 위로 갈 때 만족
+    above = increasing == (cond['operator'] in ('>', '>='))
+    return trigger, ('>' if above else '<')
+
+class TriggerIndex:
+    """코인별로 트리거 가격을 정렬해 두고 새 가격이 넘어선 항목을 꺼냅니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {symbol: {'>': ([가격], [항목]), '<': ([가격], [항목])}}, 가격 오름차순
+        self.books = {}
+        self.keys = {} # {(symbol, cond_key): 항목}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _remove(self, symbol, entry):
+        prices, entries = self.books[symbol][entry['direction']]
+        for i in range(bisect.bisect_left(prices, entry['price']), len(prices)):
+            if entries[i] is entry:
+                del prices[i]
+                del entries[i]
+                break
+        self.keys.pop((symbol, entry['cond_key']), None)
+
+    def update(self, symbol, cond_key, trigger, **info):
+        """
+        조건의 트리거를 등록하거나 교체합니다. trigger가 None이면 기존 항목만 지웁니다.
+        trigger는 solve_trigger의 반환값이며, info(expires_at 등)는 항목에 그대로 담깁니다.
+        """
+        with self.lock:
+            old = self.keys.get((symbol, cond_key))
+            if old is not None:
+                self._remove(symbol, old)
+            if trigger is None:
+                return
+            price, direction = trigger
+            entry = dict(info, price=price, direction=direction, cond_key=cond_key)
+            book = self.books.setdefault(symbol, {'>': ([], []), '<': ([], [])})
+            prices, entries = book[direction]
+            pos = bisect.bisect_right(prices, price)
+            prices.insert(pos, price)
+            entries.insert(pos, entry)
+            self.keys[(symbol, cond_key)] = entry
+
+    def check(self, symbol, price, now):
+        """
+        price가 넘어선 트리거 항목을 꺼내서 반환합니다. (한 번 꺼낸 항목은 다음 등록 전까지 다시 나오지 않음)
+        봉이 끝나 expires_at이 지난 항목은 조용히 버립니다.
+        """
+        with self.lock:
+            book = self.books.get(symbol)
+            if not book:
+                return []
+            above_prices, above_entries = book['>']
+            below_prices, below_entries = book['<']
+            cut_above = bisect.bisect_left(above_prices, price)
+            cut_below = bisect.bisect_right(below_prices, price)
+            fired = above_entries[:cut_above] + below_entries[cut_below:]
+            if not fired:
+                return []
+            del above_prices[:cut_above], above_entries[:cut_above]
+            del below_prices[cut_below:], below_entries[cut_below:]
+            for entry in fired:
+                self.keys.pop((symbol, entry['cond_key']), None)
+            return [entry for entry in fired if entry.get('expires_at') is None or entry['expires_at'] > now]
+
+if __name__ == '__main__':
+    # 파일 단독 실행 시 닫힌 해를 지표 재계산 결과와 비교 검증
+    from indicators import sma, envelope, bbands, rsi
+
+    rng = np.random.default_rng(3)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+
+    def series_at(cond, params, price):
+        c = np.append(closes[:-1], price)
+        length = params.get('length', 14 if cond['indicator'] == "RSI" else 20)
+        if cond['indicator'] == "RSI": return rsi(c, length)[-1]
+        if cond['indicator'] == "Envelope": return envelope(c, length, params.get('percent', 5))[cond['detail'].split()[0].lower()][-1]
+        if cond['indicator'] == "BollingerBands": return bbands(c, length, params.get('stddev', 2))[cond['detail'].split()[0].lower()][-1]
+        return ema(c, length)[-1] if cond['detail'] == "EMA" else sma(c, length)[-1]
+
+    cases = [
+        ("RSI", "RSI Value", "length=14", "<", "30"), ("RSI", "RSI Value", "length=14", ">", "70"),
+        ("Envelope", "Lower Band", "length=20, percent=5", ">", "Close"),
+        ("BollingerBands", "Upper Band", "length=20, stddev=2", "<", "Close"),
+        ("BollingerBands", "Lower Band", "length=20, stddev=2", ">", "Close"),
+        ("MA", "EMA", "length=20", ">", "Close"), ("MA", "SMA", "length=20", "<", "120"),
+    ]
+    for indicator, detail, params_str, operator, value_str in cases:
+        params = {k.strip(): float(v) if '.' in v else int(v) for k, v in (p.split('=') for p in params_str.split(','))}
+        cond = {'indicator': indicator, 'detail': detail, 'operator': operator, 'value_str': value_str, 'shift': 0}
+        trigger, direction = solve_trigger({'close': closes}, cond, params)
+        lhs = series_at(cond, params, trigger)
+        rhs = trigger if value_str == "Close" else float(value_str)
+        print(f"{indicator} {detail} {operator} {value_str}: 트리거={trigger:.4f} ({direction}), 트리거에서 좌변-우변={lhs - rhs:.2e}")
@@ -0,0 +1,113 @@
+# weight_governor.py
+# 프로세스 전체가 공유하는 바이낸스 API 가중치(weight) 예산 관리자.
+# GUI 시세 갱신과 모니터링 엔진이 같은 예산을 나눠 쓰며, 엔진 요청이 우선합니다.
+# 엔진을 별도 프로세스에서 돌리면 예산을 공유할 수 없으므로 set_share()로 IP 한도를 두 프로세스가 나눠 가집니다.
+
+import threading
+import time
+
+# 우선순위 (값이 작을수록 중요)
+PRIORITY_ENGINE = 0   # 조건 평가용 요청
+PRIORITY_DISPLAY = 1  # 화면 표시용 시세 갱신
+
+# 바이낸스 선물 IP당 분당 가중치 한도
+FUTURES_WEIGHT_LIMIT_1M = 2400
+
+class WeightGovernor:
+    """
+    분당 가중치 한도를 따르는 토큰 버킷.
+    표시용 요청은 예산이 display_reserve 비율 이상 남아 있을 때만 통과하므로,
+    예산이 빠듯해지면 엔진 요청에 자리를 내줍니다.
+    """
+
+    def __init__(self, weight_limit=FUTURES_WEIGHT_LIMIT_1M, safety_ratio=0.8, display_reserve=0.3):
+        self.weight_limit = weight_limit
+        self.full_capacity = weight_limit * safety_ratio # IP 전체 예산
+        self.share = 1.0
+        self.capacity = self.full_capacity # 이 프로세스가 쓸 수 있는 예산
+        self.refill_per_sec = self.capacity / 60.0
+        self.display_reserve = display_reserve
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_sec)
+        self.last_refill = now
+        return now
+
+    def acquire(self, weight, priority=PRIORITY_ENGINE, timeout=None):
+        """
+        weight만큼 예산을 확보합니다. 확보하면 True, timeout 안에 확보하지 못하면 False.
+        timeout=None이면 확보될 때까지 기다립니다.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        floor = self.capacity * self.display_reserve if priority >= PRIORITY_DISPLAY else 0.0
+        # 한도보다 큰 요청도 언젠가는 통과할 수 있도록 보정
+        weight = min(weight, self.capacity - floor)
+
+        with self.condition:
+            while True:
+                now = self._refill()
+                if now >= self.blocked_until and self.tokens - weight >= floor:
+                    self.tokens -= weight
+                    return True
+
+                wait = max(self.blocked_until - now, (weight + floor - self.tokens) / self.refill_per_sec)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self.condition.wait(wait)
+
+    def set_share(self, share):
+        """IP 전체 예산 중 이 프로세스가 쓸 비율을 정합니다. (엔진 프로세스와 GUI 프로세스가 나눠 쓸 때)"""
+        with self.condition:
+            self._refill()
+            self.share = share
+            self.capacity = self.full_capacity * share
+            self.refill_per_sec = self.capacity / 60.0
+            self.tokens = min(self.tokens, self.capacity)
+            self.condition.notify_all()
+
+    def sync_used_weight(self, used_weight):
+        """
+        응답 헤더(X-MBX-USED-WEIGHT-1M)로 받은 실제 사용량에 맞춰 남은 예산을 보정합니다.
+        헤더는 IP 전체 사용량이므로 예산을 나눠 쓰는 중이면 IP 전체 예산 기준으로 남은 양을 비교합니다.
+        """
+        with self.condition:
+            self._refill()
+            self.tokens = min(self.tokens, self.full_capacity - used_weight)
+
+    def penalize(self, retry_after):
+        """429/418 응답을 받으면 retry_after초 동안 모든 요청을 멈춥니다."""
+        with self.condition:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.condition.notify_all()
+
+    def utilization(self):
+        """사용 중인 예산 비율 (0.0 ~ 1.0 이상)"""
+        with self.condition:
+            now = self._refill()
+            if now < self.blocked_until:
+                return 1.0
+            return 1.0 - self.tokens / self.capacity
+
+    def suggested_interval(self, base_interval):
+        """예산 사용률에 따라 표시용 갱신 주기를 늘려서 돌려줍니다."""
+        usage = self.utilization()
+        if usage < 0.5:
+            return base_interval
+        if usage < 0.7:
+            return base_interval * 2
+        if usage < 0.85:
+            return base_interval * 4
+        return base_interval * 10
+
+# 프로세스 전역 인스턴스
+governor = WeightGovernor()